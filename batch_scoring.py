@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Batched Plan Scoring
+Evaluates many candidate weekly plans in one call using the nutrient matrix,
+chunked so very large batches stay within a fixed memory budget
+"""
+
+import time
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix
+
+# Working memory allowed per chunk (bytes)
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
+
+def encode_plans(engine, plans, slots=None):
+    """Convert plans ({day: {slot: [(food, portion_key), ...]}}) into day blocks and index arrays
+
+    Returns (days, day_blocks, food_idx, portion_idx). day_blocks has shape
+    plans x days and points into food_idx/portion_idx, which hold each distinct
+    day dict once with shape blocks x slots x rows. Padding rows point at the
+    engine's zero row. A meal slot outside slots raises ValueError rather than
+    being dropped.
+    """
+    plans = list(plans)
+    if not plans:
+        raise ValueError("No plans to encode")
+    days = sorted(plans[0])
+    slots = list(slots or engine.meal_names or {slot for day in plans[0].values() for slot in day})
+    slot_set = set(slots)
+
+    # Plans built from a shared library of day dicts encode each distinct day once
+    distinct = {}
+    for plan in plans:
+        if sorted(plan) != days:
+            raise ValueError(f"All plans must cover the same days: expected {days}, got {sorted(plan)}")
+        for day, meals in plan.items():
+            if id(meals) not in distinct:
+                unknown = meals.keys() - slot_set
+                if unknown:
+                    raise ValueError(f"Unknown meal slot(s) {sorted(unknown)} on day {day}; expected {slots}")
+                distinct[id(meals)] = (len(distinct), meals)
+    rows = max([1] + [len(ingredients) for _, meals in distinct.values() for ingredients in meals.values()])
+    day_blocks = np.array([[distinct[id(plan[day])][0] for day in days] for plan in plans],
+                          dtype=np.intp).reshape(len(plans), len(days))
+
+    block_shape = (len(distinct), len(slots), rows)
+    food_idx = np.full(block_shape, engine.unknown_food, dtype=np.int32)
+    portion_idx = np.full(block_shape, engine.unknown_portion, dtype=np.int32)
+
+    # Most rows repeat, so resolve each distinct (food, portion_key) once
+    codes = {}
+    for b, meals in distinct.values():
+        for s, slot in enumerate(slots):
+            for r, row in enumerate(meals.get(slot, ())):
+                code = codes.get(row)
+                if code is None:
+                    food, portion_key = row
+                    code = codes[row] = (engine.food_index.get(food, engine.unknown_food),
+                                         engine.portion_index.get(portion_key, engine.unknown_portion))
+                food_idx[b, s, r], portion_idx[b, s, r] = code
+    return days, day_blocks, food_idx, portion_idx
+
+
+def _dense(engine, food_idx):
+    """True if a plan-day x food gram matrix is smaller than gathering every row"""
+    n_slots, n_rows = food_idx.shape[1:]
+    return len(engine.matrix) <= n_slots * n_rows * len(engine.nutrients)
+
+
+def chunk_size(engine, day_blocks, food_idx, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Number of plans that can be scored per chunk within memory_budget"""
+    n_days = day_blocks.shape[1]
+    n_cells = food_idx.shape[1] * food_idx.shape[2]
+    # Per plan-day: gathered food/portion indices and grams, then the gram matrix
+    # (or gathered nutrient rows) and the totals
+    width = n_cells * (4 + 4 + 8) + len(engine.nutrients) * 8 * 2
+    if _dense(engine, food_idx):
+        width += n_cells * 8 + len(engine.matrix) * 8
+    else:
+        width += n_cells * len(engine.nutrients) * 8
+    return max(1, memory_budget // (n_days * width))
+
+
+def _chunk_totals(engine, blocks, food_idx, portion_idx, dense):
+    """Nutrient totals (plan-days x nutrients) for one chunk of day block ids
+
+    Kept out of iter_scores so the gathered rows are freed before the chunk is
+    yielded.
+    """
+    f = food_idx[blocks]
+    grams = engine.portion_grams[portion_idx[blocks]]
+    if dense:
+        n_foods = len(engine.matrix)
+        cells = (f + (np.arange(len(f)) * n_foods)[:, None]).ravel()
+        weights = np.bincount(cells, grams.ravel(), minlength=len(f) * n_foods)
+        totals = weights.reshape(-1, n_foods) @ engine.matrix
+    else:
+        totals = np.einsum('drn,dr->dn', engine.matrix[f], grams)
+    totals /= 100.0
+    return totals
+
+
+def iter_scores(engine, day_blocks, food_idx, portion_idx, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Yield (start, totals) per chunk; totals has shape chunk x days x nutrients
+
+    Each chunk gathers its plans' day blocks, so only one chunk of plan-day rows
+    is ever materialized. Small food tables scatter grams into a plan-day x food
+    matrix and take one matrix product with the nutrient matrix; large ones
+    gather rows instead.
+    """
+    n_plans, n_days = day_blocks.shape
+    n_cells = food_idx.shape[1] * food_idx.shape[2]
+    dense = _dense(engine, food_idx)
+    step = chunk_size(engine, day_blocks, food_idx, memory_budget)
+    food_idx = food_idx.reshape(-1, n_cells)
+    portion_idx = portion_idx.reshape(-1, n_cells)
+    for start in range(0, n_plans, step):
+        totals = _chunk_totals(engine, day_blocks[start:start + step].ravel(), food_idx, portion_idx, dense)
+        yield start, totals.reshape(-1, n_days, len(engine.nutrients))
+
+
+def score_encoded(engine, day_blocks, food_idx, portion_idx, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Return (totals, percent_dv) arrays of shape plans x days x nutrients
+
+    Totals are raw sums of every ingredient row; %DV is NaN for nutrients
+    without a DV entry.
+    """
+    n_plans, n_days = day_blocks.shape
+    totals = np.empty((n_plans, n_days, len(engine.nutrients)))
+    for start, chunk in iter_scores(engine, day_blocks, food_idx, portion_idx, memory_budget):
+        totals[start:start + len(chunk)] = chunk
+    return totals, totals / engine.dv * 100
+
+
+def score_plans(engine, plans, slots=None, memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Score candidate plans in one shot
+
+    Returns a dict with 'days', 'nutrients', 'totals' and 'percent_dv'.
+    """
+    days, day_blocks, food_idx, portion_idx = encode_plans(engine, plans, slots)
+    totals, percent_dv = score_encoded(engine, day_blocks, food_idx, portion_idx, memory_budget)
+    return {'days': days, 'nutrients': list(engine.nutrients), 'totals': totals, 'percent_dv': percent_dv}
+
+
+def main():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+    # A large batch of candidate weeks drawn from the bulking and cutting days
+    n_plans = 100_000
+    rng = np.random.default_rng(0)
+    phases = [bulking_meals, cutting_meals]
+    plans = [{day: phases[p % 2][int(src)] for day, src in zip(range(1, 8), rng.integers(1, 8, 7))}
+             for p in range(n_plans)]
+    plans[:2] = phases
+
+    start = time.perf_counter()
+    days, day_blocks, food_idx, portion_idx = encode_plans(engine, plans)
+    encoded = time.perf_counter() - start
+    totals, percent_dv = score_encoded(engine, day_blocks, food_idx, portion_idx)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 80)
+    print(f"Scored {n_plans:,} plans ({n_plans * len(days):,} plan-days) in {elapsed:.3f}s "
+          f"(encode {encoded:.3f}s, score {elapsed - encoded:.3f}s)")
+    print(f"Throughput: {n_plans * len(days) / elapsed:,.0f} plan-days/s")
+    print("=" * 80)
+    for phase, p in (('bulking', 0), ('cutting', 1)):
+        iron = percent_dv[p, :, engine.nutrient_index['iron']]
+        print(f"{phase.upper():8s} iron %DV by day: " + ", ".join(f"{v:.0f}" for v in iron))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+Times each calculation path on deterministic synthetic food tables (10 to
+500k foods), portion maps and plan populations (1 to 1M plan-days), appends
+the results to a JSONL history file and flags any case that got slower than
+its recent median by more than the regression threshold. The median is taken
+over earlier runs of the same preset on the same host only. Case names give
+the number of days actually timed.
+
+Paths:
+    reference  calc_day_with_sources on the shipped tables (pure Python)
+    per_day    NutrientMatrix.day_with_sources, one day at a time
+    batch      batch_scoring.score_encoded over whole plan populations
+    export     data_exporter.export of per-day JSON files
+
+Usage:
+    python3 benchmarks.py [--preset quick|full] [--history FILE] [--threshold 0.15] [--repeat 3]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+import calculate_all_nutrients_complete as reference
+from batch_scoring import score_encoded
+from data_exporter import export
+from nutrient_matrix import NutrientMatrix
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_HISTORY = os.path.join(HERE, 'benchmark_history.jsonl')
+
+# Fractional slowdown against the recent median that counts as a regression
+DEFAULT_THRESHOLD = 0.15
+# Previous runs the median is taken over
+HISTORY_WINDOW = 5
+# Run fields that must match for timings to be comparable
+HOST_FIELDS = ('host', 'machine', 'cpus')
+
+# (foods, plan-days) per preset; per-day style paths time a capped sample of the days
+PRESETS = {
+    'quick': {'foods': [10, 10_000], 'days': [1_000, 10_000]},
+    'full': {'foods': [10, 10_000, 500_000], 'days': [1, 10_000, 1_000_000]},
+}
+SAMPLE_DAYS = {'reference': 2_000, 'per_day': 20_000, 'export': 2_000}
+
+SLOTS = list(reference.MEAL_NAMES)
+N_PORTIONS = 200
+MAX_ROWS = 5
+
+
+def synthetic_engine(n_foods, seed=0):
+    """NutrientMatrix over n_foods random foods with the shipped nutrient columns and DV"""
+    rng = np.random.default_rng(seed)
+    nutrients = list(dict.fromkeys(n for values in reference.USDA_DATA.values() for n in values))
+    # Per-100g values scaled like the real table: sparse, heavy-tailed
+    matrix = np.zeros((n_foods + 1, len(nutrients)))
+    matrix[:n_foods] = np.round(rng.lognormal(1.0, 1.5, (n_foods, len(nutrients))) * (rng.random((n_foods, len(nutrients))) < 0.8), 2)
+    portions = {f"portion_{i:03d}": float(np.round(rng.uniform(5, 400), 1)) for i in range(N_PORTIONS)}
+    foods = [f"food_{i:06d}" for i in range(n_foods)]
+    return NutrientMatrix.from_arrays(foods, nutrients, matrix, portions, reference.DV, reference.MEAL_NAMES)
+
+
+def synthetic_indices(engine, n_days, seed=0):
+    """(food_idx, portion_idx) of shape days x slots x rows; unused rows point at the zero row"""
+    rng = np.random.default_rng(seed)
+    shape = (n_days, len(SLOTS), MAX_ROWS)
+    food_idx = rng.integers(0, len(engine.foods), shape, dtype=np.int32)
+    portion_idx = rng.integers(0, len(engine.portions), shape, dtype=np.int32)
+    rows = rng.integers(1, MAX_ROWS + 1, shape[:2])
+    unused = np.arange(MAX_ROWS) >= rows[..., None]
+    food_idx[unused] = engine.unknown_food
+    portion_idx[unused] = engine.unknown_portion
+    return food_idx, portion_idx
+
+
+def synthetic_days(foods, portions, food_idx, portion_idx):
+    """Decode index arrays into {slot: [(food, portion_key), ...]} days"""
+    foods, portions = list(foods) + [None], list(portions) + [None]
+    days = []
+    for day_f, day_p in zip(food_idx.tolist(), portion_idx.tolist()):
+        days.append({slot: [(foods[f], portions[p]) for f, p in zip(fs, ps) if foods[f] is not None]
+                     for slot, fs, ps in zip(SLOTS, day_f, day_p)})
+    return days
+
+
+def _best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def run_cases(preset, repeat):
+    """Time every path for every (foods, days) case; returns {case: {'days', 'seconds', 'rate'}}"""
+    results = {}
+
+    def record(name, days, seconds):
+        results[name] = {'days': days, 'seconds': round(seconds, 6), 'rate': round(days / seconds, 1)}
+        print(f"  {name:40s} {days:>10,} days {seconds:9.4f}s {days / seconds:14,.0f} days/s")
+
+    # The reference calculator only knows the shipped foods, so its plans are drawn from those
+    shipped = NutrientMatrix(reference.USDA_DATA, reference.PORTIONS, reference.DV, reference.MEAL_NAMES)
+    for sample in sorted({min(n_days, SAMPLE_DAYS['reference']) for n_days in PRESETS[preset]['days']}):
+        days = synthetic_days(shipped.foods, shipped.portions, *synthetic_indices(shipped, sample))
+        seconds = _best_of(repeat, lambda: [reference.calc_day_with_sources(meals, 0) for meals in days])
+        record(f"reference/foods={len(shipped.foods)}/days={sample}", sample, seconds)
+
+    for n_foods in PRESETS[preset]['foods']:
+        engine = synthetic_engine(n_foods)
+        for n_days in PRESETS[preset]['days']:
+            food_idx, portion_idx = synthetic_indices(engine, n_days)
+
+            sample = min(n_days, SAMPLE_DAYS['per_day'])
+            days = synthetic_days(engine.foods, engine.portions, food_idx[:sample], portion_idx[:sample])
+            if f"per_day/foods={n_foods}/days={sample}" not in results:
+                seconds = _best_of(repeat, lambda: [engine.day_with_sources(meals) for meals in days])
+                record(f"per_day/foods={n_foods}/days={sample}", sample, seconds)
+
+            # Batch scoring wants plans x days; one-day plans keep any day count exact
+            day_blocks = np.arange(n_days)[:, None]
+            seconds = _best_of(repeat, lambda: score_encoded(engine, day_blocks, food_idx, portion_idx))
+            record(f"batch/foods={n_foods}/days={n_days}", n_days, seconds)
+
+            sample = min(n_days, SAMPLE_DAYS['export'])
+            if f"export/foods={n_foods}/days={sample}" in results:
+                continue
+            plans = {'synthetic': dict(enumerate(days[:sample], 1))}
+
+            def run_export():
+                with tempfile.TemporaryDirectory() as workdir:
+                    export(plans, workdir, engine)
+            seconds = _best_of(repeat, run_export)
+            record(f"export/foods={n_foods}/days={sample}", sample, seconds)
+    return results
+
+
+def read_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def environment():
+    """Host and library versions recorded with every run"""
+    return {'host': platform.node(), 'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+
+def find_regressions(history, results, threshold=DEFAULT_THRESHOLD, window=HISTORY_WINDOW, preset=None, env=None):
+    """Return [(case, rate, baseline_rate)] for cases slower than (1 - threshold) x their recent median
+
+    Only earlier runs of the same preset on the same host (HOST_FIELDS of env) form the baseline.
+    """
+    env = env or environment()
+    comparable = [run for run in history
+                  if run.get('preset') == preset and all(run.get(k) == env[k] for k in HOST_FIELDS)]
+    regressions = []
+    for case, result in results.items():
+        previous = [run['results'][case]['rate'] for run in comparable if case in run['results']][-window:]
+        if not previous:
+            continue
+        baseline = float(np.median(previous))
+        if result['rate'] < baseline * (1 - threshold):
+            regressions.append((case, result['rate'], baseline))
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the calculation paths and track regressions")
+    parser.add_argument('--preset', choices=PRESETS, default='quick')
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSONL file results are appended to")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown against the recent median that fails the run")
+    parser.add_argument('--repeat', type=int, default=3, help="timings per case; the best is kept")
+    parser.add_argument('--no-record', action='store_true', help="compare against history without appending")
+    args = parser.parse_args()
+
+    print("=" * 80)
+    print(f"Benchmark preset '{args.preset}', best of {args.repeat}")
+    print("=" * 80)
+    results = run_cases(args.preset, args.repeat)
+
+    history = read_history(args.history)
+    env = environment()
+    regressions = find_regressions(history, results, args.threshold, preset=args.preset, env=env)
+    if not args.no_record:
+        run = {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'commit': _git_commit(),
+            'preset': args.preset,
+            **env,
+            'results': results,
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(run, separators=(',', ':')) + '\n')
+
+    print("=" * 80)
+    if regressions:
+        for case, rate, baseline in regressions:
+            print(f"REGRESSION {case}: {rate:,.0f} days/s vs median {baseline:,.0f} ({rate / baseline - 1:+.0%})")
+        sys.exit(1)
+    print(f"No regressions beyond {args.threshold:.0%} against the last {HISTORY_WINDOW} '{args.preset}' runs "
+          f"on {env['host']}")
+
+
+if __name__ == '__main__':
+    main()
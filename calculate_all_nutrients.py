@@ -25,13 +25,13 @@ USDA_DATA = {
     },
     'chickpeas_uncooked': {
         'calories': 364, 'protein': 19.3, 'fat': 6.0, 'carbs': 60.7,
-        'vit_e': 2.9, 'vit_k': 9.0, 'vit_c': 4.0, 'folate': 557.0, 'vit_b12': 0.0,
+        'vit_e': 0.82, 'vit_k': 9.0, 'vit_c': 4.0, 'folate': 557.0, 'vit_b12': 0.0,
         'calcium': 105.0, 'iron': 6.2, 'zinc': 3.4, 'magnesium': 115.0, 'potassium': 875.0
     },
     'black_beans_uncooked': {
         'calories': 341, 'protein': 21.6, 'fat': 1.4, 'carbs': 62.4,
-        'vit_e': 0.9, 'vit_k': 5.0, 'vit_c': 0.0, 'folate': 444.0, 'vit_b12': 0.0,
-        'calcium': 123.0, 'iron': 8.0, 'zinc': 3.6, 'magnesium': 171.0, 'potassium': 1483.0
+        'vit_e': 0.9, 'vit_k': 5.6, 'vit_c': 0.0, 'folate': 444.0, 'vit_b12': 0.0,
+        'calcium': 123.0, 'iron': 5.02, 'zinc': 3.6, 'magnesium': 171.0, 'potassium': 1483.0
     },
     'chickpea_pasta_cooked': {
         'calories': 170, 'protein': 11.0, 'fat': 3.5, 'carbs': 27.0,
@@ -75,8 +75,8 @@ USDA_DATA = {
     },
     'whey_protein': {
         'calories': 400, 'protein': 80.0, 'fat': 5.0, 'carbs': 10.0,
-        'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 0.0, 'vit_b12': 0.5,
-        'calcium': 50.0, 'iron': 0.0, 'zinc': 0.0, 'magnesium': 0.0, 'potassium': 50.0
+        'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 0.0, 'vit_b12': 0.0,
+        'calcium': 453.0, 'iron': 0.54, 'zinc': 0.42, 'magnesium': 45.0, 'potassium': 161.0
     },
     'tofu_firm': {
         'calories': 144, 'protein': 17.3, 'fat': 9.0, 'carbs': 2.8,
@@ -135,7 +135,7 @@ USDA_DATA = {
     },
     'nutritional_yeast': {
         'calories': 325, 'protein': 50.0, 'fat': 5.0, 'carbs': 36.0,
-        'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 3125.0, 'vit_b12': 1500.0,
+        'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 3125.0, 'vit_b12': 150.0,
         'calcium': 20.0, 'iron': 5.0, 'zinc': 12.5, 'magnesium': 40.0, 'potassium': 900.0
     },
     'olive_oil': {
@@ -150,8 +150,8 @@ USDA_DATA = {
     },
     'veg_fried_rice': {
         'calories': 132, 'protein': 2.8, 'fat': 2.0, 'carbs': 25.0,
-        'vit_e': 0.5, 'vit_k': 5.0, 'vit_c': 4.0, 'folate': 10.0, 'vit_b12': 0.0,
-        'calcium': 15.0, 'iron': 0.5, 'zinc': 0.5, 'magnesium': 15.0, 'potassium': 90.0
+        'vit_e': 1.14, 'vit_k': 25.1, 'vit_c': 2.5, 'folate': 22.0, 'vit_b12': 0.0,
+        'calcium': 22.0, 'iron': 0.69, 'zinc': 0.49, 'magnesium': 16.0, 'potassium': 111.0
     },
 }
 
@@ -169,7 +169,7 @@ PORTIONS = {
     '6_eggs': 300, '1c_yogurt': 227, '1c_milk': 244,
     '2c_spinach': 60, '1c_mushrooms': 70, '1c_kale': 67,
     '1.5c_broccoli': 135, '1c_okra': 100, '2_potatoes': 400,
-    '1_banana': 120, '1_apple': 180, '1c_pomegranate': 87,
+    '1_banana': 120, '1_apple': 180, '1c_pomegranate': 174,
     '1tbsp_yeast': 8, '1tbsp_oil': 14, '0.5tbsp_oil': 7,
     '200g_tofu': 200, '1_chapati': 60, '3_chapati': 180, '2_chapati': 120,
     '1c_fried_rice': 200, '2c_fried_rice': 400, '2.5c_fried_rice': 500, '3c_fried_rice': 600,
@@ -195,13 +195,6 @@ DV = {
     'zinc': 11.0, 'magnesium': 420.0, 'potassium': 4700.0
 }
 
-print("=" * 100)
-print("COMPLETE NUTRIENT CALCULATION - ALL DAYS")
-print("=" * 100)
-
-# Store all results for JSON export
-results = {'bulking': {}, 'cutting': {}}
-
 # Define all meals for BULKING PHASE
 bulking_meals = {
     1: {
@@ -262,48 +255,59 @@ bulking_meals = {
     }
 }
 
-# Calculate bulking micronutrients
-for day in range(1, 8):
-    print(f"\nCalculating Bulking Day {day}...")
-    meals = bulking_meals[day]
-    
-    # Calculate totals
-    totals = {}
-    for nutrient in ['vit_e', 'vit_k', 'vit_c', 'folate', 'vit_b12', 'calcium', 'iron', 'zinc', 'magnesium', 'potassium']:
-        total = 0.0
-        for meal_name, ingredients in meals.items():
-            total += calc_meal(ingredients, nutrient)
-        totals[nutrient] = total
-    
-    # Add Vitamin D from supplement
-    totals['vit_d'] = 20.0
-    
-    # Create micronutrient object with sources
-    micro_data = {
-        'vitaminD': {'value': 20.0, 'percentage': 100, 'sources': [{'meal': 'Supplement', 'value': 20.0}]},
-        'vitaminE': {'value': round(totals['vit_e'], 1), 'percentage': round((totals['vit_e'] / DV['vit_e']) * 100), 'sources': []},
-        'vitaminK': {'value': round(totals['vit_k'], 1), 'percentage': round((totals['vit_k'] / DV['vit_k']) * 100), 'sources': []},
-        'vitaminC': {'value': round(totals['vit_c'], 1), 'percentage': round((totals['vit_c'] / DV['vit_c']) * 100), 'sources': []},
-        'folate': {'value': round(totals['folate'], 1), 'percentage': round((totals['folate'] / DV['folate']) * 100), 'sources': []},
-        'vitaminB12': {'value': round(totals['vit_b12'], 1), 'percentage': round((totals['vit_b12'] / DV['vit_b12']) * 100), 'sources': []},
-        'calcium': {'value': round(totals['calcium'], 1), 'percentage': round((totals['calcium'] / DV['calcium']) * 100), 'sources': []},
-        'iron': {'value': round(totals['iron'], 1), 'percentage': round((totals['iron'] / DV['iron']) * 100), 'sources': []},
-        'zinc': {'value': round(totals['zinc'], 1), 'percentage': round((totals['zinc'] / DV['zinc']) * 100), 'sources': []},
-        'magnesium': {'value': round(totals['magnesium'], 1), 'percentage': round((totals['magnesium'] / DV['magnesium']) * 100), 'sources': []},
-        'potassium': {'value': round(totals['potassium'], 1), 'percentage': round((totals['potassium'] / DV['potassium']) * 100), 'sources': []}
-    }
-    
-    results['bulking'][day] = micro_data
-    print(f"  Vitamin E: {micro_data['vitaminE']['value']}mg ({micro_data['vitaminE']['percentage']}%)")
-    print(f"  Vitamin K: {micro_data['vitaminK']['value']}mcg ({micro_data['vitaminK']['percentage']}%)")
-    print(f"  Iron: {micro_data['iron']['value']}mg ({micro_data['iron']['percentage']}%)")
+def main():
+    print("=" * 100)
+    print("COMPLETE NUTRIENT CALCULATION - ALL DAYS")
+    print("=" * 100)
+
+    # Store all results for JSON export
+    results = {'bulking': {}, 'cutting': {}}
+
+    # Calculate bulking micronutrients
+    for day in range(1, 8):
+        print(f"\nCalculating Bulking Day {day}...")
+        meals = bulking_meals[day]
+        
+        # Calculate totals
+        totals = {}
+        for nutrient in ['vit_e', 'vit_k', 'vit_c', 'folate', 'vit_b12', 'calcium', 'iron', 'zinc', 'magnesium', 'potassium']:
+            total = 0.0
+            for meal_name, ingredients in meals.items():
+                total += calc_meal(ingredients, nutrient)
+            totals[nutrient] = total
+        
+        # Add Vitamin D from supplement
+        totals['vit_d'] = 20.0
+        
+        # Create micronutrient object with sources
+        micro_data = {
+            'vitaminD': {'value': 20.0, 'percentage': 100, 'sources': [{'meal': 'Supplement', 'value': 20.0}]},
+            'vitaminE': {'value': round(totals['vit_e'], 1), 'percentage': round((totals['vit_e'] / DV['vit_e']) * 100), 'sources': []},
+            'vitaminK': {'value': round(totals['vit_k'], 1), 'percentage': round((totals['vit_k'] / DV['vit_k']) * 100), 'sources': []},
+            'vitaminC': {'value': round(totals['vit_c'], 1), 'percentage': round((totals['vit_c'] / DV['vit_c']) * 100), 'sources': []},
+            'folate': {'value': round(totals['folate'], 1), 'percentage': round((totals['folate'] / DV['folate']) * 100), 'sources': []},
+            'vitaminB12': {'value': round(totals['vit_b12'], 1), 'percentage': round((totals['vit_b12'] / DV['vit_b12']) * 100), 'sources': []},
+            'calcium': {'value': round(totals['calcium'], 1), 'percentage': round((totals['calcium'] / DV['calcium']) * 100), 'sources': []},
+            'iron': {'value': round(totals['iron'], 1), 'percentage': round((totals['iron'] / DV['iron']) * 100), 'sources': []},
+            'zinc': {'value': round(totals['zinc'], 1), 'percentage': round((totals['zinc'] / DV['zinc']) * 100), 'sources': []},
+            'magnesium': {'value': round(totals['magnesium'], 1), 'percentage': round((totals['magnesium'] / DV['magnesium']) * 100), 'sources': []},
+            'potassium': {'value': round(totals['potassium'], 1), 'percentage': round((totals['potassium'] / DV['potassium']) * 100), 'sources': []}
+        }
+        
+        results['bulking'][day] = micro_data
+        print(f"  Vitamin E: {micro_data['vitaminE']['value']}mg ({micro_data['vitaminE']['percentage']}%)")
+        print(f"  Vitamin K: {micro_data['vitaminK']['value']}mcg ({micro_data['vitaminK']['percentage']}%)")
+        print(f"  Iron: {micro_data['iron']['value']}mg ({micro_data['iron']['percentage']}%)")
+
+    print("\n\n" + "=" * 100)
+    print("Bulking phase calculations complete!")
+    print("=" * 100)
 
-print("\n\n" + "=" * 100)
-print("Bulking phase calculations complete!")
-print("=" * 100)
+    # Output JSON for easy copy-paste to TypeScript
+    print("\n\nJSON OUTPUT (for copying to page.tsx):\n")
+    print(json.dumps(results, indent=2))
 
-# Output JSON for easy copy-paste to TypeScript
-print("\n\nJSON OUTPUT (for copying to page.tsx):\n")
-print(json.dumps(results, indent=2))
+    print("\n\nScript complete!")
 
-print("\n\nScript complete!")
+if __name__ == '__main__':
+    main()
@@ -10,8 +10,8 @@ import json
 USDA_DATA = {
     'rolled_oats': {'vit_e': 0.7, 'vit_k': 2.0, 'vit_c': 0.0, 'folate': 56.0, 'vit_b12': 0.0, 'calcium': 54.0, 'iron': 4.7, 'zinc': 4.0, 'magnesium': 177.0, 'potassium': 429.0},
     'brown_rice_cooked': {'vit_e': 0.05, 'vit_k': 0.6, 'vit_c': 0.0, 'folate': 9.0, 'vit_b12': 0.0, 'calcium': 10.0, 'iron': 0.5, 'zinc': 0.8, 'magnesium': 43.0, 'potassium': 79.0},
-    'lentils_uncooked': {'vit_e': 0.5, 'vit_k': 5.0, 'vit_c': 4.5, 'folate': 479.0, 'vit_b12': 0.0, 'calcium': 56.0, 'iron': 7.54, 'zinc': 4.78, 'magnesium': 122.0, 'potassium': 955.0},
-    'chickpeas_uncooked': {'vit_e': 0.35, 'vit_k': 9.0, 'vit_c': 4.0, 'folate': 557.0, 'vit_b12': 0.0, 'calcium': 105.0, 'iron': 6.24, 'zinc': 3.43, 'magnesium': 115.0, 'potassium': 875.0},
+    'lentils_uncooked': {'vit_e': 0.5, 'vit_k': 5.0, 'vit_c': 4.5, 'folate': 479.0, 'vit_b12': 0.0, 'calcium': 56.0, 'iron': 7.54, 'zinc': 4.78, 'magnesium': 122.0, 'potassium': 677.0},
+    'chickpeas_uncooked': {'vit_e': 0.82, 'vit_k': 9.0, 'vit_c': 4.0, 'folate': 557.0, 'vit_b12': 0.0, 'calcium': 105.0, 'iron': 6.24, 'zinc': 3.43, 'magnesium': 115.0, 'potassium': 875.0},
     'black_beans_uncooked': {'vit_e': 0.87, 'vit_k': 5.6, 'vit_c': 0.0, 'folate': 444.0, 'vit_b12': 0.0, 'calcium': 123.0, 'iron': 5.02, 'zinc': 3.65, 'magnesium': 171.0, 'potassium': 1483.0},
     'chickpea_pasta_cooked': {'vit_e': 1.5, 'vit_k': 5.0, 'vit_c': 0.0, 'folate': 80.0, 'vit_b12': 0.0, 'calcium': 20.0, 'iron': 3.0, 'zinc': 1.5, 'magnesium': 50.0, 'potassium': 200.0},
     'walnuts': {'vit_e': 0.7, 'vit_k': 2.7, 'vit_c': 1.3, 'folate': 98.0, 'vit_b12': 0.0, 'calcium': 98.0, 'iron': 2.91, 'zinc': 3.09, 'magnesium': 158.0, 'potassium': 441.0},
@@ -45,7 +45,7 @@ PORTIONS = {
     '1/4c_walnuts': 30, '1/2c_walnuts': 60,
     '1/8c_almonds': 18, '1/4c_almonds': 36, '1/2c_almonds': 72,
     '1tbsp_pb': 16, '2tbsp_pb': 32,
-    '1tbsp_chia': 10, '1_scoop_whey': 22,
+    '1tbsp_chia': 12, '1_scoop_whey': 22,
     '1c_lentils': 192, '1c_chickpeas': 200, '1c_black_beans': 194,
     '1c_pasta': 140, '1.5c_pasta': 210, '2c_pasta': 280, '2.5c_pasta': 350,
     '6_eggs': 300, '1c_yogurt': 227, '1c_milk': 244,
@@ -231,29 +231,48 @@ cutting_meals = {
     }
 }
 
-# Calculate and generate TypeScript-ready JSON
-print("Calculating all micronutrients with source tracking...")
-print("=" * 80)
+def compute_results(engine=None):
+    """Calculate both phases, using the matrix engine unless told otherwise"""
+    if engine is None:
+        from nutrient_matrix import NutrientMatrix
+        engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    results = {'bulking': {}, 'cutting': {}}
+    for phase, plan in (('bulking', bulking_meals), ('cutting', cutting_meals)):
+        for day in range(1, 8):
+            results[phase][day] = engine.day_with_sources(plan[day])
+    return results
 
-results = {'bulking': {}, 'cutting': {}}
+def main():
+    from instrumentation import count, is_enabled, stage
 
-print("\n=== BULKING PHASE ===")
-for day in range(1, 8):
-    print(f"Day {day}...")
-    results['bulking'][day] = calc_day_with_sources(bulking_meals[day], day)
-print(results['bulking'][1])
-print("\n=== CUTTING PHASE ===")
-for day in range(1, 8):
-    print(f"Day {day}...")
-    results['cutting'][day] = calc_day_with_sources(cutting_meals[day], day)
+    # Calculate and generate TypeScript-ready JSON
+    print("Calculating all micronutrients with source tracking...")
+    print("=" * 80)
 
-print("\n\n" + "=" * 80)
-print("FORMATTED JSON OUTPUT FOR page.tsx:")
-print("=" * 80)
-print("\n// Replace the existing micronutrientData object with this:\n")
-print("const micronutrientData = " + json.dumps(results, indent=2) + ";\n")
+    with stage('compute'):
+        results = compute_results()
 
-print("\n" + "=" * 80)
-print("Complete! Copy the above JSON into your page.tsx file.")
-print("=" * 80)
+    print("\n=== BULKING PHASE ===")
+    for day in range(1, 8):
+        print(f"Day {day}...")
+    print(results['bulking'][1])
+    print("\n=== CUTTING PHASE ===")
+    for day in range(1, 8):
+        print(f"Day {day}...")
 
+    print("\n\n" + "=" * 80)
+    print("FORMATTED JSON OUTPUT FOR page.tsx:")
+    print("=" * 80)
+    print("\n// Replace the existing micronutrientData object with this:\n")
+    with stage('json'):
+        output = "const micronutrientData = " + json.dumps(results, indent=2) + ";\n"
+    if is_enabled():
+        count('bytes_written', len(output.encode('utf-8')))
+    print(output)
+
+    print("\n" + "=" * 80)
+    print("Complete! Copy the above JSON into your page.tsx file.")
+    print("=" * 80)
+
+if __name__ == '__main__':
+    main()
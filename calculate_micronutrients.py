@@ -13,15 +13,15 @@ USDA_DATA = {
                           'calcium': 10.0, 'iron': 0.5, 'zinc': 0.8, 'magnesium': 43.0, 'potassium': 79.0},
     'lentils_uncooked': {'vit_e': 0.5, 'vit_k': 5.0, 'vit_c': 4.5, 'folate': 479.0, 'vit_b12': 0.0,
                          'calcium': 56.0, 'iron': 7.5, 'zinc': 4.8, 'magnesium': 122.0, 'potassium': 677.0},
-    'chickpeas_uncooked': {'vit_e': 2.9, 'vit_k': 9.0, 'vit_c': 4.0, 'folate': 557.0, 'vit_b12': 0.0,
+    'chickpeas_uncooked': {'vit_e': 0.82, 'vit_k': 9.0, 'vit_c': 4.0, 'folate': 557.0, 'vit_b12': 0.0,
                            'calcium': 105.0, 'iron': 6.2, 'zinc': 3.4, 'magnesium': 115.0, 'potassium': 875.0},
-    'black_beans_uncooked': {'vit_e': 0.9, 'vit_k': 5.0, 'vit_c': 0.0, 'folate': 444.0, 'vit_b12': 0.0,
-                             'calcium': 123.0, 'iron': 8.0, 'zinc': 3.6, 'magnesium': 171.0, 'potassium': 1483.0},
+    'black_beans_uncooked': {'vit_e': 0.9, 'vit_k': 5.6, 'vit_c': 0.0, 'folate': 444.0, 'vit_b12': 0.0,
+                             'calcium': 123.0, 'iron': 5.02, 'zinc': 3.6, 'magnesium': 171.0, 'potassium': 1483.0},
     'chickpea_pasta_cooked': {'vit_e': 1.5, 'vit_k': 5.0, 'vit_c': 0.0, 'folate': 80.0, 'vit_b12': 0.0,
                               'calcium': 20.0, 'iron': 3.0, 'zinc': 1.5, 'magnesium': 50.0, 'potassium': 200.0},
     
     # Nuts and Seeds (per 100g)
-    'walnuts': {'vit_e': 15.0, 'vit_k': 2.7, 'vit_c': 1.3, 'folate': 98.0, 'vit_b12': 0.0,
+    'walnuts': {'vit_e': 0.7, 'vit_k': 2.7, 'vit_c': 1.3, 'folate': 98.0, 'vit_b12': 0.0,
                 'calcium': 98.0, 'iron': 2.9, 'zinc': 3.1, 'magnesium': 158.0, 'potassium': 441.0},
     'almonds': {'vit_e': 25.6, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 50.0, 'vit_b12': 0.0,
                 'calcium': 264.0, 'iron': 3.7, 'zinc': 3.1, 'magnesium': 270.0, 'potassium': 705.0},
@@ -37,8 +37,8 @@ USDA_DATA = {
                           'calcium': 100.0, 'iron': 0.05, 'zinc': 0.5, 'magnesium': 10.0, 'potassium': 141.0},
     'milk_2pct': {'vit_e': 0.1, 'vit_k': 0.3, 'vit_c': 0.0, 'folate': 5.0, 'vit_b12': 0.5,
                   'calcium': 124.0, 'iron': 0.0, 'zinc': 0.4, 'magnesium': 11.0, 'potassium': 140.0},
-    'whey_protein': {'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 0.0, 'vit_b12': 0.5,
-                     'calcium': 50.0, 'iron': 0.0, 'zinc': 0.0, 'magnesium': 0.0, 'potassium': 50.0},
+    'whey_protein': {'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 0.0, 'vit_b12': 0.0,
+                     'calcium': 453.0, 'iron': 0.54, 'zinc': 0.42, 'magnesium': 45.0, 'potassium': 161.0},
     'tofu_firm': {'vit_e': 0.0, 'vit_k': 2.4, 'vit_c': 0.0, 'folate': 15.0, 'vit_b12': 0.0,
                   'calcium': 350.0, 'iron': 2.7, 'zinc': 1.0, 'magnesium': 63.0, 'potassium': 121.0},
     
@@ -67,7 +67,7 @@ USDA_DATA = {
                     'calcium': 10.0, 'iron': 0.3, 'zinc': 0.4, 'magnesium': 12.0, 'potassium': 236.0},
     
     # Supplements and Other
-    'nutritional_yeast': {'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 31250.0, 'vit_b12': 150.0,  # per 100g
+    'nutritional_yeast': {'vit_e': 0.0, 'vit_k': 0.0, 'vit_c': 0.0, 'folate': 3125.0, 'vit_b12': 150.0,  # per 100g
                           'calcium': 20.0, 'iron': 5.0, 'zinc': 12.5, 'magnesium': 40.0, 'potassium': 900.0},
     'olive_oil': {'vit_e': 14.4, 'vit_k': 60.2, 'vit_c': 0.0, 'folate': 0.0, 'vit_b12': 0.0,
                   'calcium': 1.0, 'iron': 0.0, 'zinc': 0.0, 'magnesium': 0.0, 'potassium': 1.0},
@@ -112,7 +112,7 @@ PORTIONS = {
     '2_potatoes': 400,
     '1_banana': 120,
     '1_apple': 180,
-    '1c_pomegranate': 87,
+    '1c_pomegranate': 174,
     '1tbsp_nutritional_yeast': 8,
     '1tbsp_olive_oil': 14,
     '1/2tbsp_olive_oil': 7,
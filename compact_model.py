@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Compact Plan Model
+Stores plan days as interned integer ids in flat typed arrays instead of
+dicts of lists of (food, portion_key) string tuples: a day costs 6 bytes per
+ingredient row, 5 per meal and 4 for the day itself, so millions of client
+days stay resident. Food and portion ids are the NutrientMatrix row and
+portion indices, so computing a stored day needs no string lookups at all.
+Portion ids are 16-bit and slot ids 8-bit; a day that would overflow either
+vocabulary raises ValueError and is not stored.
+
+Usage:
+    python3 compact_model.py [days]
+"""
+
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix, segment_sums
+
+# Meals computed per vectorized chunk by DayStore.meal_totals
+CHUNK = 65_536
+
+
+class Vocabulary:
+    """Interned names <-> dense integer ids, at most `limit` of them"""
+
+    __slots__ = ('names', 'ids', 'limit')
+
+    def __init__(self, names=(), limit=None):
+        self.names = []
+        self.ids = {}
+        self.limit = limit
+        for name in names:
+            self.intern(name)
+
+    def intern(self, name):
+        """Id of name, assigning the next one if it is new; ValueError when the vocabulary is full"""
+        i = self.ids.get(name)
+        if i is None:
+            if self.limit is not None and len(self.names) >= self.limit:
+                raise ValueError(f"Vocabulary full: {self.limit} names, cannot add {name!r}")
+            i = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return i
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, i):
+        return self.names[i]
+
+
+class Day:
+    """One stored day: a view into a DayStore, not a copy"""
+
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def meals(self):
+        """The day as {slot: [(food, portion_key), ...]} again"""
+        return self.store.meals(self.index)
+
+    def __len__(self):
+        start, end = self.store.row_range(self.index)
+        return end - start
+
+
+class DayStore:
+    """Append-only columnar store of plan days
+
+    Rows live in `food` / `portion` (one entry per ingredient row), meals in
+    `slot` / `meal_end` (the row index one past each meal's last row) and days
+    in `day_end` (one past each day's last meal). Empty meals are kept, so a
+    day round-trips with its slot order intact; that order decides the order
+    of sources in the report.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        # Seeded with the engine's order so an id is also the engine's index
+        self.food = array('I')
+        self.portion = array('H')
+        self.slot = array('B')
+        self.foods = Vocabulary(engine.foods, limit=1 << 8 * self.food.itemsize)
+        self.portions = Vocabulary(engine.portions, limit=1 << 8 * self.portion.itemsize)
+        self.slots = Vocabulary(engine.meal_names, limit=1 << 8 * self.slot.itemsize)
+        self.meal_end = array('I')
+        self.day_end = array('I')
+
+    def __len__(self):
+        return len(self.day_end)
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError(f"Day {index} out of range for {len(self)} stored days")
+        return Day(self, index % len(self))
+
+    @property
+    def nbytes(self):
+        """Bytes held by the day, meal and row arrays"""
+        return sum(a.itemsize * len(a) for a in (self.food, self.portion, self.slot, self.meal_end, self.day_end))
+
+    def add(self, meals):
+        """Append a {slot: [(food, portion_key), ...]} day and return its index"""
+        intern_food, intern_portion, intern_slot = self.foods.intern, self.portions.intern, self.slots.intern
+        rows, n_meals = len(self.food), len(self.meal_end)
+        try:
+            for slot, ingredients in meals.items():
+                for food, portion in ingredients:
+                    self.food.append(intern_food(food))
+                    self.portion.append(intern_portion(portion))
+                self.slot.append(intern_slot(slot))
+                self.meal_end.append(len(self.food))
+        except ValueError:
+            # A full vocabulary: drop the partly appended day
+            del self.food[rows:], self.portion[rows:], self.slot[n_meals:], self.meal_end[n_meals:]
+            raise
+        self.day_end.append(len(self.meal_end))
+        return len(self.day_end) - 1
+
+    def meal_range(self, index):
+        return (self.day_end[index - 1] if index else 0), self.day_end[index]
+
+    def row_range(self, index):
+        first, last = self.meal_range(index)
+        start = self.meal_end[first - 1] if first else 0
+        return start, (self.meal_end[last - 1] if last > first else start)
+
+    def meals(self, index):
+        """Rebuild one day's {slot: [(food, portion_key), ...]}"""
+        first, last = self.meal_range(index)
+        foods, portions, slots = self.foods.names, self.portions.names, self.slots.names
+        meals = {}
+        start = self.meal_end[first - 1] if first else 0
+        for m in range(first, last):
+            end = self.meal_end[m]
+            meals[slots[self.slot[m]]] = [(foods[self.food[r]], portions[self.portion[r]]) for r in range(start, end)]
+            start = end
+        return meals
+
+    def _index_arrays(self, start, end):
+        """Engine food and portion indices of rows start:end; names the engine lacks map to its zero entries"""
+        engine = self.engine
+        food_idx = np.minimum(np.frombuffer(self.food, dtype=np.uint32)[start:end], engine.unknown_food)
+        portion_idx = np.minimum(np.frombuffer(self.portion, dtype=np.uint16)[start:end], engine.unknown_portion)
+        return food_idx.astype(np.intp), portion_idx.astype(np.intp)
+
+    def meal_values(self, index):
+        """Same (meal_ids, meals x nutrients) as NutrientMatrix.meal_values on the original day"""
+        first, last = self.meal_range(index)
+        if first == last:
+            return [], np.zeros((0, len(self.engine.nutrients)))
+        ends = np.frombuffer(self.meal_end, dtype=np.uint32)[first:last].astype(np.intp)
+        starts = np.concatenate([[self.meal_end[first - 1] if first else 0], ends[:-1]])
+        sizes = ends - starts
+        keep = sizes > 0
+        meal_ids = [self.slots.names[self.slot[m]] for m in range(first, last) if keep[m - first]]
+        if not keep.any():
+            return meal_ids, np.zeros((0, len(self.engine.nutrients)))
+        values = self.engine.row_values(*self._index_arrays(int(starts[0]), int(ends[-1])))
+        return meal_ids, segment_sums(values, sizes[keep])
+
+    def day_with_sources(self, index):
+        """calc_day_with_sources structure for a stored day"""
+        return self.engine.report(*self.meal_values(index))
+
+    def meal_totals(self, chunk=CHUNK):
+        """Nutrient totals of every stored meal (meals x nutrients), summed in row order"""
+        out = np.zeros((len(self.meal_end), len(self.engine.nutrients)))
+        ends = np.frombuffer(self.meal_end, dtype=np.uint32).astype(np.intp)
+        sizes = np.diff(ends, prepend=0)
+        for first in range(0, len(ends), chunk):
+            last = min(first + chunk, len(ends))
+            start = int(ends[first - 1]) if first else 0
+            values = self.engine.row_values(*self._index_arrays(start, int(ends[last - 1])))
+            out[first:last] = segment_sums(values, sizes[first:last])
+        return out
+
+
+def from_plans(plans, engine):
+    """Convert {phase: {day: meals}} literals (e.g. bulking_meals) into a DayStore
+
+    Returns the store and {(phase, day): index}.
+    """
+    store = DayStore(engine)
+    index = {(phase, day): store.add(meals) for phase, plan in plans.items() for day, meals in plan.items()}
+    return store, index
+
+
+def _container_bytes(obj):
+    """Size of a day's dicts, lists and tuples, not counting the strings they share with the literals"""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_container_bytes(v) for v in obj.values())
+    elif isinstance(obj, (list, tuple)):
+        size += sum(_container_bytes(v) for v in obj if not isinstance(v, str))
+    return size
+
+
+def main():
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    plans = {'bulking': bulking_meals, 'cutting': cutting_meals}
+    store, index = from_plans(plans, engine)
+
+    for (phase, day), i in index.items():
+        if store.meals(i) != plans[phase][day]:
+            raise SystemExit(f"{phase} day {day} did not round-trip")
+        if store.day_with_sources(i) != engine.day_with_sources(plans[phase][day]):
+            raise SystemExit(f"{phase} day {day} computes differently from the dict form")
+
+    days = list(index)
+    dict_bytes = sum(_container_bytes(plans[phase][day]) for phase, day in days) / len(days)
+    print("=" * 80)
+    print(f"{len(days)} plan days round-trip and compute identically")
+    print(f"Per plan-day: {dict_bytes:,.0f} bytes as dicts/lists/tuples, "
+          f"{store.nbytes / len(store):,.0f} bytes stored ({dict_bytes * len(store) / store.nbytes:.1f}x smaller)")
+
+    # Millions of client days, resident at once
+    big = DayStore(engine)
+    start = time.perf_counter()
+    for i in range(n_days):
+        phase, day = days[i % len(days)]
+        big.add(plans[phase][day])
+    loaded = time.perf_counter() - start
+    start = time.perf_counter()
+    totals = big.meal_totals()
+    computed = time.perf_counter() - start
+    print(f"{n_days:,} days: stored in {loaded:.2f}s as {big.nbytes / 1e6:,.1f} MB "
+          f"(as separate dicts: {dict_bytes * n_days / 1e6:,.0f} MB before any strings)")
+    print(f"All {len(totals):,} meal totals computed in {computed:.2f}s")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
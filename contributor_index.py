@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Top-k Contributor Index
+Answers "where did my iron come from" over long histories without
+recomputing any day. Each logged day's contribution of every food and every
+meal to every nutrient is stored once, with nothing dropped
+(calc_day_with_sources keeps only meal-level sources above 0.1), and added
+into fixed 32-day blocks. A date range is then a contiguous sum over its whole
+blocks plus the days of at most two partial blocks, so three years cost
+about as much as a month. Each block (and each day of the all-users ledger)
+also keeps a bounded heap per nutrient of its largest single meals, so "the
+10 meals with the most iron" merges a few small heaps instead of scanning
+every meal. An all-users ledger is kept alongside the per-user ones.
+
+Usage:
+    python3 contributor_index.py [users] [years]
+"""
+
+import heapq
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix, segment_sums
+
+# Days summed per block
+BLOCK_DAYS = 32
+# Largest single meals kept per nutrient per block, and per day of the all-users ledger; top_single_meals' limit
+HEAP_SIZE = 20
+
+
+def _push(heap, entry, size):
+    """Add entry to a bounded min-heap; returns the new floor (smallest kept value) once the heap is full"""
+    if len(heap) < size:
+        heapq.heappush(heap, entry)
+    elif entry > heap[0]:
+        heapq.heapreplace(heap, entry)
+    return heap[0][0] if len(heap) == size else -np.inf
+
+
+class Ledger:
+    """Day contributions (sources x nutrients) of one user, or summed over all users
+
+    A user's days are stored sparsely, as (source ids, values) of what was eaten;
+    the all-users ledger stores each day densely and keeps per-day meal heaps,
+    since it cannot list every user's meals of an edge day.
+    """
+
+    def __init__(self, shape, n_foods, block_days, heap_size, user=None, population=False):
+        self.shape = shape
+        # Sources from n_foods on are meal slots; user is the ledger's user id (None for all users)
+        self.n_foods = n_foods
+        self.user = user
+        self.block_days = block_days
+        self.heap_size = heap_size
+        self.population = population
+        self.days = {}
+        self.first_block = None
+        self.blocks = np.zeros((0,) + shape)
+        # Per block: a heap per nutrient of (value, day ordinal, slot, user id), and the floor of each
+        self.heaps = []
+        self.floors = np.zeros((0, shape[1]))
+        self.day_heaps = {}
+        self.day_floors = {}
+
+    def _block(self, ordinal):
+        """Row of ordinal's block in self.blocks, growing the block range as needed"""
+        block = ordinal // self.block_days
+        if self.first_block is None:
+            self.first_block = block
+        if block < self.first_block:
+            grow = self.first_block - block
+            self.blocks = np.concatenate([np.zeros((grow,) + self.shape), self.blocks])
+            self.floors = np.concatenate([np.full((grow, self.shape[1]), -np.inf), self.floors])
+            self.heaps[:0] = [[[] for _ in range(self.shape[1])] for _ in range(grow)]
+            self.first_block = block
+        row = block - self.first_block
+        if row >= len(self.blocks):
+            grow = row + 1 - len(self.blocks)
+            self.blocks = np.concatenate([self.blocks, np.zeros((max(grow, len(self.blocks)),) + self.shape)])
+            self.floors = np.concatenate([self.floors, np.full((len(self.blocks) - len(self.floors), self.shape[1]),
+                                                               -np.inf)])
+            self.heaps.extend([[] for _ in range(self.shape[1])] for _ in range(len(self.blocks) - len(self.heaps)))
+        return row
+
+    def _push_meals(self, heaps, floors, ordinal, slots, values, user):
+        """Offer a day's meals (slots, meals x nutrients) to bounded heaps whose floors they beat"""
+        for m, col in zip(*np.nonzero(values > floors)):
+            floors[col] = _push(heaps[col], (float(values[m, col]), ordinal, int(slots[m]), user), self.heap_size)
+
+    def _meals(self, ids, values):
+        """(slots, meals x nutrients) of a day's (source ids, values)"""
+        meals = ids >= self.n_foods
+        return ids[meals] - self.n_foods, values[meals]
+
+    def add(self, ordinal, ids, values, user):
+        """Add a day's (source ids, values) logged by user id"""
+        row = self._block(ordinal)
+        self.blocks[row, ids] += values
+        slots, meal_values = self._meals(ids, values)
+        self._push_meals(self.heaps[row], self.floors[row], ordinal, slots, meal_values, user)
+        if self.population:
+            if ordinal not in self.days:
+                self.days[ordinal] = np.zeros(self.shape)
+                self.day_heaps[ordinal] = [[] for _ in range(self.shape[1])]
+                self.day_floors[ordinal] = np.full(self.shape[1], -np.inf)
+            self.days[ordinal][ids] += values
+            self._push_meals(self.day_heaps[ordinal], self.day_floors[ordinal], ordinal, slots, meal_values, user)
+        else:
+            self.days[ordinal] = (ids, values)
+
+    def remove(self, ordinal, day_entries=None):
+        """Drop a day and recompute its block from the days still stored
+
+        Re-summing rather than subtracting keeps removed foods at exactly zero. The
+        all-users ledger recomputes the day itself from day_entries(ordinal), every
+        remaining user's [(source ids, values, user id)] for it.
+        """
+        row = self._block(ordinal)
+        if self.population:
+            entries = day_entries(ordinal)
+            if entries:
+                self.days[ordinal] = np.zeros(self.shape)
+                self.day_heaps[ordinal] = [[] for _ in range(self.shape[1])]
+                self.day_floors[ordinal] = np.full(self.shape[1], -np.inf)
+                for ids, values, user in entries:
+                    self.days[ordinal][ids] += values
+                    self._push_meals(self.day_heaps[ordinal], self.day_floors[ordinal], ordinal,
+                                     *self._meals(ids, values), user)
+            else:
+                for store in (self.days, self.day_heaps, self.day_floors):
+                    store.pop(ordinal, None)
+        elif ordinal in self.days:
+            del self.days[ordinal]
+        self.blocks[row] = 0.0
+        self.heaps[row] = [[] for _ in range(self.shape[1])]
+        self.floors[row] = -np.inf
+        start = (self.first_block + row) * self.block_days
+        for day in range(start, start + self.block_days):
+            if self.population and day in self.days:
+                self.blocks[row] += self.days[day]
+                # A day's heaps hold its largest meals, so they are enough to refill the block's
+                for col, heap in enumerate(self.day_heaps[day]):
+                    for entry in heap:
+                        self.floors[row, col] = _push(self.heaps[row][col], entry, self.heap_size)
+            elif not self.population and day in self.days:
+                ids, values = self.days[day]
+                self.blocks[row, ids] += values
+                self._push_meals(self.heaps[row], self.floors[row], day, *self._meals(ids, values), self.user)
+
+    def split(self, start, end):
+        """Rows of the whole blocks in start..end (a slice of self.blocks) and the (first, last) day ranges left over"""
+        if self.first_block is None or end < start:
+            return slice(0, 0), []
+        size = self.block_days
+        b0, b1 = start // size, end // size
+        lo = b0 if start == b0 * size else b0 + 1
+        hi = b1 if end == b1 * size + size - 1 else b1 - 1
+        edges = []
+        if lo > b0:
+            edges.append((start, min(end, b0 * size + size - 1)))
+        if hi < b1 and not (b1 == b0 and edges):
+            edges.append((max(start, b1 * size), end))
+        first, last = self.first_block, self.first_block + len(self.blocks) - 1
+        whole = slice(max(lo, first) - first, max(min(hi, last) - first + 1, 0)) if lo <= hi else slice(0, 0)
+        return whole, edges
+
+    def column(self, col, start, end):
+        """Contribution of every source to nutrient col over ordinals start..end"""
+        whole, edges = self.split(start, end)
+        out = self.blocks[whole, :, col].sum(axis=0) if whole.stop > whole.start else np.zeros(self.shape[0])
+        for first, last in edges:
+            for day in range(first, last + 1):
+                entry = self.days.get(day)
+                if entry is None:
+                    continue
+                if self.population:
+                    out += entry[:, col]
+                else:
+                    ids, values = entry
+                    out[ids] += values[:, col]
+        return out
+
+    def meals(self, col, start, end):
+        """Candidate (value, ordinal, slot, user id) meals for the largest single meals over start..end"""
+        whole, edges = self.split(start, end)
+        for heaps in self.heaps[whole]:
+            yield from heaps[col]
+        for first, last in edges:
+            for day in range(first, last + 1):
+                if self.population:
+                    yield from self.day_heaps.get(day, [[]] * self.shape[1])[col]
+                elif day in self.days:
+                    ids, values = self.days[day]
+                    for i in np.flatnonzero(ids >= self.n_foods):
+                        yield float(values[i, col]), day, int(ids[i]) - self.n_foods, self.user
+
+
+class ContributorIndex:
+    """Food- and meal-level contributions per nutrient for every user and for all users"""
+
+    def __init__(self, engine, block_days=BLOCK_DAYS, heap_size=HEAP_SIZE):
+        self.engine = engine
+        self.foods = list(engine.foods)
+        self.slots = list(engine.meal_names)
+        self.slot_index = {slot: i for i, slot in enumerate(self.slots)}
+        self.heap_size = heap_size
+        self.block_days = block_days
+        self.shape = (len(self.foods) + len(self.slots), len(engine.nutrients))
+        self.users = []
+        self.user_index = {}
+        self.ledgers = []
+        self.everyone = Ledger(self.shape, len(self.foods), block_days, heap_size, population=True)
+
+    def contributions(self, meals):
+        """(source ids, sources x nutrients) of one day: each food eaten (summed over its rows), then each meal
+
+        Meal values are the same sums as NutrientMatrix.meal_values; rows of foods the
+        engine does not know contribute nothing.
+        """
+        engine = self.engine
+        slots = [slot for slot, rows in meals.items() if rows]
+        rows = [row for slot in slots for row in meals[slot]]
+        if not rows:
+            return np.zeros(0, dtype=np.intp), np.zeros((0, self.shape[1]))
+        food_idx, portion_idx = engine.encode_rows(rows)
+        values = engine.row_values(food_idx, portion_idx)
+        foods, inverse = np.unique(food_idx, return_inverse=True)
+        by_food = np.zeros((len(foods), self.shape[1]))
+        np.add.at(by_food, inverse, values)
+        known = foods < len(self.foods)
+        ids = np.concatenate([foods[known], len(self.foods) + np.array([self.slot_index[s] for s in slots])])
+        return ids.astype(np.intp), np.vstack([by_food[known], segment_sums(values, [len(meals[s]) for s in slots])])
+
+    def _user(self, user):
+        i = self.user_index.get(user)
+        if i is None:
+            i = self.user_index[user] = len(self.users)
+            self.users.append(user)
+            self.ledgers.append(Ledger(self.shape, len(self.foods), self.block_days, self.heap_size, user=i))
+        return i
+
+    def _day_entries(self, ordinal):
+        """[(source ids, values, user id)] of every user who logged a day"""
+        return [(*ledger.days[ordinal], u) for u, ledger in enumerate(self.ledgers) if ordinal in ledger.days]
+
+    def add_day(self, user, day, meals):
+        """Log a user's {slot: [(food, portion_key), ...]} for a date, replacing what was logged for it"""
+        u = self._user(user)
+        ordinal = day.toordinal()
+        if ordinal in self.ledgers[u].days:
+            self.remove_day(user, day)
+        ids, values = self.contributions(meals)
+        self.ledgers[u].add(ordinal, ids, values, u)
+        self.everyone.add(ordinal, ids, values, u)
+
+    def remove_day(self, user, day):
+        """Drop a user's logged day; the blocks and heaps it reached are rebuilt from the days still stored"""
+        ledger = self.ledgers[self.user_index[user]]
+        ordinal = day.toordinal()
+        if ordinal not in ledger.days:
+            raise KeyError(f"{user} has no day logged on {day}")
+        ledger.remove(ordinal)
+        self.everyone.remove(ordinal, self._day_entries)
+
+    # Queries: start and end are dates, both included; user None means all users
+
+    def _ledger(self, user):
+        return self.everyone if user is None else self.ledgers[self.user_index[user]]
+
+    def _column(self, nutrient, start, end, user):
+        return self._ledger(user).column(self.engine.nutrient_index[nutrient], start.toordinal(), end.toordinal())
+
+    def food_totals(self, nutrient, start, end, user=None):
+        """{food: amount of nutrient} over the range, for every food that contributed"""
+        totals = self._column(nutrient, start, end, user)[:len(self.foods)]
+        return {self.foods[i]: float(totals[i]) for i in np.flatnonzero(totals)}
+
+    def top_foods(self, nutrient, start, end, k=10, user=None):
+        """[(food, amount)] of the k foods that supplied the most nutrient over the range"""
+        return heapq.nlargest(k, self.food_totals(nutrient, start, end, user).items(), key=lambda item: item[1])
+
+    def top_meals(self, nutrient, start, end, k=10, user=None):
+        """[(meal name, amount)] of the k meal slots that supplied the most nutrient over the range"""
+        totals = self._column(nutrient, start, end, user)[len(self.foods):]
+        return heapq.nlargest(k, ((self.engine.meal_names[self.slots[i]], float(totals[i]))
+                                  for i in np.flatnonzero(totals)), key=lambda item: item[1])
+
+    def top_single_meals(self, nutrient, start, end, k=10, user=None):
+        """[(amount, date, meal name, user)] of the k individual meals with the most nutrient over the range"""
+        if k > self.heap_size:
+            raise ValueError(f"At most {self.heap_size} single meals are kept per block, asked for {k}")
+        meals = self._ledger(user).meals(self.engine.nutrient_index[nutrient], start.toordinal(), end.toordinal())
+        return [(value, date.fromordinal(ordinal), self.engine.meal_names[self.slots[slot]], self.users[owner])
+                for value, ordinal, slot, owner in heapq.nlargest(k, meals)]
+
+    def share(self, nutrient, source, start, end, user=None):
+        """Fraction of the range's nutrient intake supplied by a food, or by a meal slot"""
+        totals = self._column(nutrient, start, end, user)
+        if source in self.slot_index:
+            part, whole = totals[len(self.foods) + self.slot_index[source]], totals[len(self.foods):].sum()
+        else:
+            part, whole = totals[self.foods.index(source)], totals[:len(self.foods)].sum()
+        return float(part / whole) if whole else 0.0
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    years = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    index = ContributorIndex(engine)
+
+    # Each user logs about 9 days in 10, from the bulking or cutting plan, sometimes skipping a meal
+    rng = random.Random(0)
+    plan_days = list(bulking_meals.values()) + list(cutting_meals.values())
+    first = date(2023, 1, 1)
+    n_days = 365 * years
+    logged = 0
+    start = time.perf_counter()
+    for offset in range(n_days):
+        day = first + timedelta(days=offset)
+        for user in range(n_users):
+            if rng.random() < 0.1:
+                continue
+            meals = dict(rng.choice(plan_days))
+            if rng.random() < 0.2:
+                meals.pop(rng.choice(list(meals)))
+            index.add_day(f"user-{user:04d}", day, meals)
+            logged += 1
+    built = time.perf_counter() - start
+
+    print("=" * 80)
+    print(f"{logged:,} user-days ({n_users} users, {years} years) indexed in {built:.2f}s "
+          f"({logged / built:,.0f} days/s)")
+    last = first + timedelta(days=n_days - 1)
+    month = (last - timedelta(days=29), last)
+    print("user-0000, top 10 iron sources in the last 30 days:")
+    for food, amount in index.top_foods('iron', *month, user='user-0000'):
+        print(f"  {food:24s} {amount:8.1f} mg")
+    print("  by meal: " + ", ".join(f"{name} {amount:.1f}" for name, amount in
+                                     index.top_meals('iron', *month, user='user-0000')))
+    value, day, name, _ = index.top_single_meals('iron', *month, k=1, user='user-0000')[0]
+    print(f"  largest single meal: {name} on {day} ({value:.1f} mg)")
+    print(f"All users, {first} to {last}: {index.share('vit_k', 'spinach', first, last):.1%} of vitamin K "
+          f"from spinach, {index.share('vit_k', 'dinner', first, last):.1%} from dinner")
+
+    # Checked against a scan of every stored day
+    ranges = [(first + timedelta(days=a), first + timedelta(days=a + rng.randrange(n_days - a)))
+              for a in (rng.randrange(n_days) for _ in range(20))]
+    col = engine.nutrient_index['iron']
+    for a, b in ranges:
+        for user in (None, 'user-0001'):
+            scan = np.zeros(index.shape[0])
+            meals = []
+            for u, ledger in enumerate(index.ledgers):
+                if user is not None and index.users[u] != user:
+                    continue
+                for ordinal, (ids, values) in ledger.days.items():
+                    if a.toordinal() <= ordinal <= b.toordinal():
+                        scan[ids] += values[:, col]
+                        meals.extend(float(v) for v in values[ids >= len(index.foods), col])
+            if not np.allclose(index._column('iron', a, b, user), scan):
+                raise SystemExit(f"Totals for {a}..{b} ({user or 'all users'}) differ from a full scan")
+            top = [value for value, *_ in index.top_single_meals('iron', a, b, user=user)]
+            if top != sorted(meals, reverse=True)[:10]:
+                raise SystemExit(f"Largest meals for {a}..{b} ({user or 'all users'}) differ from a full scan")
+    print(f"{len(ranges)} random ranges match a full scan for one user and for all users")
+
+    print("-" * 80)
+    for label, days in (('1 month', 30), ('1 year', 365), (f'{years} years', n_days)):
+        a, b = last - timedelta(days=days - 1), last
+        timings = {}
+        for query, call in (('top foods (user)', lambda: index.top_foods('iron', a, b, user='user-0002')),
+                            ('top meals (all users)', lambda: index.top_single_meals('iron', a, b)),
+                            ('share (all users)', lambda: index.share('vit_k', 'spinach', a, b))):
+            began = time.perf_counter()
+            for _ in range(200):
+                call()
+            timings[query] = (time.perf_counter() - began) / 200 * 1000
+        print(f"{label:>8s}: " + ", ".join(f"{query} {ms:.2f} ms" for query, ms in timings.items()))
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Food Data Consistency Auditor
+Loads the USDA_DATA and PORTIONS tables of every calculator script plus
+src/data/foodReferences.json and reports, in one pass, where they disagree:
+per-food per-nutrient values outside tolerance (flagging 10x/100x scale
+slips), portions of the same key with different weights, values more than
+10x their category's median, and reference servings whose macros do not
+match the tables. Exits 1 when a table conflict is found that is not in the
+allowlist of known, reviewed conflicts (data_audit_allowlist.json, which
+records each conflict with its values, so a changed value is new again, and the
+reason it was accepted; scale slips are never accepted), so it can gate an export:
+
+    python3 data_auditor.py && python3 data_exporter.py
+
+The scripts' tables are read as literals with ast rather than imported, as
+calculate_micronutrients.py runs its whole report on import. Every
+comparison is one NumPy pass over a tables x foods x nutrients array.
+
+Usage:
+    python3 data_auditor.py [--table usda.foods] [--strict | --write-allowlist] [--allowlist PATH]
+"""
+
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+from portion_resolver import PortionResolver, UnresolvedPortion
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TABLE_SOURCES = ['calculate_all_nutrients_complete.py', 'calculate_all_nutrients.py', 'calculate_micronutrients.py']
+REFERENCES = os.path.join(ROOT, 'src', 'data', 'foodReferences.json')
+ALLOWLIST = os.path.join(ROOT, 'data_audit_allowlist.json')
+
+# Two tables agree when |a - b| <= ATOL + rtol * max(|a|, |b|)
+DEFAULT_RTOL = 0.02
+RTOL = {'calories': 0.05}
+ATOL = 0.05
+# Ratios within this of a power of ten are reported as a likely unit or decimal slip
+SCALE_SLIP = 0.02
+# A value this many times its category's median is an outlier
+OUTLIER_FACTOR = 10.0
+# foodReferences.json macros per serving against the table values for the serving's grams
+REFERENCE_RTOL = 0.25
+REFERENCE_MACROS = ['calories', 'protein', 'fat', 'carbs']
+
+# Categories for median-based outlier checks, following calculate_micronutrients.py's sections
+FOOD_CATEGORIES = {
+    'rolled_oats': 'grains_legumes', 'brown_rice_cooked': 'grains_legumes', 'lentils_uncooked': 'grains_legumes',
+    'chickpeas_uncooked': 'grains_legumes', 'black_beans_uncooked': 'grains_legumes',
+    'chickpea_pasta_cooked': 'grains_legumes', 'chapati': 'grains_legumes', 'veg_fried_rice': 'grains_legumes',
+    'walnuts': 'nuts_seeds', 'almonds': 'nuts_seeds', 'peanut_butter': 'nuts_seeds', 'chia_seeds': 'nuts_seeds',
+    'egg_large': 'animal_dairy', 'greek_yogurt_2pct': 'animal_dairy', 'milk_2pct': 'animal_dairy',
+    'whey_protein': 'animal_dairy', 'tofu_firm': 'animal_dairy',
+    'spinach': 'vegetables', 'mushrooms': 'vegetables', 'kale': 'vegetables', 'broccoli': 'vegetables',
+    'okra': 'vegetables', 'potato': 'vegetables', 'mixed_veg': 'vegetables',
+    'banana': 'fruits', 'apple': 'fruits', 'pomegranate': 'fruits', 'lemon': 'fruits',
+    'nutritional_yeast': 'other', 'olive_oil': 'other',
+}
+# foodReferences.json ids describing a single table food (the rest are composite dishes)
+REFERENCE_FOODS = {
+    'large-egg': 'egg_large', 'rolled-oats': 'rolled_oats', 'whey-protein': 'whey_protein',
+    'greek-yogurt-2percent': 'greek_yogurt_2pct', 'milk-2percent': 'milk_2pct',
+    'brown-rice-cooked': 'brown_rice_cooked', 'veg-fried-rice': 'veg_fried_rice', 'chia-seeds': 'chia_seeds',
+    'walnuts-quarter-cup': 'walnuts', 'banana-medium': 'banana', 'apple-medium': 'apple',
+    'peanut-butter-tbsp': 'peanut_butter', 'pomegranate-arils': 'pomegranate', 'chapati-medium': 'chapati',
+    'almonds-quarter-cup': 'almonds',
+}
+
+
+def load_literals(path, names=('USDA_DATA', 'PORTIONS')):
+    """Top-level literal assignments of a script, without running it"""
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read(), path)
+    found = {}
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            if node.targets[0].id in names:
+                found[node.targets[0].id] = ast.literal_eval(node.value)
+    return found
+
+
+def align(tables):
+    """Stack {name: {row: {column: value}}} into (rows, columns, tables x rows x columns array, NaN = missing)"""
+    rows = list(dict.fromkeys(row for table in tables.values() for row in table))
+    columns = list(dict.fromkeys(col for table in tables.values() for values in table.values() for col in values))
+    row_index, col_index = {r: i for i, r in enumerate(rows)}, {c: i for i, c in enumerate(columns)}
+    values = np.full((len(tables), len(rows), len(columns)), np.nan)
+    for t, table in enumerate(tables.values()):
+        for row, entries in table.items():
+            r = row_index[row]
+            for col, value in entries.items():
+                values[t, r, col_index[col]] = value
+    return rows, columns, values
+
+
+def conflicts(names, rows, columns, values, rtol=None, atol=ATOL):
+    """Every (row, column) whose values across tables differ beyond tolerance"""
+    rtol = rtol or {}
+    present = ~np.isnan(values)
+    with np.errstate(all='ignore'):
+        lo, hi = np.nanmin(np.where(present, values, np.inf), axis=0), np.nanmax(np.where(present, values, -np.inf), axis=0)
+    tol = atol + np.array([rtol.get(c, DEFAULT_RTOL) for c in columns]) * np.maximum(np.abs(lo), np.abs(hi))
+    flagged = (present.sum(axis=0) >= 2) & (hi - lo > tol)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = hi / lo
+        decades = np.log10(ratio)
+        slip = (lo > 0) & (decades >= 1 - SCALE_SLIP) & (np.abs(decades - np.round(decades)) < SCALE_SLIP)
+
+    found = []
+    for r, c in zip(*np.nonzero(flagged)):
+        found.append({
+            'food': rows[r], 'field': columns[c],
+            'values': {name: float(values[t, r, c]) for t, name in enumerate(names) if present[t, r, c]},
+            'ratio': round(float(ratio[r, c]), 3) if lo[r, c] > 0 else None,
+            'kind': f"scale slip ({round(float(ratio[r, c])):g}x)" if slip[r, c] else 'value',
+        })
+    return found
+
+
+def category_outliers(values, categories, factor=OUTLIER_FACTOR):
+    """(row, column, ratio to category median) arrays for values over factor x their category's median
+
+    values is foods x nutrients; categories holds one label per food. Zero
+    medians are skipped, since any ratio to them is meaningless.
+    """
+    labels, inverse = np.unique(np.asarray(categories), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.searchsorted(inverse[order], np.arange(len(labels) + 1))
+    medians = np.empty((len(labels), values.shape[1]))
+    # np.median partitions instead of sorting around NaNs, so use it when there are none
+    median_of = np.nanmedian if np.isnan(values).any() else np.median
+    with warnings.catch_warnings():
+        # A nutrient no food of a category has gives an all-NaN slice: its median is NaN and never flags
+        warnings.simplefilter('ignore', RuntimeWarning)
+        for i in range(len(labels)):
+            medians[i] = median_of(values[order[bounds[i]:bounds[i + 1]]], axis=0)
+    median = medians[inverse]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values / median
+    rows, cols = np.nonzero((median > 0) & (ratio > factor))
+    return rows, cols, ratio[rows, cols]
+
+
+def reference_conflicts(references, macro_table, resolver, rtol=REFERENCE_RTOL):
+    """Compare foodReferences.json per-serving macros with the table's per-100g values for the serving's grams
+
+    Returns (conflicts, unmatched ids with the reason).
+    """
+    matched, unmatched = [], {}
+    for ref in references:
+        food = REFERENCE_FOODS.get(ref['id'])
+        if food is None:
+            unmatched[ref['id']] = 'composite dish, no single table food'
+            continue
+        try:
+            resolved, grams = resolver.resolve(ref['name'])
+        except UnresolvedPortion as exc:
+            unmatched[ref['id']] = f"serving not resolvable: {exc}"
+            continue
+        if resolved != food:
+            unmatched[ref['id']] = f"serving resolves to {resolved}, not {food}"
+            continue
+        matched.append((ref, food, grams))
+
+    macros = [m for m in REFERENCE_MACROS if all(m in ref for ref, _, _ in matched)]
+    reference = np.array([[ref[m] for m in macros] for ref, _, _ in matched], dtype=float).reshape(len(matched), -1)
+    table = np.array([[macro_table.get(food, {}).get(m, np.nan) * grams / 100.0 for m in macros]
+                      for _, food, grams in matched]).reshape(len(matched), -1)
+    flagged = np.abs(reference - table) > ATOL + rtol * np.maximum(np.abs(reference), np.abs(table))
+    found = [{'reference': matched[r][0]['id'], 'food': matched[r][1], 'grams': matched[r][2], 'field': macros[c],
+              'reference_value': float(reference[r, c]), 'table_value': round(float(table[r, c]), 1)}
+             for r, c in zip(*np.nonzero(flagged))]
+    return found, unmatched
+
+
+def audit(sources=TABLE_SOURCES, references_path=REFERENCES):
+    """Run every check over the scripts' tables and the reference data"""
+    loaded = {os.path.splitext(name)[0]: load_literals(os.path.join(ROOT, name)) for name in sources}
+    names = list(loaded)
+    foods, nutrients, values = align({name: data['USDA_DATA'] for name, data in loaded.items()})
+    keys, _, grams = align({name: {k: {'grams': g} for k, g in data['PORTIONS'].items()} for name, data in loaded.items()})
+
+    # Outliers per table: each table against its own category medians
+    outliers = []
+    categories = [FOOD_CATEGORIES.get(food, 'uncategorized') for food in foods]
+    for t, name in enumerate(names):
+        for r, c, ratio in zip(*category_outliers(values[t], categories)):
+            outliers.append({'table': name, 'food': foods[r], 'nutrient': nutrients[c], 'value': float(values[t, r, c]),
+                             'category': categories[r], 'times_median': round(float(ratio), 1)})
+
+    with open(references_path, encoding='utf-8') as f:
+        references = json.load(f)
+    macro_table = next(data['USDA_DATA'] for data in loaded.values()
+                       if all(m in v for v in data['USDA_DATA'].values() for m in REFERENCE_MACROS))
+    reference_issues, unmatched = reference_conflicts(references, macro_table, PortionResolver())
+
+    return {
+        'tables': names,
+        'nutrient_conflicts': conflicts(names, foods, nutrients, values, RTOL),
+        'portion_conflicts': [{'key': c.pop('food'), **c} for c in conflicts(names, keys, ['grams'], grams)],
+        'missing_foods': {name: [f for i, f in enumerate(foods) if np.isnan(values[t, i]).all()] for t, name in enumerate(names)},
+        'missing_portions': {name: [k for i, k in enumerate(keys) if np.isnan(grams[t, i, 0])] for t, name in enumerate(names)},
+        'outliers': outliers,
+        'reference_conflicts': reference_issues,
+        'unmatched_references': unmatched,
+    }
+
+
+def conflict_id(conflict):
+    """Identity of a nutrient or portion conflict: row, field and every table's value"""
+    values = ', '.join(f"{table}={value:g}" for table, value in sorted(conflict['values'].items()))
+    return f"{conflict.get('food', conflict.get('key'))}/{conflict['field']}: {values}"
+
+
+def is_scale_slip(conflict):
+    return conflict.get('kind', '').startswith('scale slip')
+
+
+def _allowlist_entries(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['known_conflicts']
+
+
+def load_allowlist(path=ALLOWLIST):
+    """Known conflict ids with the reason each was accepted; an absent file allows nothing
+
+    Every entry needs a reason, so a conflict is only known once someone has triaged it.
+    """
+    entries = _allowlist_entries(path)
+    untriaged = [entry['conflict'] for entry in entries if not entry.get('reason', '').strip()]
+    if untriaged:
+        raise ValueError(f"{path}: {len(untriaged)} conflicts have no reason: {', '.join(untriaged)}")
+    return {entry['conflict']: entry['reason'] for entry in entries}
+
+
+def is_known(conflict, known):
+    """Allowlisted and not a scale slip, which is always a defect to fix in the tables"""
+    return conflict_id(conflict) in known and not is_scale_slip(conflict)
+
+
+def write_allowlist(report, path=ALLOWLIST):
+    """Rewrite the allowlist for the current conflicts, keeping reasons already given
+
+    Conflicts that are gone are dropped and scale slips are never added; new
+    conflicts get an empty reason, which load_allowlist refuses until filled in.
+    Returns the number of entries still needing a reason.
+    """
+    reasons = {entry['conflict']: entry.get('reason', '') for entry in _allowlist_entries(path)}
+    current = sorted(conflict_id(c) for kind in ('nutrient_conflicts', 'portion_conflicts') for c in report[kind]
+                     if not is_scale_slip(c))
+    entries = [{'conflict': conflict, 'reason': reasons.get(conflict, '')} for conflict in current]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'known_conflicts': entries}, f, indent=2)
+        f.write('\n')
+    return sum(not entry['reason'] for entry in entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report disagreements between the food tables and reference data")
+    parser.add_argument('--table', help="also scan a FoodTable file (fdc_loader.py output) for category outliers")
+    parser.add_argument('--allowlist', default=ALLOWLIST, help="known conflicts that do not fail the audit")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--strict', action='store_true', help="fail on every conflict, ignoring the allowlist")
+    mode.add_argument('--write-allowlist', action='store_true',
+                      help="add current conflicts (except scale slips) to the allowlist with empty reasons to fill in")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    report = audit()
+    elapsed = time.perf_counter() - start
+    known = {} if args.strict or args.write_allowlist else load_allowlist(args.allowlist)
+
+    print("=" * 80)
+    print(f"Audited {', '.join(report['tables'])} and foodReferences.json in {elapsed * 1000:.0f} ms")
+    print("=" * 80)
+    print(f"Nutrient conflicts ({len(report['nutrient_conflicts'])}):")
+    for c in report['nutrient_conflicts']:
+        values = ', '.join(f"{t}={v:g}" for t, v in c['values'].items())
+        print(f"  {c['food']:22s} {c['field']:10s} {values}  [{c['kind']}{', known' if is_known(c, known) else ''}]")
+    print(f"Portion conflicts ({len(report['portion_conflicts'])}):")
+    for c in report['portion_conflicts']:
+        print(f"  {c['key']:22s} " + ', '.join(f"{t}={v:g} g" for t, v in c['values'].items())
+              + ('  [known]' if is_known(c, known) else ''))
+    for kind in ('missing_foods', 'missing_portions'):
+        for table, missing in report[kind].items():
+            if missing:
+                print(f"{kind.replace('_', ' ').capitalize()} in {table}: {len(missing)} ({', '.join(missing[:6])}"
+                      f"{', ...' if len(missing) > 6 else ''})")
+    print(f"Category outliers (> {OUTLIER_FACTOR:g}x median, {len(report['outliers'])}):")
+    for o in report['outliers']:
+        print(f"  {o['table']:34s} {o['food']:20s} {o['nutrient']:10s} {o['value']:g} ({o['times_median']}x {o['category']})")
+    print(f"Reference conflicts (> {REFERENCE_RTOL:.0%}, {len(report['reference_conflicts'])}):")
+    for c in report['reference_conflicts']:
+        print(f"  {c['reference']:22s} {c['field']:9s} reference {c['reference_value']:g}, "
+              f"table {c['table_value']:g} for {c['grams']:g} g {c['food']}")
+    print(f"References not compared: {len(report['unmatched_references'])}")
+
+    if args.table:
+        from fdc_loader import FoodTable
+        table = FoodTable(args.table)
+        start = time.perf_counter()
+        rows, cols, ratios = category_outliers(table.measured(), np.asarray(table.categories))
+        print(f"{args.table}: {len(rows):,} category outliers among {len(table):,} foods "
+              f"in {(time.perf_counter() - start) * 1000:.0f} ms")
+    else:
+        # Scale: a synthetic table the size of the full USDA dataset
+        rng = np.random.default_rng(0)
+        values = rng.lognormal(1.0, 1.0, (500_000, 15))
+        start = time.perf_counter()
+        rows, _, _ = category_outliers(values, rng.integers(0, 28, len(values)))
+        print(f"Synthetic 500,000 x 15 table: {len(rows):,} category outliers in "
+              f"{(time.perf_counter() - start) * 1000:.0f} ms")
+    print("=" * 80)
+    if args.write_allowlist:
+        print(f"Updated {args.allowlist}: {write_allowlist(report, args.allowlist)} conflicts need a reason before it loads")
+        return
+    new = [c for kind in ('nutrient_conflicts', 'portion_conflicts') for c in report[kind] if not is_known(c, known)]
+    print(f"{len(new)} new table conflicts" + ("" if args.strict else f" ({len(known)} allowlisted in {args.allowlist})"))
+    for c in new:
+        print(f"  {conflict_id(c)}")
+    if new:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
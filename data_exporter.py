@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Incremental Web Data Exporter
+Writes each phase-day's micronutrient results as a compact JSON file under
+src/data/micronutrients/<phase>/<day>.json, one day at a time, instead of
+printing one large document to paste into page.tsx. The manifest records a
+hash of each day's inputs (its rows, the food table and the calculator code)
+and of each file's content: days whose inputs are unchanged are not
+recomputed, and only files whose content changed are rewritten, so unchanged
+days never touch the Next.js build.
+
+Usage:
+    python3 data_exporter.py [output_dir]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from instrumentation import count, stage
+from meal_cache import table_version
+from nutrient_matrix import NutrientMatrix
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_OUTPUT = os.path.join(HERE, 'src', 'data', 'micronutrients')
+MANIFEST = 'manifest.json'
+
+# Code that shapes a day file; editing it invalidates every recorded input hash
+CALCULATOR_SOURCES = ('nutrient_matrix.py',)
+
+
+def calculator_key(engine):
+    """Digest of the engine's table and the calculator code, shared by every day's input hash"""
+    h = hashlib.sha256(table_version(engine))
+    for name in CALCULATOR_SOURCES:
+        with open(os.path.join(HERE, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def day_input(key, meals):
+    """Digest of everything a day file depends on: calculator_key and the day's slots and rows in order"""
+    rows = [[slot, [list(row) for row in ingredients]] for slot, ingredients in meals.items()]
+    return _digest(json.dumps([key, rows], separators=(',', ':')).encode('utf-8'))
+
+
+def render_day(engine, meals):
+    """Encoded JSON of one day's calc_day_with_sources result"""
+    with stage('compute'):
+        result = engine.day_with_sources(meals)
+    with stage('json'):
+        return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def export(plans, output_dir=DEFAULT_OUTPUT, engine=None):
+    """Write changed day files and the manifest
+
+    Returns counts of files skipped (inputs unchanged, not recomputed), unchanged
+    (recomputed to the same content), written and removed.
+    """
+    engine = engine or NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    manifest_path = os.path.join(output_dir, MANIFEST)
+    try:
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        previous, previous_inputs = manifest['files'], manifest.get('inputs', {})
+    except (OSError, ValueError, KeyError, TypeError):
+        previous, previous_inputs = {}, {}
+
+    stats = {'skipped': 0, 'written': 0, 'unchanged': 0, 'removed': 0}
+    files, inputs = {}, {}
+    key = calculator_key(engine)
+    for phase, days in plans.items():
+        for day, meals in days.items():
+            relpath = f"{phase}/{day}.json"
+            path = os.path.join(output_dir, phase, f"{day}.json")
+            inputs[relpath] = day_input(key, meals)
+            if previous_inputs.get(relpath) == inputs[relpath] and relpath in previous and os.path.exists(path):
+                files[relpath] = previous[relpath]
+                stats['skipped'] += 1
+                continue
+            data = render_day(engine, meals)
+            digest = files[relpath] = _digest(data)
+            if previous.get(relpath) == digest and os.path.exists(path):
+                stats['unchanged'] += 1
+                continue
+            with stage('write'):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _write_atomic(path, data)
+            count('bytes_written', len(data))
+            stats['written'] += 1
+
+    # Days that no longer exist in any plan
+    for relpath in previous.keys() - files.keys():
+        path = os.path.join(output_dir, *relpath.split('/'))
+        if os.path.exists(path):
+            os.remove(path)
+            stats['removed'] += 1
+
+    if files != previous or inputs != previous_inputs:
+        phases = {}
+        for relpath in files:
+            phase, name = relpath.split('/')
+            phases.setdefault(phase, []).append(name[:-len('.json')])
+        manifest = json.dumps({'phases': phases, 'files': files, 'inputs': inputs}, indent=2, sort_keys=True)
+        os.makedirs(output_dir, exist_ok=True)
+        _write_atomic(manifest_path, (manifest + '\n').encode('utf-8'))
+    return stats
+
+
+def main():
+    if len(sys.argv) > 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    output_dir = sys.argv[1] if len(sys.argv) == 2 else DEFAULT_OUTPUT
+    start = time.perf_counter()
+    stats = export({'bulking': bulking_meals, 'cutting': cutting_meals}, output_dir)
+    elapsed = time.perf_counter() - start
+    print(f"{output_dir}: {stats['skipped']} skipped, {stats['written']} written, {stats['unchanged']} unchanged, "
+          f"{stats['removed']} removed in {elapsed * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+USDA FoodData Central Loader
+Streams a FoodData Central export (CSV directory or JSON file, optionally
+gzipped) into a single memory-mapped columnar food table keyed by fdc_id.
+
+Usage:
+    python3 fdc_loader.py <fdc_csv_dir | foods.json[.gz]> <output.foods>
+"""
+
+import csv
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+from collections.abc import Mapping
+
+import numpy as np
+
+from nutrient_matrix import NutrientMatrix
+
+# FDC nutrient numbers mapped to the keys used in USDA_DATA (units match: mg / mcg / kcal / g)
+FDC_NUTRIENTS = {
+    '208': 'calories', '203': 'protein', '204': 'fat', '205': 'carbs',
+    '328': 'vit_d', '323': 'vit_e', '430': 'vit_k', '401': 'vit_c', '417': 'folate', '418': 'vit_b12',
+    '301': 'calcium', '303': 'iron', '309': 'zinc', '304': 'magnesium', '306': 'potassium',
+}
+NUTRIENTS = list(dict.fromkeys(FDC_NUTRIENTS.values()))
+
+MAGIC = b'FOODTBL1'
+ALIGN = 64
+
+# food_nutrient rows handled per vectorized batch
+CHUNK_ROWS = 200_000
+# Bytes read per refill when streaming JSON
+READ_SIZE = 1 << 20
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _find(directory, name):
+    for candidate in (name, name + '.gz'):
+        path = os.path.join(directory, candidate)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"{name} not found in {directory}")
+
+
+def write_columns(path, meta, columns):
+    """Write a columnar file: MAGIC, a JSON header, then each column 64-byte aligned
+
+    columns maps name -> ndarray, or -> (dtype, shape) for a zero-filled column
+    the caller fills in afterwards (see open_columns(path, 'r+')).
+    """
+    specs = {name: (col.dtype.str, list(col.shape)) if isinstance(col, np.ndarray) else (np.dtype(col[0]).str, list(col[1]))
+             for name, col in columns.items()}
+    header = dict(meta, columns={})
+    # Offsets depend on the header size, so lay out once with a generous header allowance
+    offset = ALIGN * (1 + (len(json.dumps(header)) + 128 * len(specs) + 16) // ALIGN)
+    first = offset
+    for name, (dtype, shape) in specs.items():
+        header['columns'][name] = {'dtype': dtype, 'shape': shape, 'offset': offset}
+        size = np.dtype(dtype).itemsize * int(np.prod(shape))
+        offset += ALIGN * ((size + ALIGN - 1) // ALIGN)
+    encoded = json.dumps(header).encode('utf-8')
+    if len(MAGIC) + 8 + len(encoded) > first:
+        raise RuntimeError("Columnar file header overflow")
+
+    with open(path, 'wb') as f:
+        f.write(MAGIC + len(encoded).to_bytes(8, 'little') + encoded)
+        f.truncate(offset)
+        for name, col in columns.items():
+            if isinstance(col, np.ndarray):
+                f.seek(header['columns'][name]['offset'])
+                f.write(np.ascontiguousarray(col).tobytes())
+    return header
+
+
+def open_columns(path, mode='r'):
+    """Return (header, {name: memmap}) for a file written by write_columns"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a columnar food data file")
+        header = json.loads(f.read(int.from_bytes(f.read(8), 'little')))
+    columns = {}
+    for name, spec in header['columns'].items():
+        shape = tuple(spec['shape'])
+        if np.prod(shape) == 0:
+            # np.memmap cannot map zero bytes
+            columns[name] = np.zeros(shape, dtype=spec['dtype'])
+        else:
+            column = np.memmap(path, dtype=spec['dtype'], mode=mode, offset=spec['offset'], shape=shape)
+            # Read-only columns become plain ndarray views, which slice much faster than np.memmap
+            # objects; the mapping stays alive via .base. Writable ones keep flush().
+            columns[name] = column.view(np.ndarray) if mode == 'r' else column
+    return header, columns
+
+
+class _FoodWriter:
+    """Collects food ids, categories and names while streaming, then writes the table file"""
+
+    def __init__(self, workdir):
+        self.ids = array('q')
+        self.categories = array('i')
+        self.name_offsets = array('q', [0])
+        self.names = open(os.path.join(workdir, 'names.bin'), 'w+b')
+
+    def add(self, fdc_id, name, category):
+        encoded = name.encode('utf-8')
+        self.names.write(encoded)
+        self.ids.append(fdc_id)
+        self.categories.append(category)
+        self.name_offsets.append(self.name_offsets[-1] + len(encoded))
+
+    def allocate(self, path):
+        """Create the output file and return its writable values and present columns (rows x nutrients)"""
+        n = len(self.ids)
+        ids = np.frombuffer(self.ids, dtype=np.int64) if n else np.zeros(0, dtype=np.int64)
+        self.sorted_rows = np.argsort(ids, kind='stable').astype(np.int64)
+        self.sorted_ids = ids[self.sorted_rows]
+        columns = {
+            'fdc_id': ids,
+            'category': np.frombuffer(self.categories, dtype=np.int32) if n else np.zeros(0, dtype=np.int32),
+            'sorted_ids': self.sorted_ids,
+            'sorted_rows': self.sorted_rows,
+            'name_offsets': np.frombuffer(self.name_offsets, dtype=np.int64),
+        }
+        columns['values'] = ('<f4', (n + 1, len(NUTRIENTS)))
+        # False where the export had no amount; values holds 0.0 there
+        columns['present'] = ('|b1', (n + 1, len(NUTRIENTS)))
+        columns['names'] = ('|u1', (self.name_offsets[-1],))
+        header = write_columns(path, {'kind': 'food_table', 'version': 2, 'rows': n, 'nutrients': NUTRIENTS}, columns)
+
+        with open(path, 'r+b') as f:
+            f.seek(header['columns']['names']['offset'])
+            self.names.seek(0)
+            while True:
+                block = self.names.read(READ_SIZE)
+                if not block:
+                    break
+                f.write(block)
+        self.names.close()
+        columns = open_columns(path, 'r+')[1]
+        return columns['values'], columns['present']
+
+
+def load_csv(directory, path):
+    """Convert a FoodData Central CSV export (food.csv, nutrient.csv, food_nutrient.csv)"""
+    with _open_text(_find(directory, 'nutrient.csv')) as f:
+        columns = {}
+        for row in csv.DictReader(f):
+            key = FDC_NUTRIENTS.get(row['nutrient_nbr'].split('.')[0].strip())
+            if key:
+                columns[int(row['id'])] = NUTRIENTS.index(key)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        writer = _FoodWriter(workdir)
+        with _open_text(_find(directory, 'food.csv')) as f:
+            for row in csv.DictReader(f):
+                category = row.get('food_category_id') or ''
+                writer.add(int(row['fdc_id']), row['description'], int(category) if category.isdigit() else -1)
+        values, present = writer.allocate(path)
+    sorted_ids, sorted_rows = writer.sorted_ids, writer.sorted_rows
+
+    def flush(ids, cols, amounts):
+        ids = np.array(ids, dtype=np.int64)
+        pos = np.searchsorted(sorted_ids, ids).clip(max=max(len(sorted_ids) - 1, 0))
+        known = sorted_ids[pos] == ids
+        rows, cols = sorted_rows[pos[known]], np.array(cols)[known]
+        values[rows, cols] = np.array(amounts, dtype=np.float32)[known]
+        present[rows, cols] = True
+
+    with _open_text(_find(directory, 'food_nutrient.csv')) as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        id_col, nutrient_col, amount_col = (header.index(name) for name in ('fdc_id', 'nutrient_id', 'amount'))
+        ids, cols, amounts = [], [], []
+        for row in reader:
+            col = columns.get(int(row[nutrient_col]))
+            if col is None or not row[amount_col]:
+                continue
+            ids.append(int(row[id_col]))
+            cols.append(col)
+            amounts.append(float(row[amount_col]))
+            if len(ids) >= CHUNK_ROWS:
+                flush(ids, cols, amounts)
+                ids, cols, amounts = [], [], []
+        if ids:
+            flush(ids, cols, amounts)
+    values.flush()
+    present.flush()
+    return len(writer.ids)
+
+
+def iter_json_foods(path):
+    """Yield food objects one at a time from an FDC JSON export without loading the whole file"""
+    decoder = json.JSONDecoder()
+    with _open_text(path) as f:
+        buffer = f.read(READ_SIZE)
+        start = buffer.find('[')
+        while start < 0:
+            more = f.read(READ_SIZE)
+            if not more:
+                return
+            buffer += more
+            start = buffer.find('[')
+        pos = start + 1
+        while True:
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                    pos += 1
+                if pos < len(buffer):
+                    break
+                buffer, pos = f.read(READ_SIZE), 0
+                if not buffer:
+                    return
+            if buffer[pos] == ']':
+                return
+            try:
+                food, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                more = f.read(READ_SIZE)
+                if not more:
+                    raise
+                buffer, pos = buffer[pos:] + more, 0
+                continue
+            yield food
+            pos = end
+
+
+def load_json(source, path):
+    """Convert a FoodData Central JSON export (Foundation, SR Legacy, Survey or Branded)"""
+    with tempfile.TemporaryDirectory() as workdir:
+        writer = _FoodWriter(workdir)
+        rows_path = os.path.join(workdir, 'values.bin')
+        with open(rows_path, 'wb') as rows:
+            for food in iter_json_foods(source):
+                # NaN marks nutrients the food has no amount for until the columns are filled
+                row = np.full(len(NUTRIENTS), np.nan, dtype=np.float32)
+                for entry in food.get('foodNutrients', ()):
+                    key = FDC_NUTRIENTS.get(str(entry.get('nutrient', {}).get('number', '')).split('.')[0])
+                    if key and entry.get('amount') is not None:
+                        row[NUTRIENTS.index(key)] = entry['amount']
+                category = food.get('foodCategory')
+                category = category.get('id', -1) if isinstance(category, dict) else -1
+                writer.add(int(food['fdcId']), food.get('description', ''), category)
+                rows.write(row.tobytes())
+        values, present = writer.allocate(path)
+        row_bytes = len(NUTRIENTS) * 4
+        with open(rows_path, 'rb') as rows:
+            for start in range(0, len(writer.ids), CHUNK_ROWS):
+                block = np.frombuffer(rows.read(CHUNK_ROWS * row_bytes), dtype=np.float32).reshape(-1, len(NUTRIENTS))
+                known = ~np.isnan(block)
+                values[start:start + len(block)] = np.where(known, block, 0.0)
+                present[start:start + len(block)] = known
+        values.flush()
+        present.flush()
+    return len(writer.ids)
+
+
+def load(source, path):
+    """Convert a CSV export directory or a JSON export file into a food table at path"""
+    if os.path.isdir(source):
+        return load_csv(source, path)
+    return load_json(source, path)
+
+
+class IdIndex(Mapping):
+    """fdc_id -> row mapping answered by binary search over the table's sorted_ids column
+
+    Stands in for a NutrientMatrix food_index dict, so opening a table does no
+    per-food work; keys that are not integers are simply absent.
+    """
+
+    def __init__(self, sorted_ids, sorted_rows):
+        self.sorted_ids = sorted_ids
+        self.sorted_rows = sorted_rows
+
+    def get(self, fdc_id, default=None):
+        if isinstance(fdc_id, bool) or not isinstance(fdc_id, (int, np.integer)):
+            return default
+        pos = int(np.searchsorted(self.sorted_ids, fdc_id))
+        if pos < len(self.sorted_ids) and self.sorted_ids[pos] == fdc_id:
+            return int(self.sorted_rows[pos])
+        return default
+
+    def __getitem__(self, fdc_id):
+        row = self.get(fdc_id)
+        if row is None:
+            raise KeyError(fdc_id)
+        return row
+
+    def __contains__(self, fdc_id):
+        return self.get(fdc_id) is not None
+
+    def __iter__(self):
+        return (int(fdc_id) for fdc_id in self.sorted_ids)
+
+    def __len__(self):
+        return len(self.sorted_ids)
+
+
+class FoodTable:
+    """Read-only memory-mapped food table; pages are shared between processes mapping the same file"""
+
+    def __init__(self, path):
+        self.path = path
+        header, self.columns = open_columns(path)
+        if header.get('kind') != 'food_table':
+            raise ValueError(f"{path} is not a food table")
+        self.nutrients = header['nutrients']
+        self.fdc_ids = self.columns['fdc_id']
+        self.categories = self.columns['category']
+        self.index = IdIndex(self.columns['sorted_ids'], self.columns['sorted_rows'])
+        # Last row is all zeros and stands in for unknown foods
+        self.values = self.columns['values']
+        # Version 1 files predate the mask and read as fully measured
+        self.present = self.columns.get('present')
+
+    def __len__(self):
+        return len(self.fdc_ids)
+
+    def row(self, fdc_id):
+        """Row number for fdc_id, or None if the food is not in the table"""
+        return self.index.get(fdc_id)
+
+    def name(self, row):
+        offsets = self.columns['name_offsets']
+        return bytes(self.columns['names'][offsets[row]:offsets[row + 1]]).decode('utf-8')
+
+    def food(self, fdc_id):
+        """Nutrients per 100g for one food, in USDA_DATA form (nutrients without an amount are left out)"""
+        row = self.row(fdc_id)
+        if row is None:
+            raise KeyError(fdc_id)
+        values = self.values[row].tolist()
+        if self.present is None:
+            return dict(zip(self.nutrients, values))
+        return {n: v for n, v, known in zip(self.nutrients, values, self.present[row].tolist()) if known}
+
+    def measured(self):
+        """Values of every food (without the zero row), NaN where the export had no amount"""
+        if self.present is None:
+            return np.asarray(self.values[:-1])
+        return np.where(self.present[:-1], self.values[:-1], np.float32(np.nan))
+
+    def engine(self, portions, dv, meal_names=None):
+        """NutrientMatrix over this table keyed by fdc_id, sharing the mapped values
+
+        Missing amounts count as zero, as in calc(). Foods are looked up through
+        the stored id index, so this does no per-food work.
+        """
+        return NutrientMatrix.from_arrays(self.fdc_ids, self.nutrients, self.values, portions, dv, meal_names,
+                                          food_index=self.index)
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.strip())
+        sys.exit(1)
+    source, path = sys.argv[1], sys.argv[2]
+    start = time.perf_counter()
+    count = load(source, path)
+    print(f"Wrote {count:,} foods to {path} in {time.perf_counter() - start:.1f}s "
+          f"({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Streaming Food Log Pipeline
+Turns a JSONL stream of logged intake events into per-user per-day
+micronutrient totals in the calc_day_with_sources shape, one generator stage
+at a time so memory does not grow with the size of the log.
+
+Input lines (gzip accepted):
+    {"user": "u1", "timestamp": "2024-05-01T08:15:00", "food": "rolled_oats", "portion": "1c_oats", "meal": "breakfast"}
+"meal" is optional and otherwise derived from the time of day. Events must be
+in time order per user (users may be interleaved); a user's day is emitted as
+soon as a later day arrives for that user.
+
+Usage:
+    python3 food_log_pipeline.py <events.jsonl[.gz] | -> <output.jsonl[.gz] | ->
+"""
+
+import gzip
+import json
+import sys
+import time
+from datetime import datetime
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES
+from instrumentation import count, is_enabled, stage
+from nutrient_matrix import NutrientMatrix
+
+# Meal slot for an event without one, by hour of day (first slot whose end hour is later)
+MEAL_BY_HOUR = [(11, 'breakfast'), (15, 'lunch'), (18, 'snack1'), (22, 'dinner'), (24, 'snack2')]
+
+
+def open_stream(path, mode):
+    """Open a path for text I/O; '-' is stdin/stdout and '.gz' paths are gzip streams"""
+    if path == '-':
+        return sys.stdin if 'r' in mode else sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def read_events(lines, stats):
+    """Parse JSONL lines into (user, date, meal, food, portion) tuples, skipping bad lines"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            event = json.loads(line)
+            when = datetime.fromisoformat(event['timestamp'])
+            meal = event.get('meal')
+            if meal not in MEAL_NAMES:
+                meal = next(slot for end, slot in MEAL_BY_HOUR if when.hour < end)
+            yield event['user'], when.date().isoformat(), meal, event['food'], event['portion']
+        except (ValueError, KeyError, TypeError):
+            stats['bad_lines'] += 1
+            continue
+        stats['events'] += 1
+
+
+def group_user_days(events, stats):
+    """Yield (user, date, meals) once each user's day is complete
+
+    Only one open day per user is kept, so memory is bounded by the number of
+    active users rather than the number of events.
+    """
+    open_days = {}
+    for user, date, meal, food, portion in events:
+        current = open_days.get(user)
+        if current is not None and date != current[0]:
+            if date < current[0]:
+                stats['late_events'] += 1
+                continue
+            yield user, current[0], current[1]
+            current = None
+        if current is None:
+            current = open_days[user] = (date, {slot: [] for slot in MEAL_NAMES})
+        current[1][meal].append((food, portion))
+    for user, (date, meals) in open_days.items():
+        yield user, date, meals
+
+
+def compute_days(user_days, engine, stats):
+    """Attach calc_day_with_sources results to each user-day"""
+    for user, date, meals in user_days:
+        for ingredients in meals.values():
+            for food, portion in ingredients:
+                if food not in engine.food_index:
+                    stats['unknown_foods'] += 1
+                if portion not in engine.portion_index:
+                    stats['unknown_portions'] += 1
+        stats['user_days'] += 1
+        with stage('compute'):
+            result = engine.day_with_sources(meals)
+        yield {'user': user, 'date': date, 'micronutrients': result}
+
+
+def write_results(results, out):
+    """Write each result as one JSON line as soon as it is produced"""
+    for result in results:
+        with stage('json'):
+            line = json.dumps(result, separators=(',', ':')) + '\n'
+        with stage('write'):
+            out.write(line)
+        if is_enabled():
+            count('bytes_written', len(line.encode('utf-8')))
+
+
+def run(source, destination, engine=None):
+    """Run the whole pipeline and return its statistics"""
+    engine = engine or NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    stats = dict.fromkeys(['events', 'bad_lines', 'late_events', 'unknown_foods', 'unknown_portions', 'user_days'], 0)
+    src, dst = open_stream(source, 'r'), open_stream(destination, 'w')
+    try:
+        events = read_events(src, stats)
+        write_results(compute_days(group_user_days(events, stats), engine, stats), dst)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    return stats
+
+
+def main():
+    if len(sys.argv) != 3:
+        print(__doc__.strip())
+        sys.exit(1)
+    start = time.perf_counter()
+    stats = run(sys.argv[1], sys.argv[2])
+    elapsed = time.perf_counter() - start
+    print(f"Processed {stats['events']:,} events into {stats['user_days']:,} user-days in {elapsed:.1f}s", file=sys.stderr)
+    for key, value in stats.items():
+        if key not in ('events', 'user_days') and value:
+            print(f"  {key}: {value:,}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
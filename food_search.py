@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Fuzzy Food Name Search
+Trigram inverted index that resolves free-text names and slugs
+('greek_yogurt_2pct', 'greek-yogurt-2percent', '2% greek yogurt') to food ids
+with ranked matches. The index is saved in the same memory-mapped columnar
+format as the food table, so it opens instantly instead of being rebuilt.
+
+Usage:
+    python3 food_search.py                              # match foodReferences.json ids to USDA_DATA
+    python3 food_search.py build <table.foods> <out.idx>
+    python3 food_search.py query <index.idx> <text>
+"""
+
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA
+from fdc_loader import FoodTable, open_columns, write_columns
+
+# Postings scanned per query; the rarest trigrams are scanned first
+MAX_POSTINGS = 20_000
+# Candidates re-scored exactly after the postings scan
+CANDIDATES = 128
+
+_NON_WORD = re.compile(r'[^0-9a-z%]+')
+
+
+def normalize(text):
+    """Lowercase and turn slug separators and punctuation into single spaces"""
+    return _NON_WORD.sub(' ', str(text).lower().replace('_', ' ')).strip()
+
+
+def trigrams(text):
+    """Sorted unique trigram codes for text (three characters packed into one integer)"""
+    padded = f"  {normalize(text)} "
+    codes = {(ord(padded[i]) << 42) | (ord(padded[i + 1]) << 21) | ord(padded[i + 2])
+             for i in range(len(padded) - 2)}
+    return np.array(sorted(codes), dtype=np.uint64)
+
+
+class FoodSearchIndex:
+    """Inverted trigram index over (key, name) pairs"""
+
+    def __init__(self, header, columns):
+        self.int_keys = header['int_keys']
+        self.columns = columns
+        self.grams = columns['grams']
+        self.gram_offsets = columns['gram_offsets']
+        self.postings = columns['postings']
+        self.food_offsets = columns['food_offsets']
+        self.food_grams = columns['food_grams']
+
+    @classmethod
+    def build(cls, entries):
+        """Build an in-memory index from (key, name) pairs; keys are ints or strings"""
+        entries = list(entries)
+        int_keys = all(isinstance(key, (int, np.integer)) for key, _ in entries)
+        per_food = [trigrams(name) for _, name in entries]
+        counts = np.array([len(g) for g in per_food], dtype=np.int64)
+        food_offsets = np.concatenate([[0], np.cumsum(counts)])
+        food_grams = np.concatenate(per_food) if per_food else np.zeros(0, dtype=np.uint64)
+
+        # Invert: sort (gram, food) pairs by gram to get each gram's postings list
+        owners = np.repeat(np.arange(len(entries), dtype=np.int32), counts)
+        order = np.argsort(food_grams, kind='stable')
+        grams, starts = np.unique(food_grams[order], return_index=True)
+        columns = {
+            'grams': grams,
+            'gram_offsets': np.append(starts, len(order)).astype(np.int64),
+            'postings': owners[order],
+            'food_offsets': food_offsets,
+            'food_grams': food_grams,
+        }
+        if int_keys:
+            columns['keys'] = np.array([key for key, _ in entries], dtype=np.int64)
+        else:
+            encoded = [str(key).encode('utf-8') for key, _ in entries]
+            columns['key_offsets'] = np.concatenate([[0], np.cumsum([len(k) for k in encoded])]).astype(np.int64)
+            columns['key_blob'] = np.frombuffer(b''.join(encoded), dtype=np.uint8).copy()
+        names = [name.encode('utf-8') for _, name in entries]
+        columns['name_offsets'] = np.concatenate([[0], np.cumsum([len(n) for n in names])]).astype(np.int64)
+        columns['name_blob'] = np.frombuffer(b''.join(names), dtype=np.uint8).copy()
+        return cls({'int_keys': int_keys}, columns)
+
+    @classmethod
+    def from_food_table(cls, table):
+        """Index every food in a FoodTable, keyed by fdc_id"""
+        return cls.build((int(fdc_id), table.name(row)) for row, fdc_id in enumerate(table.fdc_ids))
+
+    def save(self, path):
+        arrays = {name: np.asarray(col) for name, col in self.columns.items()}
+        write_columns(path, {'kind': 'food_search', 'version': 1, 'int_keys': self.int_keys}, arrays)
+
+    @classmethod
+    def open(cls, path):
+        header, columns = open_columns(path)
+        if header.get('kind') != 'food_search':
+            raise ValueError(f"{path} is not a food search index")
+        return cls(header, columns)
+
+    def __len__(self):
+        return len(self.food_offsets) - 1
+
+    def key(self, row):
+        if self.int_keys:
+            return int(self.columns['keys'][row])
+        offsets = self.columns['key_offsets']
+        return bytes(self.columns['key_blob'][offsets[row]:offsets[row + 1]]).decode('utf-8')
+
+    def name(self, row):
+        offsets = self.columns['name_offsets']
+        return bytes(self.columns['name_blob'][offsets[row]:offsets[row + 1]]).decode('utf-8')
+
+    def search(self, text, k=5):
+        """Return up to k (key, name, score) matches, best first; score is the trigram Dice coefficient"""
+        query = trigrams(text)
+        pos = np.searchsorted(self.grams, query).clip(max=max(len(self.grams) - 1, 0))
+        found = pos[self.grams[pos] == query] if len(self.grams) else pos[:0]
+        if not len(found):
+            return []
+
+        # Scan the rarest trigrams first so very common ones cannot blow up the postings scan
+        starts, ends = self.gram_offsets[found], self.gram_offsets[found + 1]
+        order = np.argsort(ends - starts, kind='stable')
+        hits, scanned = [], 0
+        for i in order:
+            take = min(int(ends[i] - starts[i]), MAX_POSTINGS - scanned)
+            if take <= 0:
+                break
+            hits.append(self.postings[starts[i]:starts[i] + take])
+            scanned += take
+        rows, shared = np.unique(np.concatenate(hits), return_counts=True)
+        if len(rows) > CANDIDATES:
+            rows = rows[np.argpartition(-shared, CANDIDATES)[:CANDIDATES]]
+
+        # Exact Dice score for each candidate against all of the query's trigrams
+        lo, sizes = self.food_offsets[rows], self.food_offsets[rows + 1] - self.food_offsets[rows]
+        firsts = np.cumsum(sizes) - sizes
+        gathered = self.food_grams[np.repeat(lo - firsts, sizes) + np.arange(int(sizes.sum()))]
+        common = np.add.reduceat(np.isin(gathered, query).astype(np.int64), firsts)
+        scores = 2.0 * common / (sizes + len(query))
+        best = np.argsort(-scores, kind='stable')[:k]
+        return [(self.key(int(rows[i])), self.name(int(rows[i])), round(float(scores[i]), 3)) for i in best]
+
+    def resolve(self, text, min_score=0.5):
+        """Best matching key for text, or None if nothing scores at least min_score"""
+        matches = self.search(text, k=1)
+        if matches and matches[0][2] >= min_score:
+            return matches[0][0]
+        return None
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == 'build':
+        start = time.perf_counter()
+        index = FoodSearchIndex.from_food_table(FoodTable(sys.argv[2]))
+        index.save(sys.argv[3])
+        print(f"Indexed {len(index):,} foods in {time.perf_counter() - start:.1f}s -> {sys.argv[3]}")
+        return
+    if len(sys.argv) == 4 and sys.argv[1] == 'query':
+        index = FoodSearchIndex.open(sys.argv[2])
+        start = time.perf_counter()
+        matches = index.search(sys.argv[3], k=10)
+        elapsed = time.perf_counter() - start
+        for key, name, score in matches:
+            print(f"{score:5.3f}  {key}  {name}")
+        print(f"({elapsed * 1000:.2f} ms)")
+        return
+    if len(sys.argv) != 1:
+        print(__doc__.strip())
+        sys.exit(1)
+
+    index = FoodSearchIndex.build((food, food) for food in USDA_DATA)
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'data', 'foodReferences.json')
+    with open(path) as f:
+        references = json.load(f)
+
+    print("=" * 80)
+    print("foodReferences.json id -> USDA_DATA food")
+    print("=" * 80)
+    for ref in references:
+        matches = index.search(ref['id'], k=1)
+        match = f"{matches[0][0]} ({matches[0][2]:.2f})" if matches else '-'
+        print(f"{ref['id']:32s} {match}")
+
+
+if __name__ == '__main__':
+    main()
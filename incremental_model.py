@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Incremental Plan Model
+Keeps food -> meal -> day -> phase -> week aggregates for whole plans and,
+when a food value, a PORTIONS weight or a single meal row changes, recomputes
+only the meals, days and phases that depend on it. Day results (the
+calc_day_with_sources structure) are re-rendered lazily for changed days.
+"""
+
+import time
+from itertools import chain
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix, SOURCE_THRESHOLD, ordered_sum, segment_sums
+
+
+class IncrementalPlan:
+    """Dependency-tracked aggregates over {phase: {day: {slot: [(food, portion_key), ...]}}}"""
+
+    def __init__(self, engine, phases):
+        self.engine = engine
+        # Slots always follow MEAL_NAMES order so source lists match calc_day_with_sources
+        self.slots = list(engine.meal_names)
+        self.slot_index = {slot: i for i, slot in enumerate(self.slots)}
+        self.phases = list(phases)
+        self.day_keys = [(phase, day) for phase in self.phases for day in phases[phase]]
+        self.day_index = {key: i for i, key in enumerate(self.day_keys)}
+        self.day_phase = np.array([self.phases.index(phase) for phase, _ in self.day_keys], dtype=np.intp)
+        self.days_per_phase = np.bincount(self.day_phase, minlength=len(self.phases))
+        self.phase_days = [np.flatnonzero(self.day_phase == p) for p in range(len(self.phases))]
+
+        n_meals, n_nutrients = len(self.day_keys) * len(self.slots), len(engine.nutrients)
+        self.meal_rows = [[] for _ in range(n_meals)]
+        self.row_food = np.zeros(0, dtype=np.intp)
+        self.row_portion = np.zeros(0, dtype=np.intp)
+        self.row_meal = []
+        # Reverse dependencies: food / portion index -> rows using it
+        self.rows_by_food = {}
+        self.rows_by_portion = {}
+
+        self.meal_values = np.zeros((n_meals, n_nutrients))
+        self.day_values = np.zeros((len(self.day_keys), n_nutrients))
+        self.phase_values = np.zeros((len(self.phases), n_nutrients))
+        self._results = {}
+
+        for (phase, day) in self.day_keys:
+            for slot, ingredients in phases[phase][day].items():
+                meal = self._meal_id(phase, day, slot)
+                for row in ingredients:
+                    self._insert_row(meal, len(self.meal_rows[meal]), row)
+        self._recompute(range(n_meals))
+
+    def _meal_id(self, phase, day, slot):
+        return self.day_index[(phase, day)] * len(self.slots) + self.slot_index[slot]
+
+    def _insert_row(self, meal, position, row):
+        food, portion_key = row
+        food_idx = self.engine.food_index.get(food, self.engine.unknown_food)
+        portion_idx = self.engine.portion_index.get(portion_key, self.engine.unknown_portion)
+        row_id = len(self.row_meal)
+        if row_id == len(self.row_food):
+            self.row_food = np.resize(self.row_food, max(16, 2 * row_id))
+            self.row_portion = np.resize(self.row_portion, max(16, 2 * row_id))
+        self.row_food[row_id], self.row_portion[row_id] = food_idx, portion_idx
+        self.row_meal.append(meal)
+        self.meal_rows[meal].insert(position, row_id)
+        self.rows_by_food.setdefault(food_idx, set()).add(row_id)
+        self.rows_by_portion.setdefault(portion_idx, set()).add(row_id)
+
+    def _drop_row(self, meal, position):
+        row_id = self.meal_rows[meal].pop(position)
+        self.rows_by_food[self.row_food[row_id]].discard(row_id)
+        self.rows_by_portion[self.row_portion[row_id]].discard(row_id)
+
+    def _recompute(self, meals):
+        """Recompute the given meals, then their days and phases; returns the change set"""
+        meals = np.unique(np.fromiter(meals, dtype=np.intp))
+        if not len(meals):
+            return {'meals': [], 'days': [], 'phases': []}
+        lists = [self.meal_rows[m] for m in meals]
+        sizes = np.array([len(rows) for rows in lists])
+        rows = np.fromiter(chain.from_iterable(lists), dtype=np.intp, count=int(sizes.sum()))
+        values = self.engine.row_values(self.row_food[rows], self.row_portion[rows])
+        self.meal_values[meals] = segment_sums(values, sizes)
+
+        # Day totals only count significant meals, summed in slot order like calc_day_with_sources
+        days = np.unique(meals // len(self.slots))
+        per_slot = self.meal_values.reshape(len(self.day_keys), len(self.slots), -1)[days]
+        self.day_values[days] = ordered_sum(np.where(per_slot > SOURCE_THRESHOLD, per_slot, 0.0).transpose(1, 0, 2))
+        # Phases are re-summed from their days rather than adjusted by deltas, which would drift
+        phases = np.unique(self.day_phase[days])
+        for p in phases.tolist():
+            self.phase_values[p] = ordered_sum(self.day_values[self.phase_days[p]])
+
+        for d in days.tolist():
+            self._results.pop(d, None)
+        n_slots = len(self.slots)
+        return {
+            'meals': [self.day_keys[m // n_slots] + (self.slots[m % n_slots],) for m in meals.tolist()],
+            'days': [self.day_keys[d] for d in days.tolist()],
+            'phases': sorted(self.phases[p] for p in phases.tolist()),
+        }
+
+    # Edits
+
+    def set_food_value(self, food, nutrient, value):
+        """Change one per-100g value; only meals containing the food are recomputed"""
+        row, col = self.engine.food_index[food], self.engine.nutrient_index[nutrient]
+        self.engine.matrix[row, col] = value
+        self.engine.data_version += 1
+        return self._recompute(self.row_meal[r] for r in self.rows_by_food.get(row, ()))
+
+    def set_portion(self, portion_key, grams):
+        """Change one PORTIONS weight; only meals using that portion key are recomputed"""
+        idx = self.engine.portion_index[portion_key]
+        self.engine.portion_grams[idx] = grams
+        self.engine.data_version += 1
+        return self._recompute(self.row_meal[r] for r in self.rows_by_portion.get(idx, ()))
+
+    def set_row(self, phase, day, slot, position, row):
+        """Replace one (food, portion_key) row of a meal"""
+        meal = self._meal_id(phase, day, slot)
+        self._drop_row(meal, position)
+        self._insert_row(meal, position, row)
+        return self._recompute([meal])
+
+    def add_row(self, phase, day, slot, row):
+        meal = self._meal_id(phase, day, slot)
+        self._insert_row(meal, len(self.meal_rows[meal]), row)
+        return self._recompute([meal])
+
+    def remove_row(self, phase, day, slot, position):
+        meal = self._meal_id(phase, day, slot)
+        self._drop_row(meal, position)
+        return self._recompute([meal])
+
+    # Views
+
+    def day_result(self, phase, day):
+        """calc_day_with_sources structure for one day, rendered only if it changed"""
+        d = self.day_index[(phase, day)]
+        if d not in self._results:
+            start = d * len(self.slots)
+            self._results[d] = self.engine.report(self.slots, self.meal_values[start:start + len(self.slots)])
+        return self._results[d]
+
+    def phase_totals(self, phase):
+        return dict(zip(self.engine.nutrients, self.phase_values[self.phases.index(phase)].tolist()))
+
+    def week_summary(self):
+        """Average daily amount and %DV of every nutrient per phase"""
+        averages = self.phase_values / self.days_per_phase.clip(min=1)[:, None]
+        summary = {}
+        for p, phase in enumerate(self.phases):
+            summary[phase] = {n: {'value': round(v, 1), 'percentage': round(v / self.engine.daily_values[n] * 100)
+                                  if n in self.engine.daily_values else None}
+                              for n, v in zip(self.engine.nutrients, averages[p].tolist())}
+        return summary
+
+
+def main():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+    # A long plan: the 7-day phases repeated for 1,000 weeks each
+    weeks = 1000
+    phases = {phase: {week * 7 + day: meals[day] for week in range(weeks) for day in range(1, 8)}
+              for phase, meals in (('bulking', bulking_meals), ('cutting', cutting_meals))}
+    start = time.perf_counter()
+    plan = IncrementalPlan(engine, phases)
+    print(f"Built {len(plan.day_keys):,} days in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    changes = plan.set_row('bulking', 1, 'breakfast', 3, ('walnuts', '1/2c_walnuts'))
+    print(f"Edited one row: {len(changes['days'])} day recomputed in {(time.perf_counter() - start) * 1e6:.0f} us")
+    print(f"  Bulking day 1 vitamin E: {plan.day_result('bulking', 1)['vitaminE']}")
+
+    start = time.perf_counter()
+    changes = plan.set_portion('1tbsp_chia', 12)
+    print(f"Changed '1tbsp_chia' to 12g: {len(changes['meals']):,} meals recomputed in "
+          f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    print(f"  Week summary calcium: { {p: s['calcium'] for p, s in plan.week_summary().items()} }")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Opt-in Pipeline Instrumentation
+Nested per-stage timers and named counters for the calculation pipeline.
+Off by default: stage() then hands back one shared no-op context manager and
+count() returns immediately. Set NUTRITION_PROFILE=<report.json> to turn it on
+for any script; the report is written when the process exits.
+
+The report holds calls, total and self time per stage path plus every
+counter, and the same stages in folded-stack form ("a;b;c <microseconds>")
+for flamegraph.pl or speedscope.
+
+Usage:
+    NUTRITION_PROFILE=profile.json python3 calculate_all_nutrients_complete.py
+    python3 instrumentation.py profile.json [--folded]
+"""
+
+import atexit
+import json
+import os
+import sys
+from contextlib import nullcontext
+from time import perf_counter
+
+_enabled = False
+_stack = []
+# Stage path tuple -> [calls, total seconds, seconds spent in child stages]
+_stages = {}
+_counters = {}
+_NULL = nullcontext()
+
+
+class _Stage:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        _stack.append(self.name)
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.start
+        entry = _stages.get(tuple(_stack))
+        if entry is None:
+            entry = _stages[tuple(_stack)] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+        _stack.pop()
+        if _stack:
+            _stages.setdefault(tuple(_stack), [0, 0.0, 0.0])[2] += elapsed
+        return False
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    """For callers that need extra work (e.g. counting unknown foods) only worth doing when profiling"""
+    return _enabled
+
+
+def reset():
+    _stack.clear()
+    _stages.clear()
+    _counters.clear()
+
+
+def stage(name):
+    """Context manager timing a named stage, nested under whichever stage is open"""
+    return _Stage(name) if _enabled else _NULL
+
+
+def count(name, n=1):
+    if _enabled:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def folded():
+    """Stage self times as folded stacks, one 'a;b;c <microseconds>' line per path"""
+    return [f"{';'.join(path)} {round((total - children) * 1e6)}"
+            for path, (_, total, children) in sorted(_stages.items())]
+
+
+def report():
+    return {
+        'stages': {';'.join(path): {'calls': calls, 'seconds': round(total, 6), 'self_seconds': round(total - children, 6)}
+                   for path, (calls, total, children) in sorted(_stages.items())},
+        'counters': dict(sorted(_counters.items())),
+        'folded': folded(),
+    }
+
+
+def write_report(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report(), f, indent=2)
+        f.write('\n')
+
+
+if os.environ.get('NUTRITION_PROFILE'):
+    enable()
+    atexit.register(write_report, os.environ['NUTRITION_PROFILE'])
+
+
+def main():
+    if len(sys.argv) not in (2, 3) or (len(sys.argv) == 3 and sys.argv[2] != '--folded'):
+        print(__doc__.strip())
+        sys.exit(1)
+    with open(sys.argv[1], encoding='utf-8') as f:
+        data = json.load(f)
+    if len(sys.argv) == 3:
+        print('\n'.join(data['folded']))
+        return
+
+    print("=" * 80)
+    print(f"{'Stage':44s} {'calls':>10s} {'total ms':>11s} {'self ms':>11s}")
+    print("=" * 80)
+    for path, stats in data['stages'].items():
+        depth = path.count(';')
+        name = '  ' * depth + path.rsplit(';', 1)[-1]
+        print(f"{name:44s} {stats['calls']:10,} {stats['seconds'] * 1000:11.2f} {stats['self_seconds'] * 1000:11.2f}")
+    if data['counters']:
+        print("-" * 80)
+        for name, value in data['counters'].items():
+            print(f"{name:44s} {value:>12,}")
+
+
+if __name__ == '__main__':
+    main()
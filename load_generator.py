@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Service Load Generator
+Drives nutrition_service.py with keep-alive connections posting /day
+requests and reports throughput and p50/p90/p99 latency. Payloads are
+shuffled bulking/cutting days, a share of them with one row's portion
+changed so they miss the response cache.
+
+Usage:
+    python3 load_generator.py [--url http://127.0.0.1:8080] [--requests 20000] [--concurrency 64] [--unique 0.1]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from urllib.parse import urlsplit
+
+from calculate_all_nutrients_complete import PORTIONS, bulking_meals, cutting_meals
+
+
+def payloads(count, unique, seed=0):
+    """Request bodies: plan days, with a fraction `unique` made distinct by a changed portion"""
+    rng = random.Random(seed)
+    days = [meals for plan in (bulking_meals, cutting_meals) for meals in plan.values()]
+    portions = list(PORTIONS)
+    bodies = []
+    for _ in range(count):
+        meals = {slot: [list(row) for row in rows] for slot, rows in rng.choice(days).items()}
+        if rng.random() < unique:
+            slot = rng.choice([slot for slot, rows in meals.items() if rows])
+            row = rng.randrange(len(meals[slot]))
+            meals[slot][row][1] = rng.choice(portions)
+            meals[slot].append([meals[slot][row][0], rng.choice(portions)])
+        bodies.append(json.dumps({'meals': meals}, separators=(',', ':')).encode('utf-8'))
+    return bodies
+
+
+async def _connection(host, port, queue, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            request = (f"POST /day HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode('latin-1') + body
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.decode('latin-1').split('\r\n')[1:]:
+                name, _, value = line.partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if not head.startswith(b'HTTP/1.1 200'):
+                errors.append(head.split(b'\r\n', 1)[0].decode('latin-1'))
+    finally:
+        writer.close()
+
+
+async def run(url, bodies, concurrency):
+    """Send every body; return (elapsed seconds, latencies, errors)"""
+    parts = urlsplit(url)
+    queue = asyncio.Queue()
+    for body in bodies:
+        queue.put_nowait(body)
+    latencies, errors = [], []
+    start = time.perf_counter()
+    await asyncio.gather(*(_connection(parts.hostname, parts.port or 80, queue, latencies, errors)
+                           for _ in range(concurrency)))
+    return time.perf_counter() - start, latencies, errors
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure nutrition_service.py throughput and latency")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--requests', type=int, default=20_000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--unique', type=float, default=0.1, help="share of requests that are not exact repeats")
+    args = parser.parse_args()
+
+    bodies = payloads(args.requests, args.unique)
+    elapsed, latencies, errors = asyncio.run(run(args.url, bodies, args.concurrency))
+    latencies.sort()
+    print("=" * 80)
+    print(f"{len(latencies):,} requests over {args.concurrency} connections in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:,.0f} req/s), {len(errors)} errors")
+    print(f"Latency p50 {percentile(latencies, 50) * 1000:.2f} ms, p90 {percentile(latencies, 90) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
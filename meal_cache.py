@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Meal Cache
+Most logged meals are repeats (the oats/whey/chia/walnuts breakfast is days
+1, 3, 5 and 7 of bulking_meals), so each meal's full nutrient vector is cached
+under its ingredient rows, for one version of the engine (its identity and
+data_version). Finished day results are cached too, keyed by that version and
+the day's ordered rows, so both caches follow in-place edits of the engine.
+Entries are evicted least recently used first; meal vectors can be saved to
+disk between runs, tagged with a digest of the foods, portions and values.
+
+Usage:
+    python3 meal_cache.py [cache_file]
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from fdc_loader import open_columns, write_columns
+from instrumentation import count
+from nutrient_matrix import NutrientMatrix, segment_sums
+
+DEFAULT_CAPACITY = 65_536
+
+
+def table_version(engine):
+    """Digest of everything a meal vector depends on: foods, nutrients, portions and their values"""
+    h = hashlib.blake2b(digest_size=32)
+    h.update(json.dumps([engine.foods, engine.nutrients, engine.portions], default=np.ndarray.tolist).encode('utf-8'))
+    h.update(np.ascontiguousarray(engine.matrix, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(engine.portion_grams, dtype=np.float64).tobytes())
+    return h.digest()
+
+
+class MealCache:
+    """Bounded LRU cache of meal nutrient vectors in front of a NutrientMatrix"""
+
+    def __init__(self, engine, capacity=DEFAULT_CAPACITY, path=None):
+        self.engine = engine
+        self.capacity = capacity
+        self.path = path
+        self.entries = OrderedDict()
+        self.days = OrderedDict()
+        self.hits = self.misses = self.evictions = self.day_hits = self.day_evictions = 0
+        self.refresh()
+        if path and os.path.exists(path):
+            self.load(path)
+
+    def refresh(self):
+        """Re-read the engine's version after its matrix or portions were edited in place
+
+        Every entry belongs to the old version then, so the cache is emptied. Called
+        automatically whenever the engine's data_version changes; nothing is hashed,
+        since code that edits the engine bumps data_version.
+        """
+        version = (id(self.engine), self.engine.data_version)
+        if version != getattr(self, 'version', version):
+            self.entries.clear()
+            self.days.clear()
+        self.version = version
+        self.data_version = self.engine.data_version
+
+    @staticmethod
+    def key(ingredients):
+        """Content key of a meal: its rows in order (summation order is part of the result)"""
+        return tuple(map(tuple, ingredients))
+
+    def _store(self, key, vector):
+        self.entries[key] = vector
+        if len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def _store_day(self, key, result):
+        self.days[key] = result
+        if len(self.days) > self.capacity:
+            self.days.popitem(last=False)
+            self.day_evictions += 1
+
+    def meal_values(self, meals):
+        """Drop-in for NutrientMatrix.meal_values; only meals not already cached are computed"""
+        if self.engine.data_version != self.data_version:
+            self.refresh()
+        hits, misses = self.hits, self.misses
+        meal_ids = [meal_id for meal_id, ingredients in meals.items() if ingredients]
+        values = np.zeros((len(meal_ids), len(self.engine.nutrients)))
+        missing = {}
+        for i, meal_id in enumerate(meal_ids):
+            key = self.key(meals[meal_id])
+            vector = self.entries.get(key)
+            if vector is None:
+                missing.setdefault(key, []).append(i)
+            else:
+                self.entries.move_to_end(key)
+                values[i] = vector
+        self.hits += len(meal_ids) - sum(len(slots) for slots in missing.values())
+
+        if missing:
+            # Each distinct missing meal is computed once, all of them in one pass
+            firsts = [slots[0] for slots in missing.values()]
+            rows = [row for i in firsts for row in meals[meal_ids[i]]]
+            computed = segment_sums(self.engine.row_values(*self.engine.encode_rows(rows)),
+                                    [len(meals[meal_ids[i]]) for i in firsts])
+            for (key, slots), vector in zip(missing.items(), computed):
+                values[slots] = vector
+                self._store(key, vector)
+            self.misses += len(missing)
+            self.hits += sum(len(slots) - 1 for slots in missing.values())
+        count('meal_cache_hits', self.hits - hits)
+        count('meal_cache_misses', self.misses - misses)
+        return meal_ids, values
+
+    def day_with_sources(self, meals):
+        """Same structure as calc_day_with_sources, served from the cache where possible
+
+        Repeated days return the same cached dict, so callers must not modify it.
+        """
+        if self.engine.data_version != self.data_version:
+            self.refresh()
+        # Slot order and row order both shape the result, so the key keeps them
+        key = (self.version, tuple((slot, self.key(rows)) for slot, rows in meals.items()))
+        result = self.days.get(key)
+        if result is None:
+            result = self.engine.report(*self.meal_values(meals))
+            self._store_day(key, result)
+        else:
+            self.days.move_to_end(key)
+            self.day_hits += 1
+        return result
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'size': len(self.entries), 'capacity': self.capacity,
+                'day_hits': self.day_hits, 'day_evictions': self.day_evictions, 'days': len(self.days),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def save(self, path=None):
+        """Write the entries (least recently used first) in the columnar food-table format"""
+        path = path or self.path
+        keys = [json.dumps(key, separators=(',', ':')).encode('utf-8') for key in self.entries]
+        values = np.array(list(self.entries.values())).reshape(-1, len(self.engine.nutrients))
+        meta = {'kind': 'meal_cache', 'version': 1, 'table_version': table_version(self.engine).hex(),
+                'nutrients': self.engine.nutrients}
+        write_columns(path, meta, {
+            'key_offsets': np.concatenate([[0], np.cumsum([len(k) for k in keys])]).astype(np.int64),
+            'key_blob': np.frombuffer(b''.join(keys), dtype=np.uint8).copy(),
+            'values': values,
+        })
+
+    def load(self, path):
+        """Merge saved entries; a cache written for another food-table version is ignored"""
+        header, columns = open_columns(path)
+        if header.get('kind') != 'meal_cache':
+            raise ValueError(f"{path} is not a meal cache")
+        if header['table_version'] != table_version(self.engine).hex():
+            return 0
+        offsets, blob, values = columns['key_offsets'], columns['key_blob'], columns['values']
+        for i in range(len(values)):
+            rows = json.loads(bytes(blob[offsets[i]:offsets[i + 1]]).decode('utf-8'))
+            self._store(self.key(rows), np.array(values[i]))
+        return len(values)
+
+
+def main():
+    if len(sys.argv) > 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    cache = MealCache(engine, path=sys.argv[1] if len(sys.argv) == 2 else None)
+
+    # A client population of shuffled bulking/cutting days: nearly every meal is a repeat
+    rng = np.random.default_rng(0)
+    phases = [bulking_meals, cutting_meals]
+    days = [phases[i % 2][int(rng.integers(1, 8))] for i in range(20_000)]
+
+    start = time.perf_counter()
+    expected = [engine.day_with_sources(meals) for meals in days]
+    direct = time.perf_counter() - start
+    start = time.perf_counter()
+    cached = [cache.day_with_sources(meals) for meals in days]
+    elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for meals in days:
+        engine.meal_values(meals)
+    direct_meals = time.perf_counter() - start
+    start = time.perf_counter()
+    for meals in days:
+        cache.meal_values(meals)
+    cached_meals = time.perf_counter() - start
+
+    stats = cache.stats()
+    print("=" * 80)
+    print(f"{len(days):,} days, identical results: {cached == expected}")
+    print(f"  hits {stats['hits']:,}, misses {stats['misses']:,}, hit rate {stats['hit_rate']:.1%}, "
+          f"{stats['size']:,} entries; {stats['day_hits']:,} day hits, {stats['days']:,} days cached")
+    print(f"  meal vectors:      {direct_meals / len(days) * 1e6:6.1f} us/day direct, "
+          f"{cached_meals / len(days) * 1e6:6.1f} us/day cached")
+    print(f"  day with sources:  {direct / len(days) * 1e6:6.1f} us/day direct, "
+          f"{elapsed / len(days) * 1e6:6.1f} us/day cached")
+    print("=" * 80)
+    if cache.path:
+        cache.save()
+        print(f"Saved {stats['size']:,} entries to {cache.path}")
+
+
+if __name__ == '__main__':
+    main()
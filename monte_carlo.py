@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo DV Attainment
+Treats every ingredient row's portion weight and every food's nutrient
+values as uncertain (mean-preserving lognormal multipliers with configurable
+coefficients of variation) and samples whole phase-days at once, reporting
+per day and nutrient the probability of reaching 100% DV and percentile bands.
+
+Each draw samples one weight per ingredient row and one composition per food
+(shared by every row and day using that food). Day totals are summed without
+calc_day_with_sources' 0.1 per-meal cutoff, which is negligible for %DV.
+
+Usage:
+    python3 monte_carlo.py [draws]
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix
+
+# Coefficient of variation of a portion's weight (e.g. 1_banana = 120 g +/- 10%)
+DEFAULT_PORTION_CV = 0.10
+# Whole items and loosely measured cups vary more than weighed or spooned amounts
+PORTION_CV = {'1_banana': 0.20, '1_apple': 0.20, '2_potatoes': 0.25, '6_eggs': 0.08, '200g_tofu': 0.02,
+              '2c_spinach': 0.25, '1c_kale': 0.25, '1c_mushrooms': 0.20, '1.5c_broccoli': 0.20}
+
+# Coefficient of variation of food composition, by nutrient (vitamins vary more than minerals)
+DEFAULT_NUTRIENT_CV = 0.15
+NUTRIENT_CV = {'vit_c': 0.30, 'vit_e': 0.30, 'vit_k': 0.30, 'folate': 0.25, 'vit_b12': 0.25}
+
+PERCENTILES = (5, 25, 50, 75, 95)
+# Draws sampled per vectorized chunk
+CHUNK = 4096
+
+
+def _sigma(cv):
+    """Lognormal sigma for a coefficient of variation"""
+    return np.sqrt(np.log1p(np.square(np.asarray(cv, dtype=np.float64)))).astype(np.float32)
+
+
+def _lognormal(rng, shape, sigma, mean):
+    """mean times a mean-one lognormal multiplier, computed in place in float32"""
+    z = rng.standard_normal(shape, dtype=np.float32)
+    z *= sigma
+    z -= sigma * sigma / 2
+    np.exp(z, out=z)
+    z *= mean
+    return z
+
+
+def simulate(engine, days, draws=100_000, portion_cv=None, nutrient_cv=None, seed=0, chunk=CHUNK):
+    """Sample %DV for every day; returns (nutrients, draws x days x nutrients float32 array)
+
+    days is a list of {slot: [(food, portion_key), ...]}; portion_cv and
+    nutrient_cv override PORTION_CV / NUTRIENT_CV entries.
+    """
+    portion_cv = {**PORTION_CV, **(portion_cv or {})}
+    nutrient_cv = {**NUTRIENT_CV, **(nutrient_cv or {})}
+    nutrients = [n for n in engine.nutrients if n in engine.daily_values]
+    cols = [engine.nutrient_index[n] for n in nutrients]
+
+    # Rows of every day, and the foods they use
+    rows = [(d, food, portion) for d, meals in enumerate(days) for ingredients in meals.values()
+            for food, portion in ingredients]
+    food_idx, portion_idx = engine.encode_rows([(f, p) for _, f, p in rows])
+    row_day = np.array([d for d, _, _ in rows], dtype=np.intp)
+    foods, row_food = np.unique(food_idx, return_inverse=True)
+
+    grams = engine.portion_grams[portion_idx].astype(np.float32)
+    keys = engine.portions + [None]
+    portion_sigma = _sigma([portion_cv.get(keys[p], DEFAULT_PORTION_CV) for p in portion_idx])
+    base = (engine.matrix[foods][:, cols] / 100.0).astype(np.float32)
+    nutrient_sigma = _sigma([nutrient_cv.get(n, DEFAULT_NUTRIENT_CV) for n in nutrients])
+    dv = np.array([engine.daily_values[n] for n in nutrients], dtype=np.float32)
+
+    # Rows grouped by (day, food) cell, so a draw's rows fold into a days x foods gram matrix with one segment sum
+    cell = row_day * len(foods) + row_food
+    order = np.argsort(cell, kind='stable')
+    cells, firsts = np.unique(cell[order], return_index=True)
+
+    rng = np.random.default_rng(seed)
+    result = np.empty((draws, len(days), len(nutrients)), dtype=np.float32)
+    for start in range(0, draws, chunk):
+        n = min(chunk, draws - start)
+        weights = _lognormal(rng, (n, len(rows)), portion_sigma, grams)
+        composition = _lognormal(rng, (n, len(foods), len(nutrients)), nutrient_sigma, base)
+        per_food = np.zeros((n, len(days) * len(foods)), dtype=np.float32)
+        per_food[:, cells] = np.add.reduceat(weights[:, order], firsts, axis=1)
+        per_food = per_food.reshape(n, len(days), len(foods))
+        totals = np.matmul(per_food, composition, out=result[start:start + n])
+        totals *= 100 / dv
+    return nutrients, result
+
+
+def summarize(nutrients, samples, percentiles=PERCENTILES):
+    """Per day and nutrient: probability of >= 100% DV, mean and percentile %DV"""
+    draws, n_days = samples.shape[:2]
+    # Sorting contiguous per-cell rows once is much faster than np.percentile over axis 0
+    ordered = np.sort(np.ascontiguousarray(samples.reshape(draws, -1).T), axis=1)
+    probability = (draws - np.array([np.searchsorted(row, 100.0) for row in ordered])) / draws
+    mean = ordered.mean(axis=1, dtype=np.float64)
+    # Linear interpolation between order statistics, as np.percentile does by default
+    position = np.array(percentiles) / 100 * (draws - 1)
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, draws - 1)
+    fraction = position - lower
+    bands = ordered[:, lower] * (1 - fraction) + ordered[:, upper] * fraction
+    probability, mean = probability.reshape(n_days, -1), mean.reshape(n_days, -1)
+    bands = bands.T.reshape(len(percentiles), n_days, -1)
+    return [
+        {n: {'p_100': round(float(probability[d, i]), 3), 'mean': round(float(mean[d, i]), 1),
+             **{f"p{p}": round(float(bands[j, d, i]), 1) for j, p in enumerate(percentiles)}}
+         for i, n in enumerate(nutrients)}
+        for d in range(samples.shape[1])
+    ]
+
+
+def main():
+    draws = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    labels = [(phase, day) for phase in ('bulking', 'cutting') for day in range(1, 8)]
+    days = [(bulking_meals if phase == 'bulking' else cutting_meals)[day] for phase, day in labels]
+
+    start = time.perf_counter()
+    nutrients, samples = simulate(engine, days, draws)
+    simulated = time.perf_counter() - start
+    summary = summarize(nutrients, samples)
+    elapsed = time.perf_counter() - start
+
+    print("=" * 80)
+    print(f"{draws:,} draws x {len(days)} phase-days: sampled in {simulated:.2f}s, summarized in {elapsed - simulated:.2f}s")
+    print("=" * 80)
+    print(f"{'':12s}" + "".join(f"{n:>10s}" for n in nutrients))
+    for (phase, day), stats in zip(labels, summary):
+        print(f"{phase[:4]} day {day:<3d}" + "".join(f"{stats[n]['p_100']:10.0%}" for n in nutrients))
+    print("-" * 80)
+    print("Probability of reaching 100% DV. Calcium %DV bands (p5 / p50 / p95):")
+    for (phase, day), stats in zip(labels, summary):
+        c = stats['calcium']
+        print(f"  {phase} day {day}: {c['p5']:.0f} / {c['p50']:.0f} / {c['p95']:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Vectorized Nutrient Matrix Engine
+Compiles USDA_DATA, PORTIONS and DV into dense NumPy arrays so a whole day
+(and its meal-by-meal source breakdown) is computed in one pass over every
+nutrient, macros and micros together
+"""
+
+import numpy as np
+
+from instrumentation import count, is_enabled, stage
+
+# Output keys used by the page.tsx micronutrient data
+REPORT_KEYS = {
+    'vit_e': 'vitaminE', 'vit_k': 'vitaminK', 'vit_c': 'vitaminC', 'folate': 'folate',
+    'vit_b12': 'vitaminB12', 'calcium': 'calcium', 'iron': 'iron', 'zinc': 'zinc',
+    'magnesium': 'magnesium', 'potassium': 'potassium'
+}
+
+# Only meals above this amount count as sources (and towards the day total)
+SOURCE_THRESHOLD = 0.1
+# Distinct (food, portion_key) rows whose indices are remembered before the memo is cleared
+ROW_CODES_SIZE = 1 << 20
+# ordered_sum adds stacks up to this many layers one at a time, taller ones in blocks of the second
+ORDERED_LOOP_LAYERS = 32
+ORDERED_BLOCK_LAYERS = 1024
+
+
+def ordered_sum(stack):
+    """Sum a stack of arrays along axis 0 strictly in order, like Python's sum()
+
+    NumPy reductions may add pairwise, which can differ in the last bit and
+    flip a round(x, 1) at .x5 boundaries. np.add.accumulate is sequential by
+    definition, so tall stacks use it a block at a time instead of a Python
+    step per layer.
+    """
+    total = np.zeros(stack.shape[1:])
+    if len(stack) <= ORDERED_LOOP_LAYERS:
+        for layer in stack:
+            total += layer
+        return total
+    for start in range(0, len(stack), ORDERED_BLOCK_LAYERS):
+        block = np.concatenate([total[None], stack[start:start + ORDERED_BLOCK_LAYERS]])
+        total = np.add.accumulate(block, axis=0)[-1]
+    return total
+
+
+def segment_sums(values, sizes):
+    """Sum consecutive row segments of values (one per entry of sizes) in row order"""
+    sizes = np.asarray(sizes, dtype=np.intp)
+    padded = np.zeros((len(sizes), int(sizes.max(initial=0)), values.shape[1]))
+    segment = np.repeat(np.arange(len(sizes)), sizes)
+    padded[segment, np.arange(len(values)) - np.repeat(np.cumsum(sizes) - sizes, sizes)] = values
+    return ordered_sum(padded.transpose(1, 0, 2))
+
+
+class NutrientMatrix:
+    """Dense food x nutrient table with integer-indexed portions"""
+
+    def __init__(self, usda_data, portions, dv, meal_names=None):
+        foods = list(usda_data)
+
+        # Columns are every nutrient seen in the table, in first-seen order
+        nutrients = []
+        for values in usda_data.values():
+            for nutrient in values:
+                if nutrient not in nutrients:
+                    nutrients.append(nutrient)
+        nutrient_index = {n: i for i, n in enumerate(nutrients)}
+
+        # The extra all-zero row stands in for unknown foods, matching calc()'s 0.0 fallback
+        matrix = np.zeros((len(foods) + 1, len(nutrients)))
+        for i, food in enumerate(foods):
+            for nutrient, value in usda_data[food].items():
+                matrix[i, nutrient_index[nutrient]] = value
+
+        self._setup(foods, nutrients, matrix, portions, dv, meal_names)
+
+    @classmethod
+    def from_arrays(cls, foods, nutrients, matrix, portions, dv, meal_names=None, food_index=None):
+        """Wrap a precompiled matrix (one row per food plus a trailing all-zero row) without copying it
+
+        food_index, a mapping of food -> row, is used as is instead of being built
+        from foods, which are then kept as given rather than copied into a list.
+        """
+        if len(matrix) != len(foods) + 1:
+            raise ValueError(f"Matrix needs {len(foods) + 1} rows (foods plus a zero row), got {len(matrix)}")
+        engine = cls.__new__(cls)
+        engine._setup(list(foods) if food_index is None else foods, list(nutrients), matrix, portions, dv, meal_names,
+                      food_index)
+        return engine
+
+    def _setup(self, foods, nutrients, matrix, portions, dv, meal_names, food_index=None):
+        self.foods = foods
+        self.food_index = {food: i for i, food in enumerate(foods)} if food_index is None else food_index
+        self.nutrients = nutrients
+        self.nutrient_index = {n: i for i, n in enumerate(nutrients)}
+        self.matrix = matrix
+        # Bumped by code that edits matrix or portion_grams in place, so caches of results can tell
+        self.data_version = 0
+        self._report_columns = [(nutrient, key, self.nutrient_index.get(nutrient)) for nutrient, key in REPORT_KEYS.items()]
+
+        # The extra zero-gram slot stands in for unknown portion keys
+        self.portions = list(portions)
+        self.portion_index = {key: i for i, key in enumerate(self.portions)}
+        self.portion_grams = np.zeros(len(self.portions) + 1)
+        self.portion_grams[:len(self.portions)] = [portions[key] for key in self.portions]
+
+        self.daily_values = dict(dv)
+        self.dv = np.array([dv.get(n, np.nan) for n in nutrients])
+        self.meal_names = meal_names or {}
+        # (food, portion_key) -> (food index, portion index), so repeated rows skip both lookups
+        self._row_codes = {}
+
+    @property
+    def unknown_food(self):
+        return len(self.foods)
+
+    @property
+    def unknown_portion(self):
+        return len(self.portions)
+
+    def encode_rows(self, ingredients):
+        """Convert (food, portion_key) tuples into index arrays"""
+        food_index, unknown_food = self.food_index, len(self.foods)
+        portion_index, unknown_portion = self.portion_index, len(self.portions)
+        with stage('food_lookup'):
+            food_idx = np.array([food_index.get(f, unknown_food) for f, _ in ingredients], dtype=np.intp)
+        with stage('portion_lookup'):
+            portion_idx = np.array([portion_index.get(p, unknown_portion) for _, p in ingredients], dtype=np.intp)
+        if is_enabled():
+            count('rows', len(food_idx))
+            count('unknown_foods', int((food_idx == unknown_food).sum()))
+            count('unknown_portions', int((portion_idx == unknown_portion).sum()))
+        return food_idx, portion_idx
+
+    def row_values(self, food_idx, portion_idx):
+        """Nutrient amounts for each ingredient row (rows x nutrients)"""
+        grams = self.portion_grams[portion_idx]
+        return (self.matrix[food_idx] * grams[:, None]) / 100.0
+
+    def _row_code(self, row):
+        food, portion = row
+        if len(self._row_codes) >= ROW_CODES_SIZE:
+            self._row_codes.clear()
+        code = self._row_codes[tuple(row)] = (self.food_index.get(food, len(self.foods)),
+                                              self.portion_index.get(portion, len(self.portions)))
+        return code
+
+    def meal_values(self, meals):
+        """Return (meal_ids, meals x nutrients array) for the non-empty meals of a day
+
+        Meals are padded to the longest with zero-gram rows and summed row by row,
+        which adds exactly like segment_sums over the unpadded rows.
+        """
+        meal_ids = [meal_id for meal_id, ingredients in meals.items() if ingredients]
+        if not meal_ids:
+            return meal_ids, np.zeros((0, len(self.nutrients)))
+        with stage('encode'):
+            width = max(len(meals[meal_id]) for meal_id in meal_ids)
+            padding = (len(self.foods), len(self.portions))
+            codes, encoded = self._row_codes, []
+            for meal_id in meal_ids:
+                ingredients = meals[meal_id]
+                for row in ingredients:
+                    try:
+                        code = codes.get(row)
+                    except TypeError:
+                        code = None
+                    encoded.append(code or self._row_code(row))
+                encoded.extend([padding] * (width - len(ingredients)))
+            idx = np.array(encoded, dtype=np.intp).reshape(len(meal_ids), width, 2)
+        if is_enabled():
+            pads = idx.shape[0] * width - sum(len(meals[meal_id]) for meal_id in meal_ids)
+            count('rows', idx.shape[0] * width - pads)
+            count('unknown_foods', int((idx[..., 0] == padding[0]).sum()) - pads)
+            count('unknown_portions', int((idx[..., 1] == padding[1]).sum()) - pads)
+        with stage('sums'):
+            values = (self.matrix[idx[..., 0]] * self.portion_grams[idx[..., 1]][..., None]) / 100.0
+            return meal_ids, ordered_sum(values.transpose(1, 0, 2))
+
+    def day_totals(self, meals):
+        """Total of every nutrient for a day, keyed by nutrient name"""
+        _, values = self.meal_values(meals)
+        return dict(zip(self.nutrients, ordered_sum(values).tolist()))
+
+    def day_with_sources(self, meals):
+        """Same structure as calc_day_with_sources, computed from the matrix"""
+        return self.report(*self.meal_values(meals))
+
+    def report(self, meal_ids, values):
+        """Build the calc_day_with_sources structure from a day's meals x nutrients values"""
+        names = [self.meal_names[meal_id] for meal_id in meal_ids]
+        # Columns as Python lists: per-element numpy indexing dominates at a day's size
+        columns = values.T.tolist()
+
+        with stage('sources'):
+            # Vitamin D is always from supplement
+            result = {'vitaminD': {'value': 20.0, 'percentage': 100, 'sources': [{'meal': 'Supplement', 'value': 20.0}]}}
+            for nutrient, key, col in self._report_columns:
+                # Summed meal by meal like calc_day_with_sources, so totals match to the last bit
+                total = 0.0
+                sources = []
+                if col is not None:
+                    for name, value in zip(names, columns[col]):
+                        if value > SOURCE_THRESHOLD:
+                            total += value
+                            sources.append({'meal': name, 'value': round(value, 1)})
+                result[key] = {
+                    'value': round(total, 1),
+                    'percentage': round((total / self.daily_values[nutrient]) * 100),
+                    'sources': sources
+                }
+        return result
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Nutrition CLI
+Fast-start entry point for hooks and cron jobs. Foods, PORTIONS, DV and the
+bulking/cutting plans are read from a precompiled binary snapshot instead of
+importing calculate_all_nutrients_complete.py, and days are computed in plain
+Python (the same arithmetic as calc_day_with_sources) so NumPy is never
+imported. The snapshot is rebuilt automatically when the calculator changes;
+if it cannot be written (a read-only checkout), the rebuilt tables are used
+for that run only.
+
+Usage:
+    python3 nutrition_cli.py compute [bulking|cutting] [day]
+    python3 nutrition_cli.py export [-o micronutrients.json]
+    python3 nutrition_cli.py diff <old.json> [new.json]
+    python3 nutrition_cli.py snapshot
+"""
+
+import argparse
+import json
+import marshal
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SOURCE = os.path.join(HERE, 'calculate_all_nutrients_complete.py')
+SNAPSHOT = os.path.join(HERE, 'nutrition.snapshot')
+
+SNAPSHOT_MAGIC = b'NUTSNAP1'
+
+# Same order and keys as calc_day_with_sources
+REPORT_NUTRIENTS = [
+    ('vit_e', 'vitaminE'), ('vit_k', 'vitaminK'), ('vit_c', 'vitaminC'), ('folate', 'folate'),
+    ('vit_b12', 'vitaminB12'), ('calcium', 'calcium'), ('iron', 'iron'), ('zinc', 'zinc'),
+    ('magnesium', 'magnesium'), ('potassium', 'potassium'),
+]
+PHASES = ('bulking', 'cutting')
+
+
+def _source_stamp():
+    stat = os.stat(SOURCE)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def compile_snapshot():
+    """The calculator's tables and plans in snapshot form"""
+    # The only place the large dict literals are imported
+    import calculate_all_nutrients_complete as source
+
+    nutrients = []
+    for values in source.USDA_DATA.values():
+        for nutrient in values:
+            if nutrient not in nutrients:
+                nutrients.append(nutrient)
+    snapshot = {
+        'source': _source_stamp(),
+        'nutrients': nutrients,
+        'foods': {food: tuple(values.get(n, 0.0) for n in nutrients) for food, values in source.USDA_DATA.items()},
+        'portions': dict(source.PORTIONS),
+        'dv': dict(source.DV),
+        'meal_names': dict(source.MEAL_NAMES),
+        'plans': {
+            phase: {day: {slot: [tuple(row) for row in rows] for slot, rows in meals.items()}
+                    for day, meals in plan.items()}
+            for phase, plan in (('bulking', source.bulking_meals), ('cutting', source.cutting_meals))
+        },
+    }
+    return snapshot
+
+
+def write_snapshot(snapshot, path=SNAPSHOT):
+    """Write a compiled snapshot to path; OSError if it cannot be written"""
+    # Write then rename, so concurrent invocations never read a partial file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC + marshal.dumps(snapshot))
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def build_snapshot(path=SNAPSHOT):
+    """Compile the calculator's tables and plans into a snapshot file"""
+    snapshot = compile_snapshot()
+    write_snapshot(snapshot, path)
+    return snapshot
+
+
+def load_snapshot(path=SNAPSHOT):
+    """Read the snapshot, rebuilding it if missing, unreadable or older than the calculator"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:len(SNAPSHOT_MAGIC)] == SNAPSHOT_MAGIC:
+            snapshot = marshal.loads(data[len(SNAPSHOT_MAGIC):])
+            if snapshot['source'] == _source_stamp():
+                return snapshot
+    except (OSError, ValueError, EOFError, TypeError, KeyError):
+        pass
+    snapshot = compile_snapshot()
+    try:
+        write_snapshot(snapshot, path)
+    except OSError as exc:
+        print(f"nutrition_cli: snapshot not saved ({exc}); computing without it", file=sys.stderr)
+    return snapshot
+
+
+def compute_day(snapshot, meals):
+    """calc_day_with_sources for one day, summing in the same order so results match exactly"""
+    foods, portions, dv, meal_names = snapshot['foods'], snapshot['portions'], snapshot['dv'], snapshot['meal_names']
+    column = {n: i for i, n in enumerate(snapshot['nutrients'])}
+    result = {'vitaminD': {'value': 20.0, 'percentage': 100, 'sources': [{'meal': 'Supplement', 'value': 20.0}]}}
+    for nutrient, key in REPORT_NUTRIENTS:
+        col = column.get(nutrient)
+        total = 0.0
+        sources = []
+        for meal_id, ingredients in meals.items():
+            if ingredients:
+                meal_value = sum(
+                    (foods[food][col] * portions[portion]) / 100.0
+                    if col is not None and food in foods and portion in portions else 0.0
+                    for food, portion in ingredients
+                )
+                if meal_value > 0.1:
+                    sources.append({'meal': meal_names[meal_id], 'value': round(meal_value, 1)})
+                    total += meal_value
+        result[key] = {'value': round(total, 1), 'percentage': round((total / dv[nutrient]) * 100), 'sources': sources}
+    return result
+
+
+def compute_results(snapshot, phases=PHASES, days=None):
+    """{phase: {day: result}} for the requested phases and days"""
+    return {phase: {day: compute_day(snapshot, meals) for day, meals in snapshot['plans'][phase].items()
+                    if days is None or day in days}
+            for phase in phases}
+
+
+def diff_results(old, new):
+    """Yield (phase, day, nutrient, old_value, new_value) for every changed value"""
+    for phase in sorted(set(old) | set(new)):
+        old_days, new_days = old.get(phase, {}), new.get(phase, {})
+        for day in sorted(set(old_days) | set(new_days), key=lambda d: (len(d), d)):
+            old_day, new_day = old_days.get(day, {}), new_days.get(day, {})
+            for key in list(dict.fromkeys(list(old_day) + list(new_day))):
+                before = old_day.get(key, {}).get('value')
+                after = new_day.get(key, {}).get('value')
+                if before != after:
+                    yield phase, day, key, before, after
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compute, export and compare plan micronutrients from a snapshot")
+    parser.add_argument('--snapshot', default=SNAPSHOT, help="snapshot file (rebuilt automatically when stale)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    compute = commands.add_parser('compute', help="print day results as JSON")
+    compute.add_argument('phase', nargs='?', choices=PHASES)
+    compute.add_argument('day', nargs='?', type=int)
+    export = commands.add_parser('export', help="write the page.tsx micronutrientData JSON")
+    export.add_argument('-o', '--output', default='-')
+    diff = commands.add_parser('diff', help="list values that differ between two exports (or an export and now)")
+    diff.add_argument('old')
+    diff.add_argument('new', nargs='?')
+    commands.add_parser('snapshot', help="rebuild the snapshot")
+    args = parser.parse_args()
+
+    if args.command == 'snapshot':
+        snapshot = build_snapshot(args.snapshot)
+        print(f"Wrote {len(snapshot['foods'])} foods, {len(snapshot['portions'])} portions to {args.snapshot}")
+        return
+
+    snapshot = load_snapshot(args.snapshot)
+    if args.command == 'compute':
+        phases = (args.phase,) if args.phase else PHASES
+        results = compute_results(snapshot, phases, None if args.day is None else {args.day})
+        print(json.dumps(results, indent=2))
+    elif args.command == 'export':
+        text = json.dumps(compute_results(snapshot), indent=2)
+        if args.output == '-':
+            print(text)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+    elif args.command == 'diff':
+        with open(args.old, encoding='utf-8') as f:
+            old = json.load(f)
+        if args.new:
+            with open(args.new, encoding='utf-8') as f:
+                new = json.load(f)
+        else:
+            # Round-trip so day keys are strings on both sides
+            new = json.loads(json.dumps(compute_results(snapshot)))
+        changes = 0
+        for phase, day, key, before, after in diff_results(old, new):
+            change = f" ({after - before:+.1f})" if before is not None and after is not None else ""
+            print(f"{phase} day {day} {key}: {before} -> {after}{change}")
+            changes += 1
+        sys.exit(1 if changes else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Nutrition HTTP Service
+Small asyncio HTTP/1.1 server (standard library only) returning the
+calc_day_with_sources structure for posted meals. Identical requests share
+one cached response; identical requests arriving while the first is still
+being computed wait for it instead of computing again. Meal vectors are
+reused across different days through MealCache.
+
+Endpoints:
+    POST /day   {"meals": {"breakfast": [["rolled_oats", "1c_oats"], ...], ...}}
+    POST /plan  {"days": {"1": {<meals>}, "2": {...}}}  -> {"days": {"1": <result>, ...}}
+    GET  /stats
+
+Usage:
+    python3 nutrition_service.py [--host 127.0.0.1] [--port 8080]
+"""
+
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES
+from meal_cache import MealCache
+from nutrient_matrix import NutrientMatrix
+
+DEFAULT_PORT = 8080
+# Cached responses kept (least recently used evicted first)
+RESPONSE_CACHE_SIZE = 16_384
+MAX_BODY = 1 << 20
+
+STATUS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+          500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _meals(payload):
+    """Validate {slot: [[food, portion_key], ...]} and return it with tuple rows"""
+    if not isinstance(payload, dict):
+        raise BadRequest("meals must be an object of slot -> rows")
+    meals = {}
+    for slot, rows in payload.items():
+        if slot not in MEAL_NAMES:
+            raise BadRequest(f"Unknown meal slot {slot!r}; expected one of {list(MEAL_NAMES)}")
+        if not isinstance(rows, list) or not all(
+                isinstance(row, list) and len(row) == 2 and all(isinstance(x, str) for x in row) for row in rows):
+            raise BadRequest(f"{slot} must be a list of [food, portion_key] pairs")
+        meals[slot] = [tuple(row) for row in rows]
+    return meals
+
+
+class NutritionService:
+    """Request handling, response cache and in-flight coalescing"""
+
+    def __init__(self, engine=None, cache_size=RESPONSE_CACHE_SIZE):
+        self.meal_cache = MealCache(engine or NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES))
+        # One compute thread: MealCache is not thread-safe and the work holds the GIL anyway
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.responses = OrderedDict()
+        self.cache_size = cache_size
+        self.in_flight = {}
+        self.stats = {'requests': 0, 'cache_hits': 0, 'coalesced': 0, 'computed': 0, 'errors': 0}
+
+    def _compute(self, path, payload):
+        if path == '/day':
+            if not isinstance(payload, dict) or 'meals' not in payload:
+                raise BadRequest("expected {\"meals\": {...}}")
+            result = self.meal_cache.day_with_sources(_meals(payload['meals']))
+        else:
+            if not isinstance(payload, dict) or not isinstance(payload.get('days'), dict):
+                raise BadRequest("expected {\"days\": {\"1\": {...}, ...}}")
+            result = {'days': {day: self.meal_cache.day_with_sources(_meals(meals))
+                               for day, meals in payload['days'].items()}}
+        return json.dumps(result, separators=(',', ':')).encode('utf-8')
+
+    async def respond(self, method, path, body):
+        """Return (status, body bytes) for one request"""
+        self.stats['requests'] += 1
+        if path == '/stats':
+            stats = dict(self.stats, meal_cache=self.meal_cache.stats(), cached_responses=len(self.responses))
+            return 200, json.dumps(stats).encode('utf-8')
+        if path not in ('/day', '/plan'):
+            return 404, b'{"error":"not found"}'
+        if method != 'POST':
+            return 405, b'{"error":"use POST"}'
+
+        # Slot order decides source order, so the key is the body as sent, not re-sorted JSON
+        key = (path, body)
+        cached = self.responses.get(key)
+        if cached is not None:
+            self.responses.move_to_end(key)
+            self.stats['cache_hits'] += 1
+            return 200, cached
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            self.stats['coalesced'] += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                # The request computing this key was cancelled (its client went away), this one was not
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                return 503, b'{"error":"computation cancelled, retry"}'
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            try:
+                payload = json.loads(body)
+                data = await asyncio.get_running_loop().run_in_executor(self.executor, self._compute, path, payload)
+                response = (200, data)
+                self.stats['computed'] += 1
+                self.responses[key] = data
+                if len(self.responses) > self.cache_size:
+                    self.responses.popitem(last=False)
+            except (ValueError, BadRequest) as exc:
+                self.stats['errors'] += 1
+                response = (400, json.dumps({'error': str(exc)}).encode('utf-8'))
+            except Exception as exc:
+                self.stats['errors'] += 1
+                response = (500, json.dumps({'error': f"{type(exc).__name__}: {exc}"}).encode('utf-8'))
+            future.set_result(response)
+            return response
+        finally:
+            del self.in_flight[key]
+            # Cancelled before set_result: release the requests waiting on this one
+            if not future.done():
+                future.cancel()
+
+    async def handle(self, reader, writer):
+        """Serve keep-alive HTTP/1.1 requests on one connection"""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, path, version = lines[0].split(' ', 2)
+                except ValueError:
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get('content-length') or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    length = None
+                if length is None:
+                    # Without a usable length the next request cannot be found, so the connection is closed
+                    status, body = 400, b'{"error":"invalid Content-Length"}'
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, body = 413, b'{"error":"body too large"}'
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b''
+                    status, body = await self.respond(method, path.split('?', 1)[0], body)
+                    keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                writer.write(f"HTTP/1.1 {status} {STATUS[status]}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(body)}\r\n"
+                             f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(host, port, service=None):
+    service = service or NutritionService()
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+    print(f"Serving on http://{host}:{port} (POST /day, POST /plan, GET /stats)")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve calc_day_with_sources over HTTP")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
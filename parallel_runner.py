@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Parallel Plan Runner
+Recomputes every client's plan across a process pool. The parent only splits
+the input into line-aligned byte ranges; each worker reads its own shard,
+computes it against a shared read-only food matrix (a shared-memory block,
+or the memory-mapped food table from fdc_loader.py) and writes a shard file.
+Shards are merged in input order, so output is identical for any worker count.
+
+Foods are USDA_DATA slugs ("rolled_oats") by default. A --food-table is keyed by
+fdc_id instead, so its plans must name foods by fdc_id (169705 or "169705");
+a food missing from the table stops the run rather than counting as zero.
+
+Input lines:
+    {"client": "c1", "plan": {"1": {"breakfast": [["rolled_oats", "1c_oats"], ...], ...}, ...}}
+Output lines:
+    {"client": "c1", "days": {"1": <calc_day_with_sources result>, ...}}
+
+Usage:
+    python3 parallel_runner.py <plans.jsonl> <output.jsonl> [--workers N] [--chunk-size N] [--food-table PATH]
+    python3 parallel_runner.py --generate N <plans.jsonl>
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from fdc_loader import FoodTable
+from nutrient_matrix import NutrientMatrix
+
+# Per-worker state set up once by _init_worker
+_engine = None
+_shm = None
+_row = tuple
+
+
+def _init_worker(food_table, shm_name, shape, dtype, foods, nutrients):
+    global _engine, _shm, _row
+    if food_table:
+        _engine = FoodTable(food_table).engine(PORTIONS, DV, MEAL_NAMES)
+        _row = _fdc_row
+    else:
+        _shm = shared_memory.SharedMemory(name=shm_name)
+        matrix = np.ndarray(shape, dtype=dtype, buffer=_shm.buf)
+        _engine = NutrientMatrix.from_arrays(foods, nutrients, matrix, PORTIONS, DV, MEAL_NAMES)
+
+
+def _fdc_row(row):
+    """(fdc_id, portion_key) for a plan row run against a food table; unknown foods raise ValueError"""
+    food, portion = row
+    try:
+        fdc_id = int(food)
+    except (TypeError, ValueError):
+        fdc_id = None
+    if fdc_id not in _engine.food_index:
+        raise ValueError(f"food {food!r} is not an fdc_id in the food table (plans run with --food-table "
+                         f"name foods by fdc_id, not USDA_DATA slug)")
+    return fdc_id, portion
+
+
+def _run_shard(task):
+    """Compute one byte range of the input into its own shard file"""
+    index, source, start, end, workdir = task
+    began = time.perf_counter()
+    clients = days = 0
+    path = os.path.join(workdir, f"shard_{index:06d}.jsonl")
+    with open(source, 'rb') as src, open(path, 'w', encoding='utf-8') as out:
+        src.seek(start)
+        for line in src.read(end - start).splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            results = {}
+            for day, meals in record['plan'].items():
+                try:
+                    meals = {slot: [_row(row) for row in rows] for slot, rows in meals.items()}
+                except ValueError as exc:
+                    raise ValueError(f"client {record['client']} day {day}: {exc}") from None
+                results[day] = _engine.day_with_sources(meals)
+            out.write(json.dumps({'client': record['client'], 'days': results}, separators=(',', ':')) + '\n')
+            clients += 1
+            days += len(results)
+    return index, path, os.getpid(), clients, days, time.perf_counter() - began
+
+
+def shard_ranges(source, chunk_size):
+    """Split source into byte ranges of chunk_size lines each"""
+    ranges, start, count, offset = [], 0, 0, 0
+    with open(source, 'rb') as f:
+        for line in f:
+            offset += len(line)
+            count += 1
+            if count == chunk_size:
+                ranges.append((start, offset))
+                start, count = offset, 0
+    if offset > start:
+        ranges.append((start, offset))
+    return ranges
+
+
+def run(source, destination, workers=None, chunk_size=1000, food_table=None):
+    """Process source into destination and return per-worker statistics"""
+    workers = workers or os.cpu_count() or 1
+    shm = None
+    if food_table:
+        initargs = (food_table, None, None, None, None, None)
+    else:
+        engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+        shm = shared_memory.SharedMemory(create=True, size=engine.matrix.nbytes)
+        np.ndarray(engine.matrix.shape, dtype=engine.matrix.dtype, buffer=shm.buf)[:] = engine.matrix
+        initargs = (None, shm.name, engine.matrix.shape, engine.matrix.dtype.str, engine.foods, engine.nutrients)
+
+    report = {}
+    try:
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(destination))) as workdir:
+            tasks = [(i, source, start, end, workdir) for i, (start, end) in enumerate(shard_ranges(source, chunk_size))]
+            with Pool(workers, initializer=_init_worker, initargs=initargs) as pool, \
+                    open(destination, 'wb') as out:
+                # imap keeps submission order, so shards are appended deterministically
+                for index, path, pid, clients, days, seconds in pool.imap(_run_shard, tasks):
+                    with open(path, 'rb') as shard:
+                        shutil.copyfileobj(shard, out)
+                    os.remove(path)
+                    stats = report.setdefault(pid, {'shards': 0, 'clients': 0, 'days': 0, 'seconds': 0.0})
+                    stats['shards'] += 1
+                    stats['clients'] += clients
+                    stats['days'] += days
+                    stats['seconds'] += seconds
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+    return report
+
+
+def generate(count, path, seed=0):
+    """Write a synthetic client population built from shuffled bulking/cutting days"""
+    rng = np.random.default_rng(seed)
+    phases = [bulking_meals, cutting_meals]
+    with open(path, 'w', encoding='utf-8') as f:
+        for client in range(count):
+            phase = phases[client % 2]
+            order = rng.permutation(7) + 1
+            plan = {str(day): phase[int(src)] for day, src in zip(range(1, 8), order)}
+            f.write(json.dumps({'client': f"client-{client:07d}", 'plan': plan}, separators=(',', ':')) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute client plans across a process pool")
+    parser.add_argument('paths', nargs='+', help="<plans.jsonl> <output.jsonl>, or <plans.jsonl> with --generate")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="clients per shard")
+    parser.add_argument('--food-table', default=None, help="memory-mapped food table from fdc_loader.py; plan foods must then be fdc_ids")
+    parser.add_argument('--generate', type=int, default=None, metavar='N', help="write N synthetic clients and exit")
+    args = parser.parse_args()
+
+    if args.generate is not None:
+        generate(args.generate, args.paths[0])
+        print(f"Wrote {args.generate:,} clients to {args.paths[0]}")
+        return
+    if len(args.paths) != 2:
+        parser.error("expected <plans.jsonl> <output.jsonl>")
+
+    start = time.perf_counter()
+    report = run(args.paths[0], args.paths[1], args.workers, args.chunk_size, args.food_table)
+    elapsed = time.perf_counter() - start
+
+    total_days = sum(stats['days'] for stats in report.values())
+    print("=" * 80)
+    print(f"{sum(s['clients'] for s in report.values()):,} clients, {total_days:,} plan-days "
+          f"in {elapsed:.2f}s ({total_days / elapsed:,.0f} plan-days/s) on {len(report)} workers")
+    print("=" * 80)
+    for pid, stats in sorted(report.items()):
+        print(f"  worker {pid}: {stats['shards']:4d} shards, {stats['clients']:8,} clients, "
+              f"{stats['days'] / stats['seconds']:10,.0f} plan-days/s busy")
+
+
+if __name__ == '__main__':
+    main()
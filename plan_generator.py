@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+Weekly Plan Generator
+Searches meal assignments for all 7 days (one meals.json meal per slot, of
+that slot's type) for the plans whose days best meet the daily macro, fiber,
+sodium and saturated fat bounds (portion_optimizer.MACRO_BOUNDS, taken from
+the app's user profile), with no meal used more than --max-repeats times a
+week, and returns the top k plans.
+
+Libraries with more than --shortlist meals in a slot are first cut to the
+meals whose scaled-up vectors come closest to the targets; the search is then
+exact over what is left, in two branch-and-bound stages over per-meal
+nutrient vectors:
+1. The best M days: slots are filled one at a time, and every candidate meal
+   of the next slot is bounded at once by letting the remaining slots take
+   any total between their per-nutrient minimum and maximum sums. The day
+   cost is convex in the totals, so that box gives a true lower bound.
+   Subtrees (by first-slot meal) are spread across a process pool.
+2. The best weeks: a count per day, under the meal repeat limit, searched
+   cheapest LP bound first (SciPy's HiGHS backend), so weeks come out in cost
+   order. Any week using a day outside the M costs at least 6x the best day
+   plus the M-th, so while the k-th week costs more than that, M doubles and
+   both stages rerun.
+
+Usage:
+    python3 plan_generator.py [--top K] [--max-repeats N] [--workers N]
+                              [--shortlist N] [--library N] [--time-limit SECONDS]
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import time
+from multiprocessing import Pool
+
+import numpy as np
+from scipy.optimize import linprog
+from scipy.sparse import csr_matrix
+
+from portion_optimizer import MACRO_BOUNDS
+from trace_index import DATA_DIR, NUTRIENTS, SLOTS, build_index
+
+# Cost of missing a bound by 100%, relative to sitting at one end of a macro band instead of its middle
+SHORTFALL_PENALTY = 1000.0
+
+# Days in a plan
+WEEK_DAYS = 7
+
+# Meals kept per slot, by shortlist(), before the exact search (0 keeps every meal)
+SHORTLIST = 24
+
+# Days kept from stage 1 before the first week search (doubled until the top k are proven)
+INITIAL_DAYS = 64
+
+# Per-worker state set up once by _init_worker
+_search = None
+
+
+class DayCost:
+    """Convex, piecewise-linear cost of a day's nutrient totals against (min, max) bounds
+
+    A bound missed by x% costs SHORTFALL_PENALTY * x / 100; macros (nutrients with
+    a finite band) also cost their distance from the middle of the band, in band widths.
+    """
+
+    def __init__(self, bounds, nutrients=NUTRIENTS):
+        lo = np.array([bounds.get(n, (0, math.inf))[0] for n in nutrients], dtype=float)
+        hi = np.array([bounds.get(n, (0, math.inf))[1] for n in nutrients], dtype=float)
+        self.lo, self.hi = lo, hi
+        self.under = np.where(lo > 0, SHORTFALL_PENALTY / np.where(lo > 0, lo, 1), 0.0)
+        self.over = np.where(np.isfinite(hi) & (hi > 0), SHORTFALL_PENALTY / np.where(np.isfinite(hi) & (hi > 0), hi, 1), 0.0)
+        banded = np.isfinite(lo) & np.isfinite(hi) & (hi > lo) & (lo > 0)
+        self.mid = np.where(banded, (lo + hi) / 2, 0.0)
+        self.center = np.where(banded, 1 / np.where(banded, hi - lo, 1), 0.0)
+        # Where the cost is lowest: the middle of a band, anywhere inside a limit
+        self.best_lo = np.where(banded, self.mid, np.where(np.isfinite(lo), lo, -math.inf))
+        self.best_hi = np.where(banded, self.mid, hi)
+
+    def __call__(self, totals):
+        """Cost of each row of totals (... x nutrients)"""
+        cost = (np.maximum(self.lo - totals, 0) * self.under + np.maximum(totals - self.hi, 0) * self.over
+                + np.abs(totals - self.mid) * self.center)
+        return cost.sum(axis=-1)
+
+    def lower_bound(self, low, high):
+        """Least cost of any totals with low <= totals <= high, nutrient by nutrient"""
+        return self(np.clip(np.clip(low, self.best_lo, self.best_hi), low, high))
+
+
+class DaySearch:
+    """Stage 1: the best days, one meal per slot"""
+
+    def __init__(self, slot_vectors, cost):
+        self.vectors = slot_vectors
+        self.cost = cost
+        # Least and greatest totals the slots after each depth can add
+        n = slot_vectors[0].shape[1]
+        self.rest_min = [np.zeros(n)] * (len(slot_vectors) + 1)
+        self.rest_max = [np.zeros(n)] * (len(slot_vectors) + 1)
+        for d in range(len(slot_vectors) - 1, -1, -1):
+            self.rest_min[d] = self.rest_min[d + 1] + slot_vectors[d].min(axis=0)
+            self.rest_max[d] = self.rest_max[d + 1] + slot_vectors[d].max(axis=0)
+
+    def best(self, count, first=None, deadline=None):
+        """The count cheapest days as [(cost, (meal index per slot))], cheapest first
+
+        first limits the first slot to those meal indices (one worker's subtrees).
+        Returns (days, complete); complete is False if the deadline cut the search short.
+        """
+        heap = []
+        complete = [True]
+        last = len(self.vectors) - 1
+
+        def search(depth, totals, chosen, candidates):
+            if deadline is not None and time.perf_counter() > deadline:
+                complete[0] = False
+                return
+            bound = -heap[0][0] if len(heap) == count else math.inf
+            reached = totals + self.vectors[depth][candidates]
+            if depth == last:
+                costs = self.cost(reached)
+                for i in np.flatnonzero(costs < bound):
+                    entry = (-float(costs[i]), chosen + (int(candidates[i]),))
+                    if len(heap) < count:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+                return
+            bounds = self.cost.lower_bound(reached + self.rest_min[depth + 1], reached + self.rest_max[depth + 1])
+            everything = np.arange(len(self.vectors[depth + 1]))
+            for i in np.argsort(bounds, kind='stable'):
+                if bounds[i] >= (-heap[0][0] if len(heap) == count else math.inf):
+                    break
+                search(depth + 1, reached[i], chosen + (int(candidates[i]),), everything)
+
+        first = np.arange(len(self.vectors[0])) if first is None else np.asarray(first)
+        search(0, np.zeros(self.vectors[0].shape[1]), (), first)
+        return sorted((-c, meals) for c, meals in heap), complete[0]
+
+
+def _init_worker(slot_vectors, bounds):
+    global _search
+    _search = DaySearch(slot_vectors, DayCost(bounds))
+
+
+def _best_days(task):
+    count, first, deadline = task
+    return _search.best(count, first, deadline)
+
+
+def best_weeks(days, top, max_repeats, n_days=WEEK_DAYS, deadline=None):
+    """Stage 2: the top cheapest weeks of n_days from days [(cost, meals)]
+
+    A week is a count per day; a day may repeat, but no meal (slot, index) may appear
+    more than max_repeats times. Nodes are bounds on the counts, taken cheapest LP
+    bound first: a fractional LP solution branches on one day's count, and an integral
+    one is the next cheapest week, after which its node is split into the regions that
+    exclude it, so weeks come out in cost order. Returns ([(cost, [day index, ...])], complete).
+    """
+    costs = np.array([c for c, _ in days])
+    meals = np.array([m for _, m in days], dtype=np.intp).reshape(len(days), -1)
+    # One capacity row per meal of each slot
+    offsets = np.concatenate([[0], np.cumsum(meals.max(axis=0, initial=-1) + 1)])
+    rows = (meals + offsets[:-1]).ravel()
+    uses = csr_matrix((np.ones(len(rows)), (rows, np.repeat(np.arange(len(days)), meals.shape[1]))),
+                      shape=(int(offsets[-1]), len(days)))
+    capacity = np.full(uses.shape[0], max_repeats)
+    sizes = np.ones((1, len(days)))
+
+    def relax(lo, hi):
+        result = linprog(costs, A_ub=uses, b_ub=capacity, A_eq=sizes, b_eq=[n_days],
+                         bounds=np.column_stack([lo, hi]), method='highs')
+        return (result.fun, result.x) if result.status == 0 else None
+
+    heap, weeks, pushed = [], [], 0
+
+    def push(lo, hi):
+        nonlocal pushed
+        relaxed = relax(lo, hi)
+        if relaxed is not None:
+            heapq.heappush(heap, (relaxed[0], pushed, lo, hi, relaxed[1]))
+            pushed += 1
+
+    if len(days):
+        push(np.zeros(len(days)), np.full(len(days), float(max_repeats)))
+    while heap and len(weeks) < top:
+        if deadline is not None and time.perf_counter() > deadline:
+            return weeks, False
+        bound, _, lo, hi, x = heapq.heappop(heap)
+        counts = np.round(x)
+        fractional = np.flatnonzero(np.abs(x - counts) > 1e-6)
+        if len(fractional):
+            j = fractional[np.argmax(np.abs(x - counts)[fractional])]
+            below, above = hi.copy(), lo.copy()
+            below[j], above[j] = np.floor(x[j]), np.ceil(x[j])
+            push(lo, below)
+            push(above, hi)
+            continue
+        support = np.flatnonzero(counts)
+        weeks.append((float(costs @ counts), np.repeat(support, counts[support].astype(np.intp)).tolist()))
+        # Every other week in the node has fewer of some day in this one: split on the first such day
+        for i, j in enumerate(support):
+            child_lo, child_hi = lo.copy(), hi.copy()
+            child_hi[j] = counts[j] - 1
+            child_lo[support[:i]] = counts[support[:i]]
+            if child_lo[j] <= child_hi[j]:
+                push(child_lo, child_hi)
+    return weeks, True
+
+
+def shortlist(slot_vectors, cost, size):
+    """Indices of the size most promising meals of each slot
+
+    A meal is scored by the cost of the day it would make if every slot were like it:
+    its vector divided by the share of each nutrient its slot supplies on average.
+    """
+    means = np.array([v.mean(axis=0) for v in slot_vectors])
+    total = means.sum(axis=0)
+    shares = np.where(total > 0, means / np.where(total > 0, total, 1), 1 / len(slot_vectors))
+    kept = []
+    for vectors, share in zip(slot_vectors, shares):
+        scores = cost(vectors / np.where(share > 0, share, 1))
+        kept.append(np.sort(np.argsort(scores, kind='stable')[:size]) if len(vectors) > size else np.arange(len(vectors)))
+    return kept
+
+
+def generate(slot_vectors, bounds, top=5, max_repeats=3, workers=1, time_limit=None, size=SHORTLIST):
+    """Top plans as [(week cost, [(meal index per slot) per day])], plus search statistics
+
+    slot_vectors holds one (meals x nutrients) array per slot; bounds maps nutrients to
+    daily (min, max). Slots with more than size meals are shortlisted first (size 0
+    keeps every meal); the plans are then the exact best over the shortlist, and also
+    over the whole library if no slot was cut. With a time limit the best plans found
+    so far are returned and stats['proven'] is False.
+    """
+    if any(len(v) * max_repeats < WEEK_DAYS for v in slot_vectors):
+        raise ValueError(f"A slot has too few meals to fill {WEEK_DAYS} days using each at most {max_repeats}x")
+    began = time.perf_counter()
+    deadline = began + time_limit if time_limit else None
+    cost = DayCost(bounds)
+    kept = shortlist(slot_vectors, cost, size) if size else [np.arange(len(v)) for v in slot_vectors]
+    vectors = [v[k] for v, k in zip(slot_vectors, kept)]
+    stats = {'shortlisted': any(len(k) < len(v) for k, v in zip(kept, slot_vectors)),
+             'days_kept': 0, 'rounds': 0, 'proven': False}
+    max_days = math.prod(len(v) for v in vectors)
+    count = min(INITIAL_DAYS, max_days)
+    search = DaySearch(vectors, cost)
+    pool = Pool(workers, initializer=_init_worker, initargs=(vectors, bounds)) if workers > 1 else None
+    days, weeks = [], []
+    try:
+        while True:
+            stats['rounds'] += 1
+            if pool is None:
+                found, complete = search.best(count, deadline=deadline)
+            else:
+                # Interleaved first-slot meals, so each worker gets good and bad subtrees alike
+                order = np.argsort(cost.lower_bound(vectors[0] + search.rest_min[1], vectors[0] + search.rest_max[1]),
+                                   kind='stable')
+                parts = pool.map(_best_days, [(count, order[w::workers], deadline) for w in range(workers)])
+                found = sorted(day for part, _ in parts for day in part)[:count]
+                complete = all(done for _, done in parts)
+            best, searched = best_weeks(found, top, max_repeats, deadline=deadline)
+            if not (complete and searched):
+                # Cut short: keep the previous round's plans unless this one found more
+                if len(best) > len(weeks):
+                    days, weeks = found, best
+                break
+            days, weeks = found, best
+            # Cheapest week that uses any day outside the ones kept
+            outside = days[0][0] * (WEEK_DAYS - 1) + days[-1][0] if len(days) == count else math.inf
+            if count >= max_days or (len(weeks) == top and weeks[-1][0] <= outside):
+                stats['proven'] = True
+                break
+            count = min(count * 2, max_days)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+    stats['days_kept'] = len(days)
+    stats['seconds'] = time.perf_counter() - began
+    return [(c, [tuple(int(k[i]) for k, i in zip(kept, days[j][1])) for j in chosen]) for c, chosen in weeks], stats
+
+
+def load_library():
+    """Per-slot meal ids and (meals x nutrients) totals from meals.json and foodReferences.json"""
+    loaded = []
+    for name in ('foodReferences.json', 'meals.json'):
+        with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+            loaded.append(json.load(f))
+    meals = build_index(*loaded, {})['meals']
+    library = {}
+    for slot, _ in SLOTS:
+        ids = [meal_id for meal_id, meal in meals.items() if meal['type'] == slot]
+        library[slot] = (ids, np.array([meals[i]['totals'] for i in ids], dtype=float).reshape(len(ids), len(NUTRIENTS)))
+    return library
+
+
+def synthetic_library(library, size, seed=0):
+    """A library of size meals per slot: rescaled and perturbed copies of the real ones"""
+    rng = np.random.default_rng(seed)
+    result = {}
+    for slot, (ids, vectors) in library.items():
+        base = rng.integers(len(ids), size=size)
+        scale = rng.uniform(0.6, 1.4, size=(size, 1)) * rng.lognormal(0, 0.15, size=(size, len(NUTRIENTS)))
+        result[slot] = ([f"{ids[b]}-v{i}" for i, b in enumerate(base)], vectors[base] * scale)
+    return result
+
+
+def weekly_plan(library, days):
+    """A plan in weeklyPlan.json form from [(meal index per slot) per day]"""
+    return {'days': [{'day': d, **{slot: library[slot][0][i] for (slot, _), i in zip(SLOTS, meals)}}
+                     for d, meals in enumerate(days, 1)]}
+
+
+def _status(stats):
+    if not stats['proven']:
+        return 'best found in the time limit'
+    return 'proven best over the shortlist' if stats['shortlisted'] else 'proven best'
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the best weekly plans from the meal library")
+    parser.add_argument('--top', type=int, default=5, help="plans to return")
+    parser.add_argument('--max-repeats', type=int, default=3, help="times any one meal may appear in a week")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes for the day search")
+    parser.add_argument('--shortlist', type=int, default=SHORTLIST, help="meals kept per slot (0 keeps all)")
+    parser.add_argument('--library', type=int, default=2000, metavar='N',
+                        help="also search a synthetic library of N meals per slot (0 to skip)")
+    parser.add_argument('--time-limit', type=float, default=None, help="return the best plans found within this")
+    args = parser.parse_args()
+    bounds = MACRO_BOUNDS
+    options = (args.top, args.max_repeats, args.workers, args.time_limit, args.shortlist)
+
+    library = load_library()
+    plans, stats = generate([library[slot][1] for slot, _ in SLOTS], bounds, *options)
+    print("=" * 80)
+    print(f"meals.json library ({', '.join(f'{slot} {len(library[slot][0])}' for slot, _ in SLOTS)}), "
+          f"each meal at most {args.max_repeats}x a week")
+    print(f"Top {len(plans)} plans in {stats['seconds']:.2f}s ({stats['days_kept']} days kept, {_status(stats)})")
+    for rank, (cost, days) in enumerate(plans, 1):
+        totals = sum(sum(library[slot][1][i] for (slot, _), i in zip(SLOTS, meals)) for meals in days) / len(days)
+        print(f"  #{rank} cost {cost:8.2f}: daily average "
+              + ", ".join(f"{n} {v:.0f}" for n, v in zip(NUTRIENTS, totals)))
+    if plans:
+        print("Best plan:")
+        for day in weekly_plan(library, plans[0][1])['days']:
+            print(f"  Day {day['day']}: " + ", ".join(day[slot] for slot, _ in SLOTS))
+
+    if args.library:
+        large = synthetic_library(library, args.library)
+        plans, stats = generate([large[slot][1] for slot, _ in SLOTS], bounds, *options)
+        print("-" * 80)
+        print(f"Synthetic library: {args.library:,} meals per slot ({args.library ** len(SLOTS):.1e} possible days)")
+        print(f"Top {len(plans)} plans in {stats['seconds']:.2f}s ({stats['days_kept']} days kept over "
+              f"{stats['rounds']} rounds, {_status(stats)}); costs {', '.join(f'{cost:.3f}' for cost, _ in plans)}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
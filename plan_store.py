@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Plan Version Store
+Stores plan versions as a tree of hashed objects (ingredient rows -> meals ->
+days -> version), so variants that share rows, meals or days share their
+storage: committing a variant that changes one portion adds one row, one
+meal, one day and one version object. Diffs compare hashes top-down and only
+open the days and meals whose hashes differ, and computed day results are
+stored per day hash, so a new variant only computes the days it changed.
+
+Objects are canonical JSON; on disk each lives at objects/<2 hex>/<rest>,
+written once, with refs/<name> files naming versions and results/<key>/
+holding computed results.
+
+Usage:
+    python3 plan_store.py [store_dir] [variants]
+"""
+
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from meal_cache import table_version
+from nutrient_matrix import NutrientMatrix
+
+
+def _canonical(payload):
+    return json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def _unmatched(rows, other):
+    """Rows of `rows` (in order) left once each row of `other` cancels one equal row; repeats count"""
+    left = Counter(other)
+    unmatched = []
+    for row in rows:
+        if left[row]:
+            left[row] -= 1
+        else:
+            unmatched.append(row)
+    return unmatched
+
+
+def _write_atomic(path, data):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class PlanStore:
+    """Hashed rows, meals, days and versions, in memory and optionally on disk"""
+
+    def __init__(self, root=None):
+        self.root = root
+        self.objects = {}
+        # Meal rows -> meal hash, so re-committing an unchanged meal hashes nothing
+        self.meal_hashes = {}
+        self.results_cache = {}
+        self.refs = {}
+        self.stats = {'objects_written': 0, 'objects_reused': 0, 'results_computed': 0, 'results_reused': 0}
+        if root:
+            os.makedirs(os.path.join(root, 'objects'), exist_ok=True)
+            refs = os.path.join(root, 'refs')
+            for directory, _, files in os.walk(refs):
+                for name in files:
+                    with open(os.path.join(directory, name), encoding='utf-8') as f:
+                        self.refs[os.path.relpath(os.path.join(directory, name), refs).replace(os.sep, '/')] = f.read()
+
+    # Objects
+
+    def _path(self, *parts):
+        *dirs, name = parts
+        return os.path.join(self.root, *dirs, name[:2], name[2:])
+
+    def put(self, kind, payload):
+        """Store one object and return its hash; the kind is hashed too, so a meal never collides with a day"""
+        data = _canonical(payload)
+        digest = hashlib.blake2b(kind.encode('ascii') + b'\0' + data, digest_size=16).hexdigest()
+        if digest in self.objects or (self.root and os.path.exists(self._path('objects', digest))):
+            self.stats['objects_reused'] += 1
+        else:
+            self.stats['objects_written'] += 1
+            if self.root:
+                path = self._path('objects', digest)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                _write_atomic(path, data)
+        self.objects[digest] = payload
+        return digest
+
+    def get(self, digest):
+        payload = self.objects.get(digest)
+        if payload is None:
+            if not self.root:
+                raise KeyError(f"No object {digest}")
+            with open(self._path('objects', digest), 'rb') as f:
+                payload = self.objects[digest] = json.loads(f.read())
+        return payload
+
+    def put_day(self, meals):
+        """Store {slot: [(food, portion), ...]} and return the day hash"""
+        return self.put('day', [[slot, self._put_meal(rows)] for slot, rows in meals.items()])
+
+    def _put_meal(self, rows):
+        key = tuple(map(tuple, rows))
+        digest = self.meal_hashes.get(key)
+        if digest is None:
+            digest = self.meal_hashes[key] = self.put('meal', [self.put('row', list(row)) for row in key])
+        return digest
+
+    def day(self, digest):
+        """Rebuild a day's {slot: [(food, portion), ...]}"""
+        return {slot: [tuple(self.get(row)) for row in self.get(meal)] for slot, meal in self.get(digest)}
+
+    # Versions
+
+    def commit(self, name, plan):
+        """Store {day: meals} as a version, point name at it and return its hash
+
+        A name may contain '/' (e.g. 'client/42'); on disk that is a directory.
+        """
+        digest = self.put('version', [[str(day), self.put_day(meals)] for day, meals in plan.items()])
+        self.refs[name] = digest
+        if self.root:
+            path = os.path.join(self.root, 'refs', *name.split('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _write_atomic(path, digest.encode('ascii'))
+        return digest
+
+    def resolve(self, ref):
+        return self.refs.get(ref, ref)
+
+    def days(self, ref):
+        """{day label: day hash} of a version (a ref name or a version hash)"""
+        return dict(self.get(self.resolve(ref)))
+
+    def checkout(self, ref):
+        """Rebuild a version's {day label: meals}"""
+        return {label: self.day(digest) for label, digest in self.days(ref).items()}
+
+    def diff_days(self, a, b):
+        """Row changes between two day hashes, per slot, opening only meals whose hashes differ"""
+        if a == b:
+            return []
+        meals_a, meals_b = dict(self.get(a)), dict(self.get(b))
+        changes = []
+        for slot in list(meals_a) + [s for s in meals_b if s not in meals_a]:
+            meal_a, meal_b = meals_a.get(slot), meals_b.get(slot)
+            if meal_a == meal_b:
+                continue
+            rows_a, rows_b = self.get(meal_a) if meal_a else [], self.get(meal_b) if meal_b else []
+            removed, added = _unmatched(rows_a, rows_b), _unmatched(rows_b, rows_a)
+            changes.append({'slot': slot, 'removed': [tuple(self.get(r)) for r in removed],
+                            'added': [tuple(self.get(r)) for r in added]})
+        return changes
+
+    def diff(self, a, b):
+        """{day label: slot changes} for every day that differs between two versions"""
+        days_a, days_b = self.days(a), self.days(b)
+        result = {}
+        for label in list(days_a) + [d for d in days_b if d not in days_a]:
+            day_a, day_b = days_a.get(label), days_b.get(label)
+            if day_a == day_b:
+                continue
+            if day_a is None or day_b is None:
+                result[label] = 'added' if day_a is None else 'removed'
+            else:
+                result[label] = self.diff_days(day_a, day_b)
+        return result
+
+    # Results
+
+    def results(self, ref, compute, key):
+        """{day label: compute(meals)} for a version, computing only days with no stored result under key
+
+        key names the computation and its inputs, e.g. the table_version of the engine.
+        """
+        out = {}
+        for label, digest in self.days(ref).items():
+            cached = self.results_cache.get((key, digest))
+            if cached is None and self.root:
+                try:
+                    with open(self._path('results', key, digest), 'rb') as f:
+                        cached = f.read()
+                except FileNotFoundError:
+                    pass
+            if cached is None:
+                cached = _canonical(compute(self.day(digest)))
+                self.stats['results_computed'] += 1
+                if self.root:
+                    path = self._path('results', key, digest)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    _write_atomic(path, cached)
+            else:
+                self.stats['results_reused'] += 1
+            self.results_cache[key, digest] = cached
+            out[label] = json.loads(cached)
+        return out
+
+
+def _disk_bytes(root):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+
+
+def demo(root, n_variants):
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    key = table_version(engine).hex()[:16]
+    store = PlanStore(root)
+
+    store.commit('bulking', bulking_meals)
+    store.commit('cutting', cutting_meals)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'data', 'meals.json')) as f:
+        meal_map = {meal['id']: meal for meal in json.load(f)}
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'data', 'weeklyPlan.json')) as f:
+        weekly = json.load(f)
+    for version, plan in weekly.items():
+        store.commit(f"weekly/{version}", {
+            day['day']: {slot: [(c['foodId'], c['quantity']) for c in meal_map.get(day[slot], {}).get('components', [])]
+                         for slot in day if slot != 'day'}
+            for day in plan['days']})
+    store.results('bulking', engine.day_with_sources, key)
+    store.results('cutting', engine.day_with_sources, key)
+
+    print("=" * 80)
+    print(f"Store at {root}")
+    for ref, (a, b) in (('bulking vs cutting', ('bulking', 'cutting')),
+                        ('weekly original vs optimized', ('weekly/original', 'weekly/optimized'))):
+        changes = store.diff(a, b)
+        rows = sum(len(c['removed']) + len(c['added']) for day in changes.values() if isinstance(day, list) for c in day)
+        print(f"{ref}: {len(changes)} days differ, {rows} rows changed")
+    print(f"  bulking vs cutting day 3: {store.diff_days(store.days('bulking')['3'], store.days('cutting')['3'])}")
+
+    # Client variants: bulking with one portion changed on one day
+    rng = random.Random(0)
+    portions = list(PORTIONS)
+    written, size = store.stats['objects_written'], _disk_bytes(root)
+    start = time.perf_counter()
+    for v in range(n_variants):
+        plan = dict(bulking_meals)
+        day = rng.choice(list(plan))
+        meals = {slot: list(rows) for slot, rows in plan[day].items()}
+        slot = rng.choice([s for s, rows in meals.items() if rows])
+        i = rng.randrange(len(meals[slot]))
+        meals[slot][i] = (meals[slot][i][0], rng.choice(portions))
+        plan[day] = meals
+        store.commit(f"client/{v}", plan)
+    committed = time.perf_counter() - start
+    full_copy = len(_canonical({str(d): m for d, m in bulking_meals.items()}))
+    print(f"{n_variants:,} variants committed in {committed:.2f}s: {store.stats['objects_written'] - written:,} new objects, "
+          f"{(_disk_bytes(root) - size) / n_variants:,.0f} bytes per variant (a full copy is {full_copy:,} bytes)")
+
+    before = dict(store.stats)
+    start = time.perf_counter()
+    for v in range(n_variants):
+        store.results(f"client/{v}", engine.day_with_sources, key)
+    computed = time.perf_counter() - start
+    print(f"Results for every variant in {computed:.2f}s: {store.stats['results_computed'] - before['results_computed']:,} "
+          f"days computed, {store.stats['results_reused'] - before['results_reused']:,} reused")
+
+    start = time.perf_counter()
+    for v in range(1, n_variants):
+        store.diff(f"client/{v - 1}", f"client/{v}")
+    print(f"Variant-to-variant diff: {(time.perf_counter() - start) / (n_variants - 1) * 1e6:.0f} us")
+    print("=" * 80)
+
+
+def main():
+    n_variants = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    if len(sys.argv) > 1:
+        demo(sys.argv[1], n_variants)
+    else:
+        with tempfile.TemporaryDirectory(prefix='plan_store_') as root:
+            demo(root, n_variants)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Portion Optimizer
+Solves for the gram amount of every ingredient in a day so that all DV and
+macro targets are met with the smallest change from the current portions.
+Every nutrient is linear in grams, so each day is a single linear program
+(solved with SciPy's HiGHS backend).
+"""
+
+import time
+
+import numpy as np
+from scipy.optimize import linprog
+
+from calculate_all_nutrients import USDA_DATA as MACRO_DATA
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix
+
+MACROS = ['calories', 'protein', 'fat', 'carbs']
+
+# Daily targets from getUserProfile() in src/utils/dataAggregator.ts: a number is a
+# point target, a (min, max) pair a range; limits are upper bounds only
+DAILY_TARGETS = {'calories': 2816, 'protein': (120, 140), 'fat': 94, 'carbs': 363, 'fiber': (30, 38)}
+DAILY_LIMITS = {'saturatedFat': 25, 'sodium': 2300}
+
+# Band around a point target, the default tolerance of checkNutrientStatus() in nutritionCalculator.ts
+TARGET_TOLERANCE = 0.1
+
+# Default per-row limits as a multiple of the current portion
+DEFAULT_LIMITS = (0.5, 2.0)
+
+# Cost of missing a target by 100% relative to changing a portion by 100%
+SHORTFALL_PENALTY = 1000.0
+
+
+def food_table():
+    """Micronutrients from the complete calculator plus macro fields from calculate_all_nutrients"""
+    return {food: {**values, **{m: MACRO_DATA[food][m] for m in MACROS if m in MACRO_DATA.get(food, {})}}
+            for food, values in USDA_DATA.items()}
+
+
+def bounds_from_targets(targets=DAILY_TARGETS, limits=DAILY_LIMITS, tolerance=TARGET_TOLERANCE):
+    """(min, max) per nutrient: ranges as given, point targets +/- tolerance, limits from 0"""
+    bounds = {}
+    for nutrient, target in targets.items():
+        if isinstance(target, tuple):
+            bounds[nutrient] = target
+        else:
+            bounds[nutrient] = (target * (1 - tolerance), target * (1 + tolerance))
+    for nutrient, limit in limits.items():
+        bounds[nutrient] = (0, limit)
+    return bounds
+
+
+# Daily macro bounds (min, max) shared by both phases
+MACRO_BOUNDS = bounds_from_targets()
+
+
+def targets_for(engine, macro_bounds):
+    """Return (nutrients, lower, upper) arrays: >= 100% DV for micros, macro_bounds for macros"""
+    nutrients, lower, upper = [], [], []
+    for nutrient in engine.nutrients:
+        if nutrient in macro_bounds:
+            lo, hi = macro_bounds[nutrient]
+        elif nutrient in engine.daily_values:
+            lo, hi = engine.daily_values[nutrient], np.inf
+        else:
+            continue
+        nutrients.append(nutrient)
+        lower.append(lo)
+        upper.append(hi)
+    return nutrients, np.array(lower, dtype=float), np.array(upper, dtype=float)
+
+
+def optimize_day(engine, meals, macro_bounds, food_limits=None):
+    """Find minimal-change gram amounts for one day's meal skeleton
+
+    food_limits maps food -> (min_g, max_g) on the day's total grams of that
+    food across all its rows; other rows may move within DEFAULT_LIMITS of
+    their current portion. Targets that cannot be met are reported in
+    'shortfalls' instead of making the problem infeasible.
+    """
+    food_limits = food_limits or {}
+    slots = [slot for slot, ingredients in meals.items() if ingredients]
+    rows = [row for slot in slots for row in meals[slot]]
+    food_idx, portion_idx = engine.encode_rows(rows)
+    current = engine.portion_grams[portion_idx]
+    nutrients, lower, upper = targets_for(engine, macro_bounds)
+
+    # Nutrient amount per gram of each row (targets x rows)
+    cols = [engine.nutrient_index[n] for n in nutrients]
+    per_gram = engine.matrix[food_idx][:, cols].T / 100.0
+
+    n_rows, n_targets = len(rows), len(nutrients)
+    scale = np.where(current > 0, current, 1.0)
+
+    # Variables: grams (n_rows), |change| (n_rows), shortfall below (n_targets), excess above (n_targets)
+    cost = np.concatenate([np.zeros(n_rows), 1.0 / scale,
+                           SHORTFALL_PENALTY / lower.clip(min=1.0),
+                           SHORTFALL_PENALTY / np.where(np.isfinite(upper), upper, 1.0)])
+
+    eye_rows, eye_targets = np.eye(n_rows), np.eye(n_targets)
+    zero_rt, zero_tr, zero_tt = np.zeros((n_rows, n_targets)), np.zeros((n_targets, n_rows)), np.zeros((n_targets, n_targets))
+    bounded = np.isfinite(upper)
+    a_ub = np.vstack([
+        np.hstack([eye_rows, -eye_rows, zero_rt, zero_rt]),                    # g - t <= g0
+        np.hstack([-eye_rows, -eye_rows, zero_rt, zero_rt]),                   # -g - t <= -g0
+        np.hstack([-per_gram, zero_tr, -eye_targets, zero_tt]),                # A g + s_lo >= lower
+        np.hstack([per_gram, zero_tr, zero_tt, -eye_targets])[bounded],        # A g - s_hi <= upper
+    ])
+    b_ub = np.concatenate([current, -current, -lower, upper[bounded]])
+
+    # A limited food's rows are free on their own; their sum is held to the limit
+    limited = [food for food in dict.fromkeys(food for food, _ in rows) if food in food_limits]
+    if limited:
+        member = np.array([[row_food == food for row_food, _ in rows] for food in limited], dtype=float)
+        pad = np.zeros((len(limited), n_rows + 2 * n_targets))
+        limits = np.array([food_limits[food] for food in limited], dtype=float)
+        a_ub = np.vstack([a_ub, np.hstack([member, pad]), np.hstack([-member, pad])])
+        b_ub = np.concatenate([b_ub, limits[:, 1], -limits[:, 0]])
+
+    bounds = [(0, None) if food in food_limits else (grams * DEFAULT_LIMITS[0], grams * DEFAULT_LIMITS[1])
+              for (food, _), grams in zip(rows, current)]
+    bounds += [(0, None)] * (n_rows + 2 * n_targets)
+
+    solution = linprog(cost, A_ub=a_ub, b_ub=b_ub, bounds=bounds, method='highs')
+    if not solution.success:
+        raise RuntimeError(f"Portion optimization failed: {solution.message}")
+
+    grams = solution.x[:n_rows]
+    shortfall = solution.x[2 * n_rows:2 * n_rows + n_targets]
+    excess = solution.x[2 * n_rows + n_targets:]
+    optimized, i = {}, 0
+    for slot in meals:
+        optimized[slot] = []
+        for food, _ in meals[slot]:
+            optimized[slot].append((food, round(float(grams[i]), 1)))
+            i += 1
+
+    return {
+        'meals': optimized,
+        'totals': dict(zip(nutrients, (per_gram @ grams).tolist())),
+        'shortfalls': {n: float(v) for n, v in zip(nutrients, shortfall) if v > 1e-6},
+        'excesses': {n: float(v) for n, v in zip(nutrients, excess) if v > 1e-6},
+        'changed_rows': int(np.sum(np.abs(grams - current) > 0.05)),
+    }
+
+
+def optimize_phase(engine, plan, macro_bounds=MACRO_BOUNDS, food_limits=None):
+    """Optimize every day of a phase plan"""
+    return {day: optimize_day(engine, plan[day], macro_bounds, food_limits) for day in sorted(plan)}
+
+
+def main():
+    engine = NutrientMatrix(food_table(), PORTIONS, DV, MEAL_NAMES)
+
+    start = time.perf_counter()
+    results = {phase: optimize_phase(engine, plan, MACRO_BOUNDS)
+               for phase, plan in (('bulking', bulking_meals), ('cutting', cutting_meals))}
+    elapsed = time.perf_counter() - start
+
+    print("=" * 80)
+    print(f"PORTION OPTIMIZATION - 14 phase-days solved in {elapsed * 1000:.0f} ms")
+    print("=" * 80)
+    for phase, plan in (('bulking', bulking_meals), ('cutting', cutting_meals)):
+        print(f"\n=== {phase.upper()} PHASE ===")
+        for day, result in results[phase].items():
+            print(f"\nDay {day}: {result['changed_rows']} portions changed, "
+                  f"{result['totals']['calories']:.0f} kcal, {result['totals']['protein']:.0f}g protein")
+            for slot, ingredients in result['meals'].items():
+                for (food, portion_key), (_, grams) in zip(plan[day][slot], ingredients):
+                    before = PORTIONS.get(portion_key, 0)
+                    if abs(grams - before) > 0.05:
+                        print(f"  {MEAL_NAMES[slot]:10s} {food:22s} {before:7.1f}g -> {grams:7.1f}g")
+            for nutrient, missing in result['shortfalls'].items():
+                print(f"  UNMET: {nutrient} short by {missing:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Portion Expression Resolver
+Turns free-text quantities ("3 cups cooked rice", "1/3 c almonds", "150g tofu",
+"2 tbsp pb", and PORTIONS-style keys like "2.5c_rice") into (food, grams)
+instead of requiring an exact PORTIONS key, where anything else silently
+counts as 0 g. Lines that cannot be resolved are reported with the reason.
+
+Volumes use grams-per-cup densities and item weights derived from PORTIONS
+itself (1c_rice = 195 g makes cooked rice 195 g per cup), so every existing
+key resolves to exactly its PORTIONS weight. Parsed lines (and the reasons for
+failures) and food names are memoized, so repeated log lines cost one dict lookup.
+
+Usage:
+    python3 portion_resolver.py ["3 cups cooked rice" ...]
+"""
+
+import re
+import sys
+import time
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS
+from food_search import FoodSearchIndex, normalize
+
+# Mass units in grams
+MASS_UNITS = {'g': 1.0, 'gr': 1.0, 'gram': 1.0, 'grams': 1.0, 'kg': 1000.0, 'oz': 28.3495, 'ounce': 28.3495,
+              'ounces': 28.3495, 'lb': 453.592, 'lbs': 453.592, 'pound': 453.592, 'pounds': 453.592}
+# Volume units in cups
+VOLUME_UNITS = {'c': 1.0, 'cup': 1.0, 'cups': 1.0, 'tbsp': 1 / 16, 'tablespoon': 1 / 16, 'tablespoons': 1 / 16,
+                'tsp': 1 / 48, 'teaspoon': 1 / 48, 'teaspoons': 1 / 48, 'ml': 1 / 236.588, 'l': 1000 / 236.588,
+                'fl oz': 1 / 8}
+# Units meaning "one item" of the food (weighed by its item weight)
+ITEM_UNITS = {'scoop', 'scoops', 'piece', 'pieces', 'whole', 'large', 'medium', 'item', 'items'}
+
+NUMBER_WORDS = {'a': 1.0, 'an': 1.0, 'one': 1.0, 'two': 2.0, 'three': 3.0, 'four': 4.0, 'half': 0.5}
+FRACTIONS = str.maketrans({'½': ' 1/2', '⅓': ' 1/3', '⅔': ' 2/3', '¼': ' 1/4', '¾': ' 3/4', '⅛': ' 1/8'})
+
+# Food words of the PORTIONS keys, and common shorthands, as USDA_DATA foods
+FOOD_ALIASES = {
+    'oats': 'rolled_oats', 'rice': 'brown_rice_cooked', 'cooked rice': 'brown_rice_cooked',
+    'brown rice': 'brown_rice_cooked', 'lentils': 'lentils_uncooked', 'chickpeas': 'chickpeas_uncooked',
+    'black beans': 'black_beans_uncooked', 'pasta': 'chickpea_pasta_cooked', 'pb': 'peanut_butter',
+    'chia': 'chia_seeds', 'whey': 'whey_protein', 'eggs': 'egg_large', 'egg': 'egg_large',
+    'tofu': 'tofu_firm', 'potatoes': 'potato', 'yeast': 'nutritional_yeast', 'oil': 'olive_oil',
+    'fried rice': 'veg_fried_rice', 'mixed veg': 'mixed_veg', 'yogurt': 'greek_yogurt_2pct',
+}
+# Below this trigram score a food name is reported as unknown rather than guessed
+MIN_FOOD_SCORE = 0.5
+# Memoized lines kept before the memo is cleared and refilled
+MEMO_SIZE = 1_000_000
+
+_UNIT_NAMES = sorted({*MASS_UNITS, *VOLUME_UNITS, *ITEM_UNITS}, key=len, reverse=True)
+_EXPRESSION = re.compile(
+    r'(?:(?P<word>' + '|'.join(NUMBER_WORDS) + r')\s+'
+    r'|(?:(?P<whole>\d+)\s+(?=\d+\s*/))?(?P<number>\d+(?:\.\d*)?|\.\d+)(?:\s*/\s*(?P<denominator>\d+))?\s*)'
+    # A unit must end at a word boundary, so "2 carrots" is not 2 cups of "arrots"
+    r'(?:(?P<unit>' + '|'.join(re.escape(u).replace(r'\ ', r'\s*') for u in _UNIT_NAMES) + r')\.?(?![a-z]))?'
+    r'\s*(?:of\s+)?(?P<food>.+)')
+
+
+class UnresolvedPortion(ValueError):
+    pass
+
+
+def parse(text):
+    """Split an expression into (quantity, unit or None, food text); raises UnresolvedPortion"""
+    line = ' '.join(text.translate(FRACTIONS).lower().replace('_', ' ').split())
+    match = _EXPRESSION.fullmatch(line)
+    if match is None:
+        raise UnresolvedPortion(f"no leading quantity in {text!r}")
+    if match['word']:
+        quantity = NUMBER_WORDS[match['word']]
+    else:
+        quantity = float(match['number'])
+        if match['denominator']:
+            if int(match['denominator']) == 0:
+                raise UnresolvedPortion(f"zero denominator in {text!r}")
+            quantity /= int(match['denominator'])
+        if match['whole']:
+            quantity += int(match['whole'])
+    unit = match['unit'] and ' '.join(match['unit'].split())
+    return quantity, unit, match['food'].strip()
+
+
+class PortionResolver:
+    """Memoized free-text quantity -> (food, grams) resolver"""
+
+    def __init__(self, foods=USDA_DATA, portions=PORTIONS, aliases=FOOD_ALIASES):
+        self.foods = set(foods)
+        self.aliases = {normalize(name): food for name, food in aliases.items() if food in self.foods}
+        self.search = FoodSearchIndex.build([(food, food) for food in self.foods] + list(self.aliases.items()))
+        self.memo = {}
+        self.food_memo = {}
+
+        # Grams per cup and per item of each food, from the PORTIONS keys (first key wins)
+        self.density, self.item_grams = {}, {}
+        for key, grams in portions.items():
+            quantity, unit, name = parse(key)
+            food = self._food(name)
+            if food is None or unit in MASS_UNITS:
+                continue
+            if unit in VOLUME_UNITS:
+                self.density.setdefault(food, grams / (quantity * VOLUME_UNITS[unit]))
+            else:
+                self.item_grams.setdefault(food, grams / quantity)
+
+    def _food(self, name):
+        """USDA_DATA food for a name, or None"""
+        food = self.food_memo.get(name, False)
+        if food is False:
+            text = normalize(name)
+            food = self.aliases.get(text) or (text.replace(' ', '_') if text.replace(' ', '_') in self.foods else None)
+            if food is None:
+                food = self.search.resolve(text, MIN_FOOD_SCORE)
+            self.food_memo[name] = food
+        return food
+
+    def _resolve(self, text):
+        quantity, unit, name = parse(text)
+        food = self._food(name)
+        if food is None:
+            raise UnresolvedPortion(f"unknown food {name!r}")
+        if unit in MASS_UNITS:
+            return food, quantity * MASS_UNITS[unit]
+        if unit in VOLUME_UNITS:
+            if food not in self.density:
+                raise UnresolvedPortion(f"no grams-per-cup density for {food}")
+            return food, quantity * VOLUME_UNITS[unit] * self.density[food]
+        if food not in self.item_grams:
+            raise UnresolvedPortion(f"no unit given and no item weight for {food}")
+        return food, quantity * self.item_grams[food]
+
+    def resolve(self, text):
+        """(food, grams) for one expression; raises UnresolvedPortion with the reason"""
+        result = self.memo.get(text)
+        if result is None:
+            try:
+                result = self._resolve(text)
+            except UnresolvedPortion as exc:
+                result = str(exc)
+            if len(self.memo) >= MEMO_SIZE:
+                self.memo.clear()
+            self.memo[text] = result
+        # Failures are memoized as their reason and raised fresh, so no traceback accumulates across hits
+        if isinstance(result, str):
+            raise UnresolvedPortion(result)
+        return result
+
+    def resolve_all(self, lines):
+        """Resolve many lines; returns ([(food, grams) or None per line], {line: reason} for the unresolved)"""
+        resolved, unresolved = [], {}
+        for line in lines:
+            try:
+                resolved.append(self.resolve(line))
+            except UnresolvedPortion as exc:
+                resolved.append(None)
+                unresolved[line] = str(exc)
+        return resolved, unresolved
+
+
+def main():
+    resolver = PortionResolver()
+    lines = sys.argv[1:] or ["3 cups cooked rice", "1/3 c almonds", "150g tofu", "2 tbsp pb", "1 1/2 cups kale",
+                             "½ cup walnuts", "a scoop of whey", "2 eggs", "3c_rice", "8 oz tofu", "1 cup yogurt",
+                             "2 cups quinoa", "some rice"]
+    resolved, unresolved = resolver.resolve_all(lines)
+    print("=" * 80)
+    for line, result in zip(lines, resolved):
+        print(f"{line:24s} -> " + (f"{result[1]:7.1f} g {result[0]}" if result else f"unresolved: {unresolved[line]}"))
+
+    results, skipped = resolver.resolve_all(PORTIONS)
+    mismatched = [key for key, result in zip(PORTIONS, results) if result and abs(result[1] - PORTIONS[key]) > 1e-9]
+    print("-" * 80)
+    print(f"PORTIONS keys: {len(PORTIONS) - len(skipped)} resolve to their exact weight, {len(mismatched)} differ, "
+          f"{len(skipped)} unresolved ({', '.join(skipped)})")
+
+    # Throughput on a large log: mostly repeated lines with a long tail of distinct ones
+    log = [lines[i % 10] if i % 20 else f"{i % 997} g {('tofu', 'almonds', 'spinach')[i % 3]}" for i in range(2_000_000)]
+    fresh = PortionResolver()
+    start = time.perf_counter()
+    _, failed = fresh.resolve_all(log)
+    elapsed = time.perf_counter() - start
+    print(f"{len(log):,} log lines resolved in {elapsed:.2f}s ({len(log) / elapsed:,.0f} lines/s), "
+          f"{len(fresh.memo):,} distinct, {len(failed)} unresolved")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
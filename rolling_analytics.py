@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Rolling-Window Intake Analytics
+Keeps every user's recent daily %DV in a ring buffer with running window
+sums, so appending a day costs O(nutrients) per user while 7/14/30-day
+rolling averages, below-target streaks and week-over-week deltas are always
+current. Queries over the buffered horizon ("days iron was under 70% in the
+last 90 days") run vectorized across all users at once.
+
+Windows are calendar days keyed by day ordinal: appending a day after a gap
+marks the skipped days as missing, so they fall out of averages and counts
+instead of stretching a window back over older entries.
+"""
+
+import time
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix, SOURCE_THRESHOLD, ordered_sum
+
+# Rolling averages kept current on every append (days)
+WINDOWS = (7, 14, 30)
+# Days of raw history kept per user for threshold queries
+DEFAULT_HORIZON = 90
+# Below this %DV a day extends a streak
+TARGET = 100.0
+
+
+def day_percent_dv(engine, meals, nutrients):
+    """%DV of each nutrient for one day, with totals summed like calc_day_with_sources"""
+    _, values = engine.meal_values(meals)
+    totals = ordered_sum(np.where(values > SOURCE_THRESHOLD, values, 0.0))
+    cols = [engine.nutrient_index[n] for n in nutrients]
+    return totals[cols] / np.array([engine.daily_values[n] for n in nutrients]) * 100
+
+
+class RollingHistory:
+    """Per-user ring buffers of daily %DV with running window sums, keyed by calendar day"""
+
+    def __init__(self, nutrients, horizon=DEFAULT_HORIZON, windows=WINDOWS, users=1024):
+        if max(windows) > horizon:
+            raise ValueError(f"Windows up to {max(windows)} days need a horizon of at least that, got {horizon}")
+        if horizon < 14:
+            raise ValueError(f"Week-over-week deltas need a horizon of at least 14 days, got {horizon}")
+        self.nutrients = list(nutrients)
+        self.nutrient_index = {n: i for i, n in enumerate(self.nutrients)}
+        self.horizon = horizon
+        self.windows = tuple(windows)
+        self.user_index = {}
+        self.users = []
+
+        n = len(self.nutrients)
+        # Nutrient-major so one nutrient's history across all users is contiguous; NaN marks a day with nothing logged
+        self.buffer = np.full((n, users, horizon), np.nan, dtype=np.float32)
+        self.count = np.zeros(users, dtype=np.int64)
+        # Day ordinals of each user's first and latest day
+        self.first_day = np.zeros(users, dtype=np.int64)
+        self.last_day = np.zeros(users, dtype=np.int64)
+        self.sums = {w: np.zeros((users, n)) for w in self.windows}
+        # Days with something logged in each window
+        self.logged = {w: np.zeros(users, dtype=np.int32) for w in self.windows}
+        self.streak = np.zeros((users, n), dtype=np.int32)
+        self.longest_streak = np.zeros((users, n), dtype=np.int32)
+
+    def _grow(self, size):
+        capacity = max(len(self.count), 1)
+        while capacity < size:
+            capacity *= 2
+        buffer = np.full((self.buffer.shape[0], capacity, self.horizon), np.nan, dtype=np.float32)
+        buffer[:, :self.buffer.shape[1]] = self.buffer
+        self.buffer = buffer
+        for name in ('count', 'first_day', 'last_day', 'streak', 'longest_streak'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        for table in (self.sums, self.logged):
+            for w, old in table.items():
+                table[w] = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+                table[w][:len(old)] = old
+
+    def rows(self, users):
+        """Row index of each user, registering new users"""
+        rows = []
+        for user in users:
+            row = self.user_index.get(user)
+            if row is None:
+                row = self.user_index[user] = len(self.users)
+                self.users.append(user)
+            rows.append(row)
+        if len(self.users) > len(self.count):
+            self._grow(len(self.users))
+        return np.array(rows, dtype=np.intp)
+
+    @staticmethod
+    def _ordinal(day):
+        return day.toordinal() if hasattr(day, 'toordinal') else int(day)
+
+    def _ordinals(self, rows, day):
+        """Day ordinal each row appends: the given date or ordinal, else the day after its latest"""
+        if day is None:
+            return np.where(self.count[rows] > 0, self.last_day[rows] + 1, 0)
+        if isinstance(day, (list, tuple, np.ndarray)):
+            return np.array([self._ordinal(d) for d in day], dtype=np.int64)
+        return np.full(len(rows), self._ordinal(day), dtype=np.int64)
+
+    def _start(self, rows, ordinals):
+        """Register first days and advance each row over any days skipped before `ordinals`"""
+        new = self.count[rows] == 0
+        self.first_day[rows[new]] = ordinals[new]
+        self.last_day[rows[new]] = ordinals[new] - 1
+        gaps = ordinals - self.last_day[rows] - 1
+        if (gaps < 0).any():
+            raise ValueError("Days must be appended in date order, one per user per day")
+        for i in np.flatnonzero(gaps):
+            self._skip(rows[i], int(gaps[i]))
+
+    def _step(self, rows, ordinals, values, logged=True):
+        """Move rows on to the day after their latest and store values there (NaN when nothing was logged)"""
+        entering = values.astype(np.float64) if logged else 0.0
+        for w, sums in self.sums.items():
+            # The day leaving a w-day window is still in the ring buffer, since w <= horizon
+            leaving = self.buffer[:, rows, (ordinals - w) % self.horizon].T
+            missing = np.isnan(leaving)
+            sums[rows] += entering - np.where(missing, 0.0, leaving)
+            self.logged[w][rows] += int(logged) - ~missing[..., 0]
+        self.buffer[:, rows, ordinals % self.horizon] = values.T
+        self.last_day[rows] = ordinals
+        self.streak[rows] = np.where(values < TARGET, self.streak[rows] + 1, 0)
+        self.longest_streak[rows] = np.maximum(self.longest_streak[rows], self.streak[rows])
+
+    def _skip(self, row, days):
+        """Advance one user over `days` days with nothing logged"""
+        if days >= self.horizon:
+            self.buffer[:, row] = np.nan
+            for w in self.windows:
+                self.sums[w][row] = 0
+                self.logged[w][row] = 0
+            self.last_day[row] += days
+            self.streak[row] = 0
+            return
+        missing = np.full(len(self.nutrients), np.nan, dtype=np.float32)
+        for _ in range(days):
+            self._step(row, self.last_day[row] + 1, missing, logged=False)
+
+    def append(self, user, percent_dv, day=None):
+        """Append one day for one user; day is a date or day ordinal, the day after their latest by default"""
+        rows = self.rows([user])
+        ordinals = self._ordinals(rows, day)
+        self._start(rows, ordinals)
+        row = rows[0]
+        self._step(row, ordinals[0], np.asarray(percent_dv, dtype=np.float32))
+        self.count[row] += 1
+
+    def append_batch(self, users, percent_dv, day=None):
+        """Append one day for each of several distinct users; percent_dv is users x nutrients, day one date or one per user"""
+        rows = self.rows(users)
+        if len(np.unique(rows)) != len(rows):
+            raise ValueError("append_batch takes at most one day per user")
+        ordinals = self._ordinals(rows, day)
+        self._start(rows, ordinals)
+        self._step(rows, ordinals, np.asarray(percent_dv, dtype=np.float32))
+        self.count[rows] += 1
+
+    # Queries (arrays over all users unless a user is given)
+
+    def _select(self, user):
+        if user is None:
+            return slice(0, len(self.users))
+        return self.user_index[user]
+
+    def rolling_average(self, window, user=None):
+        """Average daily %DV over each user's last `window` calendar days, skipping days with nothing logged"""
+        rows = self._select(user)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.sums[window][rows] / np.asarray(self.logged[window][rows])[..., None]
+
+    def _recent_sum(self, rows, days):
+        """Sum and logged-day count over each user's last `days` calendar days, read from the ring buffer"""
+        last = np.atleast_1d(self.last_day[rows])
+        index = np.atleast_1d(np.arange(len(self.count))[rows])
+        values = self.buffer[:, index[:, None], (last[:, None] - np.arange(days)) % self.horizon]
+        known = ~np.isnan(values)
+        sums = np.where(known, values, 0.0).sum(axis=2, dtype=np.float64).T
+        logged = known.sum(axis=2).T
+        return (sums, logged) if isinstance(rows, slice) else (sums[0], logged[0])
+
+    def _window_sum(self, window, rows):
+        """Running sum and count of a tracked window, or the same read from the buffer for any other"""
+        if window in self.sums:
+            return self.sums[window][rows], np.asarray(self.logged[window][rows])[..., None]
+        return self._recent_sum(rows, window)
+
+    def week_over_week(self, user=None):
+        """Change in 7-day average %DV against the 7 days before it (NaN until 14 days are covered)"""
+        rows = self._select(user)
+        (week, week_n), (fortnight, fortnight_n) = self._window_sum(7, rows), self._window_sum(14, rows)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            delta = week / week_n - (fortnight - week) / (fortnight_n - week_n)
+        covered = self.last_day[rows] - self.first_day[rows] >= 13
+        return np.where(np.asarray(covered)[..., None] & np.isfinite(delta), delta, np.nan)
+
+    def current_streak(self, nutrient, user=None):
+        """Consecutive most recent days below 100% DV; a day with nothing logged ends a streak"""
+        return self.streak[self._select(user), self.nutrient_index[nutrient]]
+
+    def days_below(self, nutrient, threshold, last=DEFAULT_HORIZON, user=None):
+        """Logged days among each user's last `last` calendar days with nutrient below threshold %DV"""
+        if last > self.horizon:
+            raise ValueError(f"Only the last {self.horizon} days are kept")
+        rows = self._select(user)
+        latest = np.atleast_1d(self.last_day[rows])
+        col = self.buffer[self.nutrient_index[nutrient], rows].reshape(len(latest), self.horizon)
+        # Ring position p holds the day (latest - p) % horizon days old; NaN days compare False
+        age = (latest[:, None] - np.arange(self.horizon)) % self.horizon
+        result = ((col < threshold) & (age < last)).sum(axis=1)
+        return result if user is None else int(result[0])
+
+    def summary(self, user):
+        """Every metric for one user, keyed by nutrient"""
+        row = self.user_index[user]
+        wow = self.week_over_week(user)
+        result = {}
+        for i, nutrient in enumerate(self.nutrients):
+            result[nutrient] = {
+                **{f"avg_{w}d": round(float(self.sums[w][row, i] / max(self.logged[w][row], 1)), 1) for w in self.windows},
+                'week_over_week': None if np.isnan(wow[i]) else round(float(wow[i]), 1),
+                'streak_below': int(self.streak[row, i]),
+                'longest_streak_below': int(self.longest_streak[row, i]),
+            }
+        return result
+
+
+def main():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    nutrients = [n for n in DV if n in engine.nutrient_index]
+    plan_days = np.array([day_percent_dv(engine, phase[d], nutrients)
+                          for phase in (bulking_meals, cutting_meals) for d in range(1, 8)])
+
+    # A year of intake for 10,000 users: plan days with per-day portion noise
+    n_users, n_days = 10_000, 365
+    rng = np.random.default_rng(0)
+    users = [f"user-{u:05d}" for u in range(n_users)]
+    history = RollingHistory(nutrients, users=n_users)
+    start = time.perf_counter()
+    for _ in range(n_days):
+        picks = plan_days[rng.integers(0, len(plan_days), n_users)]
+        history.append_batch(users, picks * rng.uniform(0.6, 1.2, (n_users, 1)))
+    elapsed = time.perf_counter() - start
+    print("=" * 80)
+    print(f"Appended {n_users * n_days:,} user-days in {elapsed:.2f}s "
+          f"({elapsed / n_days * 1e6 / n_users:.2f} us per user-day)")
+
+    start = time.perf_counter()
+    low = history.days_below('calcium', 70, last=90)
+    query = time.perf_counter() - start
+    print(f"Days calcium < 70% in the last 90, all users: {query * 1000:.1f} ms "
+          f"(mean {low.mean():.1f}, max {low.max()})")
+    start = time.perf_counter()
+    averages = history.rolling_average(30)
+    query = time.perf_counter() - start
+    print(f"30-day rolling averages, all users and nutrients: {query * 1000:.1f} ms "
+          f"(mean calcium {averages[:, history.nutrient_index['calcium']].mean():.0f}%)")
+    print("=" * 80)
+
+    start = time.perf_counter()
+    for day in plan_days:
+        history.append(users[0], day)
+    print(f"Single-user append: {(time.perf_counter() - start) / len(plan_days) * 1e6:.0f} us")
+    for nutrient, metrics in list(history.summary(users[0]).items())[:3]:
+        print(f"  {users[0]} {nutrient}: {metrics}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Shopping List Aggregation
+Sums eaten grams per (user, week, food) over any number of ingredient rows
+and turns them into purchase amounts: cooked foods back to raw weight by
+their yield, then whole packs. Rows arrive in chunks of integer arrays;
+each chunk is pre-aggregated, then hash-partitioned on its (user, week,
+food) key, so memory is bounded by the chunk size plus the distinct groups
+of one partition - or, with a spill directory, by the chunk size plus the
+largest partition file at the end. Per-user, per-week and client-base
+totals are roll-ups of the same keys.
+
+Usage:
+    python3 shopping_list.py [users] [weeks] [spill_dir]
+"""
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from compact_model import from_plans
+from nutrient_matrix import NutrientMatrix
+
+# What to buy per food: (item, grams eaten per gram bought, pack grams, pack label).
+# Cooked foods are bought dry (1 g dry rice makes about 2.5 g cooked); whole fruit loses peel and seeds.
+PURCHASES = {
+    'rolled_oats': ('rolled oats', 1.0, 1000, '1 kg bag'),
+    'brown_rice_cooked': ('brown rice, dry', 2.5, 2000, '2 kg bag'),
+    'lentils_uncooked': ('lentils, dry', 1.0, 1000, '1 kg bag'),
+    'chickpeas_uncooked': ('chickpeas, dry', 1.0, 1000, '1 kg bag'),
+    'black_beans_uncooked': ('black beans, dry', 1.0, 1000, '1 kg bag'),
+    'chickpea_pasta_cooked': ('chickpea pasta, dry', 2.2, 227, '8 oz box'),
+    'walnuts': ('walnuts', 1.0, 454, '1 lb bag'),
+    'almonds': ('almonds', 1.0, 454, '1 lb bag'),
+    'peanut_butter': ('peanut butter', 1.0, 454, '16 oz jar'),
+    'chia_seeds': ('chia seeds', 1.0, 340, '12 oz bag'),
+    'egg_large': ('large eggs', 1.0, 600, 'dozen'),
+    'greek_yogurt_2pct': ('greek yogurt 2%', 1.0, 907, '32 oz tub'),
+    'milk_2pct': ('milk 2%', 1.0, 1950, 'half gallon'),
+    'whey_protein': ('whey protein', 1.0, 907, '2 lb tub'),
+    'tofu_firm': ('firm tofu', 1.0, 397, '14 oz block'),
+    'spinach': ('spinach', 1.0, 142, '5 oz clamshell'),
+    'mushrooms': ('mushrooms', 1.0, 227, '8 oz pack'),
+    'kale': ('kale', 1.0, 283, '10 oz bag'),
+    'broccoli': ('broccoli', 1.0, 340, '12 oz bag'),
+    'okra': ('okra', 1.0, 454, '1 lb bag'),
+    'potato': ('potatoes', 1.0, 2268, '5 lb bag'),
+    'mixed_veg': ('mixed vegetables, frozen', 1.0, 454, '16 oz bag'),
+    'banana': ('bananas', 1.0, 120, 'each'),
+    'apple': ('apples', 1.0, 180, 'each'),
+    'pomegranate': ('pomegranates', 0.55, 300, 'each'),
+    'nutritional_yeast': ('nutritional yeast', 1.0, 142, '5 oz bag'),
+    'olive_oil': ('olive oil', 1.0, 460, '500 ml bottle'),
+    'chapati': ('whole wheat flour (atta)', 1.5, 2268, '5 lb bag'),
+    'veg_fried_rice': ('brown rice, dry', 2.8, 2000, '2 kg bag'),
+}
+
+# Key layout: user (32 bits) | week (12 bits) | food (20 bits, room for every FoodData Central food)
+USER_BITS, WEEK_BITS, FOOD_BITS = 32, 12, 20
+FOOD_MASK = (1 << FOOD_BITS) - 1
+WEEK_MASK = (1 << WEEK_BITS) - 1
+ROLLUPS = {
+    'user_week': ~0,
+    'user': ~(WEEK_MASK << FOOD_BITS),
+    'week': (WEEK_MASK << FOOD_BITS) | FOOD_MASK,
+    'total': FOOD_MASK,
+}
+# Partitions keys are hashed into; each is compacted on its own
+PARTITIONS = 64
+# Buffered rows (all partitions) that trigger compaction in memory, or a flush to the spill files
+BUFFER_ROWS = 1 << 21
+
+_RECORD = np.dtype([('key', '<u8'), ('grams', '<f8')])
+
+
+def pack_keys(users, weeks, foods):
+    """uint64 (user, week, food) group keys; ValueError if an id does not fit its field"""
+    fields = []
+    for name, ids, bits in (('user', users, USER_BITS), ('week', weeks, WEEK_BITS), ('food', foods, FOOD_BITS)):
+        ids = np.asarray(ids)
+        if ids.size and (ids.min() < 0 or ids.max() >> bits):
+            raise ValueError(f"{name} ids must be in [0, {1 << bits}), got {ids.min()}..{ids.max()}")
+        fields.append(ids.astype(np.uint64))
+    users, weeks, foods = fields
+    return (users << np.uint64(WEEK_BITS + FOOD_BITS)) | (weeks << np.uint64(FOOD_BITS)) | foods
+
+
+def unpack_keys(keys):
+    """(users, weeks, foods) arrays from packed keys"""
+    keys = np.asarray(keys, dtype=np.uint64)
+    return ((keys >> np.uint64(WEEK_BITS + FOOD_BITS)).astype(np.int64),
+            ((keys >> np.uint64(FOOD_BITS)) & np.uint64(WEEK_MASK)).astype(np.int64),
+            (keys & np.uint64(FOOD_MASK)).astype(np.int64))
+
+
+def group_sum(keys, grams):
+    """(sorted unique keys, summed grams)"""
+    unique, inverse = np.unique(keys, return_inverse=True)
+    return unique, np.bincount(inverse, weights=grams, minlength=len(unique))
+
+
+def rollup(keys, grams, level):
+    """Re-group (user, week, food) totals at 'user_week', 'user', 'week' or 'total' (per food) level"""
+    return group_sum(keys & np.uint64(ROLLUPS[level] & ((1 << 64) - 1)), grams)
+
+
+class GroupAggregator:
+    """Hash-partitioned sum of grams per packed key, in memory or spilled to disk"""
+
+    def __init__(self, partitions=PARTITIONS, spill_dir=None, buffer_rows=BUFFER_ROWS):
+        if partitions & (partitions - 1):
+            raise ValueError(f"partitions must be a power of two, got {partitions}")
+        self.shift = np.uint64(64 - partitions.bit_length() + 1)
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self.buffer_rows = buffer_rows
+        self.buffers = [[] for _ in range(partitions)]
+        # Rows added since the last flush, and rows held compacted in memory
+        self.buffered = self.compacted = 0
+        self.rows = 0
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+            for p in range(partitions):
+                open(self._spill_path(p), 'wb').close()
+
+    def _spill_path(self, p):
+        return os.path.join(self.spill_dir, f"part-{p:04d}.bin")
+
+    def add(self, keys, grams):
+        """Add one chunk of rows"""
+        self.rows += len(keys)
+        keys, grams = group_sum(np.asarray(keys, dtype=np.uint64), np.asarray(grams, dtype=np.float64))
+        # Multiplicative hashing: the top bits of key * 2^64/phi pick the partition
+        part = ((keys * np.uint64(0x9E3779B97F4A7C15)) >> self.shift).astype(np.intp) if self.partitions > 1 \
+            else np.zeros(len(keys), dtype=np.intp)
+        order = np.argsort(part, kind='stable')
+        bounds = np.searchsorted(part[order], np.arange(self.partitions + 1))
+        keys, grams = keys[order], grams[order]
+        for p in range(self.partitions):
+            lo, hi = bounds[p], bounds[p + 1]
+            if hi > lo:
+                self.buffers[p].append((keys[lo:hi], grams[lo:hi]))
+        self.buffered += len(keys)
+        # Waiting for as many new rows as are already compacted keeps re-compaction amortized O(n log n)
+        if self.buffered >= max(self.buffer_rows, self.compacted):
+            self._flush()
+
+    def _flush(self):
+        for p, chunks in enumerate(self.buffers):
+            if not chunks:
+                continue
+            keys, grams = group_sum(np.concatenate([k for k, _ in chunks]), np.concatenate([g for _, g in chunks]))
+            if self.spill_dir:
+                records = np.empty(len(keys), dtype=_RECORD)
+                records['key'], records['grams'] = keys, grams
+                with open(self._spill_path(p), 'ab') as f:
+                    records.tofile(f)
+                self.buffers[p] = []
+            else:
+                self.buffers[p] = [(keys, grams)]
+        self.buffered = 0
+        self.compacted = 0 if self.spill_dir else sum(len(b[0][0]) for b in self.buffers if b)
+
+    def iter_partitions(self):
+        """Yield each partition's (sorted keys, grams); keys never repeat across partitions"""
+        for p, chunks in enumerate(self.buffers):
+            parts = list(chunks)
+            if self.spill_dir:
+                records = np.fromfile(self._spill_path(p), dtype=_RECORD)
+                parts.append((records['key'], records['grams']))
+            if parts:
+                yield group_sum(np.concatenate([k for k, _ in parts]), np.concatenate([g for _, g in parts]))
+
+    def totals(self):
+        """All (keys, grams), sorted by key"""
+        parts = list(self.iter_partitions())
+        if not parts:
+            return np.zeros(0, dtype=np.uint64), np.zeros(0)
+        keys, grams = np.concatenate([k for k, _ in parts]), np.concatenate([g for _, g in parts])
+        order = np.argsort(keys)
+        return keys[order], grams[order]
+
+
+def purchase_list(food_names, food_ids, grams):
+    """Shopping lines for per-food eaten grams: raw grams by yield, then whole packs
+
+    Foods with the same purchase item (e.g. cooked rice and fried rice) share a line.
+    """
+    lines = {}
+    for food_id, eaten in zip(np.asarray(food_ids).tolist(), np.asarray(grams).tolist()):
+        food = food_names[food_id] if food_id < len(food_names) else None
+        item, yield_, pack_grams, pack = PURCHASES.get(food, (food or 'unknown food', 1.0, None, None))
+        line = lines.setdefault(item, {'item': item, 'foods': [], 'grams_eaten': 0.0, 'grams_raw': 0.0,
+                                       'pack': pack, 'pack_grams': pack_grams})
+        line['foods'].append(food)
+        line['grams_eaten'] += eaten
+        line['grams_raw'] += eaten / yield_
+    for line in lines.values():
+        line['packs'] = math.ceil(line['grams_raw'] / line['pack_grams'] - 1e-9) if line['pack_grams'] else None
+        line['grams_raw'] = round(line['grams_raw'], 1)
+        line['grams_eaten'] = round(line['grams_eaten'], 1)
+    return sorted(lines.values(), key=lambda line: -line['grams_raw'])
+
+
+def main():
+    n_users = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    n_weeks = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    spill_dir = sys.argv[3] if len(sys.argv) > 3 else None
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    store, _ = from_plans({'bulking': bulking_meals, 'cutting': cutting_meals}, engine)
+
+    # Each plan-day as (food ids, grams) rows; unknown foods/portions keep their ids and get zero grams
+    day_rows = []
+    for d in range(len(store)):
+        start, end = store.row_range(d)
+        foods = np.frombuffer(store.food, dtype=np.uint32)[start:end].astype(np.int64)
+        portions = np.minimum(np.frombuffer(store.portion, dtype=np.uint16)[start:end], engine.unknown_portion)
+        day_rows.append((foods, engine.portion_grams[portions]))
+    sizes = np.array([len(f) for f, _ in day_rows])
+    all_foods = np.concatenate([f for f, _ in day_rows])
+    all_grams = np.concatenate([g for _, g in day_rows])
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+
+    # Synthetic client base: every user eats one plan-day per day; chunks of user-weeks
+    rng = np.random.default_rng(0)
+    aggregator = GroupAggregator(spill_dir=spill_dir)
+    weeks_per_chunk = max(1, 2_000_000 // (7 * int(sizes.mean())))
+    user_weeks = n_users * n_weeks
+    start = time.perf_counter()
+    for first in range(0, user_weeks, weeks_per_chunk):
+        uw = np.arange(first, min(first + weeks_per_chunk, user_weeks))
+        days = rng.integers(0, len(day_rows), (len(uw), 7)).ravel()
+        counts = sizes[days]
+        rows = np.repeat(offsets[days] - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        owner = np.repeat(np.repeat(uw, 7), counts)
+        aggregator.add(pack_keys(owner // n_weeks, owner % n_weeks, all_foods[rows]), all_grams[rows])
+    keys, grams = aggregator.totals()
+    elapsed = time.perf_counter() - start
+    n_rows = user_weeks * 7 * sizes.mean()
+
+    print("=" * 80)
+    print(f"{n_rows:,.0f} ingredient rows ({n_users:,} users x {n_weeks} weeks) -> {len(keys):,} (user, week, food) "
+          f"totals in {elapsed:.2f}s ({n_rows / elapsed / 1e6:.1f}M rows/s){', spilled' if spill_dir else ''}")
+
+    users, weeks, foods = unpack_keys(keys)
+    mine = (users == 0) & (weeks == 0)
+    print("-" * 80)
+    print("User 0, week 0:")
+    for line in purchase_list(store.foods.names, foods[mine], grams[mine])[:8]:
+        print(f"  {line['item']:28s} {line['grams_raw']:8.0f} g raw  -> {line['packs']} x {line['pack']}")
+
+    start = time.perf_counter()
+    base_keys, base_grams = rollup(keys, grams, 'total')
+    lines = purchase_list(store.foods.names, unpack_keys(base_keys)[2], base_grams)
+    print("-" * 80)
+    print(f"Whole client base, all weeks (rolled up in {(time.perf_counter() - start) * 1000:.0f} ms):")
+    for line in lines[:8]:
+        print(f"  {line['item']:28s} {line['grams_raw'] / 1000:10,.0f} kg raw -> {line['packs']:,} x {line['pack']}")
+    print("=" * 80)
+
+
+if __name__ == '__main__':
+    main()
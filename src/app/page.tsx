@@ -294,7 +294,7 @@ const micronutrientData = {
         ]
       },
       "vitaminC": {
-        "value": 201.8,
+        "value": 201.9,
         "percentage": 224,
         "sources": [
           {
@@ -316,12 +316,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1616.2,
+        "value": 1617.2,
         "percentage": 404,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 79.1
+            "value": 80.1
           },
           {
             "meal": "Lunch",
@@ -360,12 +360,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 1206.3,
-        "percentage": 93,
+        "value": 1218.9,
+        "percentage": 94,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 235.4
+            "value": 248.0
           },
           {
             "meal": "Lunch",
@@ -390,12 +390,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 30.8,
-        "percentage": 171,
+        "value": 31.0,
+        "percentage": 172,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.7
           },
           {
             "meal": "Lunch",
@@ -421,11 +421,11 @@ const micronutrientData = {
       },
       "zinc": {
         "value": 26.6,
-        "percentage": 241,
+        "percentage": 242,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.7
+            "value": 4.8
           },
           {
             "meal": "Lunch",
@@ -450,12 +450,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 1145.8,
-        "percentage": 273,
+        "value": 1152.5,
+        "percentage": 274,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 232.4
+            "value": 239.1
           },
           {
             "meal": "Lunch",
@@ -480,16 +480,16 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 6738.4,
-        "percentage": 143,
+        "value": 6212.7,
+        "percentage": 132,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 551.6
+            "value": 559.8
           },
           {
             "meal": "Lunch",
-            "value": 2372.9
+            "value": 1839.2
           },
           {
             "meal": "Snack 1",
@@ -522,8 +522,8 @@ const micronutrientData = {
         ]
       },
       "vitaminE": {
-        "value": 30.7,
-        "percentage": 205,
+        "value": 31.6,
+        "percentage": 211,
         "sources": [
           {
             "meal": "Breakfast",
@@ -531,7 +531,7 @@ const micronutrientData = {
           },
           {
             "meal": "Lunch",
-            "value": 3.6
+            "value": 4.6
           },
           {
             "meal": "Snack 1",
@@ -810,7 +810,7 @@ const micronutrientData = {
         ]
       },
       "vitaminE": {
-        "value": 19.0,
+        "value": 19.1,
         "percentage": 127,
         "sources": [
           {
@@ -858,7 +858,7 @@ const micronutrientData = {
         ]
       },
       "vitaminC": {
-        "value": 129.2,
+        "value": 129.3,
         "percentage": 144,
         "sources": [
           {
@@ -876,12 +876,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1412.9,
+        "value": 1413.8,
         "percentage": 353,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 79.1
+            "value": 80.1
           },
           {
             "meal": "Lunch",
@@ -912,12 +912,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 1431.0,
-        "percentage": 110,
+        "value": 1443.6,
+        "percentage": 111,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 235.4
+            "value": 248.0
           },
           {
             "meal": "Lunch",
@@ -938,12 +938,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 27.7,
-        "percentage": 154,
+        "value": 27.8,
+        "percentage": 155,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.7
           },
           {
             "meal": "Lunch",
@@ -964,12 +964,12 @@ const micronutrientData = {
         ]
       },
       "zinc": {
-        "value": 23.1,
-        "percentage": 210,
+        "value": 23.2,
+        "percentage": 211,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.7
+            "value": 4.8
           },
           {
             "meal": "Lunch",
@@ -990,12 +990,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 1190.3,
-        "percentage": 283,
+        "value": 1197.0,
+        "percentage": 285,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 232.4
+            "value": 239.1
           },
           {
             "meal": "Lunch",
@@ -1016,12 +1016,12 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 5322.4,
+        "value": 5330.5,
         "percentage": 113,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 551.6
+            "value": 559.8
           },
           {
             "meal": "Lunch",
@@ -1276,8 +1276,8 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 5327.3,
-        "percentage": 113,
+        "value": 4793.5,
+        "percentage": 102,
         "sources": [
           {
             "meal": "Breakfast",
@@ -1285,7 +1285,7 @@ const micronutrientData = {
           },
           {
             "meal": "Lunch",
-            "value": 2218.9
+            "value": 1685.1
           },
           {
             "meal": "Snack 1",
@@ -1388,12 +1388,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1760.6,
+        "value": 1761.6,
         "percentage": 440,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 79.1
+            "value": 80.1
           },
           {
             "meal": "Lunch",
@@ -1428,12 +1428,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 934.5,
-        "percentage": 72,
+        "value": 947.2,
+        "percentage": 73,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 235.4
+            "value": 248.0
           },
           {
             "meal": "Lunch",
@@ -1454,12 +1454,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 36.5,
+        "value": 36.6,
         "percentage": 203,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.7
           },
           {
             "meal": "Lunch",
@@ -1480,12 +1480,12 @@ const micronutrientData = {
         ]
       },
       "zinc": {
-        "value": 28.1,
-        "percentage": 256,
+        "value": 28.2,
+        "percentage": 257,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.7
+            "value": 4.8
           },
           {
             "meal": "Lunch",
@@ -1506,12 +1506,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 1085.9,
-        "percentage": 259,
+        "value": 1092.6,
+        "percentage": 260,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 232.4
+            "value": 239.1
           },
           {
             "meal": "Lunch",
@@ -1532,16 +1532,16 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 5070.9,
-        "percentage": 108,
+        "value": 4545.2,
+        "percentage": 97,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 551.6
+            "value": 559.8
           },
           {
             "meal": "Lunch",
-            "value": 2372.9
+            "value": 1839.2
           },
           {
             "meal": "Snack 1",
@@ -1570,8 +1570,8 @@ const micronutrientData = {
         ]
       },
       "vitaminE": {
-        "value": 22.9,
-        "percentage": 153,
+        "value": 23.8,
+        "percentage": 159,
         "sources": [
           {
             "meal": "Breakfast",
@@ -1579,7 +1579,7 @@ const micronutrientData = {
           },
           {
             "meal": "Lunch",
-            "value": 3.6
+            "value": 4.6
           },
           {
             "meal": "Snack 1",
@@ -1818,7 +1818,7 @@ const micronutrientData = {
         ]
       },
       "vitaminE": {
-        "value": 24.5,
+        "value": 24.6,
         "percentage": 164,
         "sources": [
           {
@@ -1884,12 +1884,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1457.8,
-        "percentage": 364,
+        "value": 1458.8,
+        "percentage": 365,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 79.1
+            "value": 80.1
           },
           {
             "meal": "Lunch",
@@ -1920,12 +1920,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 802.0,
-        "percentage": 62,
+        "value": 814.6,
+        "percentage": 63,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 235.4
+            "value": 248.0
           },
           {
             "meal": "Lunch",
@@ -1946,12 +1946,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 23.8,
-        "percentage": 132,
+        "value": 23.9,
+        "percentage": 133,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.7
           },
           {
             "meal": "Lunch",
@@ -1972,12 +1972,12 @@ const micronutrientData = {
         ]
       },
       "zinc": {
-        "value": 20.5,
-        "percentage": 186,
+        "value": 20.6,
+        "percentage": 187,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.7
+            "value": 4.8
           },
           {
             "meal": "Lunch",
@@ -1998,12 +1998,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 976.6,
-        "percentage": 233,
+        "value": 983.3,
+        "percentage": 234,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 232.4
+            "value": 239.1
           },
           {
             "meal": "Lunch",
@@ -2024,12 +2024,12 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 5327.3,
-        "percentage": 113,
+        "value": 5335.4,
+        "percentage": 114,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 551.6
+            "value": 559.8
           },
           {
             "meal": "Lunch",
@@ -2112,12 +2112,12 @@ const micronutrientData = {
         ]
       },
       "vitaminC": {
-        "value": 202.2,
+        "value": 202.3,
         "percentage": 225,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 0.9
+            "value": 1.0
           },
           {
             "meal": "Lunch",
@@ -2134,12 +2134,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1610.2,
+        "value": 1611.2,
         "percentage": 403,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 97.3
+            "value": 98.3
           },
           {
             "meal": "Lunch",
@@ -2174,12 +2174,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 1063.6,
-        "percentage": 82,
+        "value": 1076.3,
+        "percentage": 83,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 254.0
+            "value": 266.6
           },
           {
             "meal": "Lunch",
@@ -2200,12 +2200,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 30.5,
-        "percentage": 169,
+        "value": 30.7,
+        "percentage": 170,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.6
           },
           {
             "meal": "Lunch",
@@ -2226,12 +2226,12 @@ const micronutrientData = {
         ]
       },
       "zinc": {
-        "value": 24.3,
-        "percentage": 221,
+        "value": 24.4,
+        "percentage": 222,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.8
+            "value": 4.9
           },
           {
             "meal": "Lunch",
@@ -2252,12 +2252,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 1106.6,
-        "percentage": 263,
+        "value": 1113.3,
+        "percentage": 265,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 244.4
+            "value": 251.1
           },
           {
             "meal": "Lunch",
@@ -2278,16 +2278,16 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 6487.4,
-        "percentage": 138,
+        "value": 5961.8,
+        "percentage": 127,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 598.1
+            "value": 606.3
           },
           {
             "meal": "Lunch",
-            "value": 2141.8
+            "value": 1608.0
           },
           {
             "meal": "Snack 1",
@@ -2316,8 +2316,8 @@ const micronutrientData = {
         ]
       },
       "vitaminE": {
-        "value": 14.6,
-        "percentage": 97,
+        "value": 15.6,
+        "percentage": 104,
         "sources": [
           {
             "meal": "Breakfast",
@@ -2325,7 +2325,7 @@ const micronutrientData = {
           },
           {
             "meal": "Lunch",
-            "value": 2.3
+            "value": 3.2
           },
           {
             "meal": "Snack 1",
@@ -2577,7 +2577,7 @@ const micronutrientData = {
       },
       "vitaminE": {
         "value": 26.2,
-        "percentage": 174,
+        "percentage": 175,
         "sources": [
           {
             "meal": "Breakfast",
@@ -2624,12 +2624,12 @@ const micronutrientData = {
         ]
       },
       "vitaminC": {
-        "value": 129.6,
+        "value": 129.7,
         "percentage": 144,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 0.9
+            "value": 1.0
           },
           {
             "meal": "Snack 1",
@@ -2642,12 +2642,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1422.7,
+        "value": 1423.7,
         "percentage": 356,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 97.3
+            "value": 98.3
           },
           {
             "meal": "Lunch",
@@ -2678,12 +2678,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 1515.2,
-        "percentage": 117,
+        "value": 1527.9,
+        "percentage": 118,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 254.0
+            "value": 266.6
           },
           {
             "meal": "Lunch",
@@ -2704,12 +2704,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 27.5,
-        "percentage": 153,
+        "value": 27.6,
+        "percentage": 154,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.6
           },
           {
             "meal": "Lunch",
@@ -2730,12 +2730,12 @@ const micronutrientData = {
         ]
       },
       "zinc": {
-        "value": 22.0,
-        "percentage": 200,
+        "value": 22.1,
+        "percentage": 201,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.8
+            "value": 4.9
           },
           {
             "meal": "Lunch",
@@ -2756,12 +2756,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 1173.8,
-        "percentage": 279,
+        "value": 1180.5,
+        "percentage": 281,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 244.4
+            "value": 251.1
           },
           {
             "meal": "Lunch",
@@ -2782,12 +2782,12 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 5391.4,
+        "value": 5399.6,
         "percentage": 115,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 598.1
+            "value": 606.3
           },
           {
             "meal": "Lunch",
@@ -3042,8 +3042,8 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 4808.2,
-        "percentage": 102,
+        "value": 4274.5,
+        "percentage": 91,
         "sources": [
           {
             "meal": "Breakfast",
@@ -3051,7 +3051,7 @@ const micronutrientData = {
           },
           {
             "meal": "Lunch",
-            "value": 2064.7
+            "value": 1531.0
           },
           {
             "meal": "Snack 1",
@@ -3137,7 +3137,7 @@ const micronutrientData = {
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 0.9
+            "value": 1.0
           },
           {
             "meal": "Lunch",
@@ -3154,12 +3154,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1738.7,
+        "value": 1739.7,
         "percentage": 435,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 97.3
+            "value": 98.3
           },
           {
             "meal": "Lunch",
@@ -3194,12 +3194,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 915.9,
-        "percentage": 70,
+        "value": 928.5,
+        "percentage": 71,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 254.0
+            "value": 266.6
           },
           {
             "meal": "Lunch",
@@ -3220,12 +3220,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 34.7,
+        "value": 34.8,
         "percentage": 193,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.6
           },
           {
             "meal": "Lunch",
@@ -3246,12 +3246,12 @@ const micronutrientData = {
         ]
       },
       "zinc": {
-        "value": 25.5,
-        "percentage": 232,
+        "value": 25.6,
+        "percentage": 233,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.8
+            "value": 4.9
           },
           {
             "meal": "Lunch",
@@ -3272,12 +3272,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 945.1,
-        "percentage": 225,
+        "value": 951.8,
+        "percentage": 227,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 244.4
+            "value": 251.1
           },
           {
             "meal": "Lunch",
@@ -3298,16 +3298,16 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 4795.9,
-        "percentage": 102,
+        "value": 4270.3,
+        "percentage": 91,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 598.1
+            "value": 606.3
           },
           {
             "meal": "Lunch",
-            "value": 2141.8
+            "value": 1608.0
           },
           {
             "meal": "Snack 1",
@@ -3336,8 +3336,8 @@ const micronutrientData = {
         ]
       },
       "vitaminE": {
-        "value": 10.2,
-        "percentage": 68,
+        "value": 11.2,
+        "percentage": 75,
         "sources": [
           {
             "meal": "Breakfast",
@@ -3345,7 +3345,7 @@ const micronutrientData = {
           },
           {
             "meal": "Lunch",
-            "value": 2.3
+            "value": 3.2
           },
           {
             "meal": "Snack 1",
@@ -3604,12 +3604,12 @@ const micronutrientData = {
         ]
       },
       "vitaminC": {
-        "value": 139.6,
+        "value": 139.7,
         "percentage": 155,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 0.9
+            "value": 1.0
           },
           {
             "meal": "Snack 1",
@@ -3622,12 +3622,12 @@ const micronutrientData = {
         ]
       },
       "folate": {
-        "value": 1463.2,
+        "value": 1464.2,
         "percentage": 366,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 97.3
+            "value": 98.3
           },
           {
             "meal": "Lunch",
@@ -3658,12 +3658,12 @@ const micronutrientData = {
         ]
       },
       "calcium": {
-        "value": 883.7,
-        "percentage": 68,
+        "value": 896.4,
+        "percentage": 69,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 254.0
+            "value": 266.6
           },
           {
             "meal": "Lunch",
@@ -3684,12 +3684,12 @@ const micronutrientData = {
         ]
       },
       "iron": {
-        "value": 23.9,
-        "percentage": 133,
+        "value": 24.0,
+        "percentage": 134,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 5.5
+            "value": 5.6
           },
           {
             "meal": "Lunch",
@@ -3710,12 +3710,12 @@ const micronutrientData = {
         ]
       },
       "zinc": {
-        "value": 20.4,
-        "percentage": 186,
+        "value": 20.5,
+        "percentage": 187,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 4.8
+            "value": 4.9
           },
           {
             "meal": "Lunch",
@@ -3736,12 +3736,12 @@ const micronutrientData = {
         ]
       },
       "magnesium": {
-        "value": 1027.9,
-        "percentage": 245,
+        "value": 1034.6,
+        "percentage": 246,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 244.4
+            "value": 251.1
           },
           {
             "meal": "Lunch",
@@ -3762,12 +3762,12 @@ const micronutrientData = {
         ]
       },
       "potassium": {
-        "value": 5439.4,
+        "value": 5447.5,
         "percentage": 116,
         "sources": [
           {
             "meal": "Breakfast",
-            "value": 598.1
+            "value": 606.3
           },
           {
             "meal": "Lunch",
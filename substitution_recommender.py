@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Substitution Recommender
+For a day that misses a nutrient's DV, finds the single-food additions or
+row replacements that close the gap with the smallest calorie change.
+
+The calorie change of closing a gap of g units with food f is g times f's
+calories per unit of the nutrient (plus a constant for the replaced row), so
+the index keeps every food sorted by that ratio per nutrient and each query
+is a nearest-neighbour search on it: exact, and independent of the number of
+foods apart from one binary search per candidate row.
+"""
+
+import sys
+import time
+
+import numpy as np
+
+from calculate_all_nutrients import USDA_DATA as MACRO_DATA
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix, SOURCE_THRESHOLD
+
+# Largest amount of one food a recommendation may use (grams)
+DEFAULT_MAX_GRAMS = 300.0
+# Foods examined per side in the first nearest-neighbour window; grows 4x per round
+FIRST_WINDOW = 64
+
+
+class SubstitutionIndex:
+    """Per-nutrient foods sorted by calories per unit of nutrient"""
+
+    def __init__(self, engine, calories='calories'):
+        if calories not in engine.nutrient_index:
+            raise ValueError(f"The engine has no '{calories}' column to rank substitutions by")
+        self.engine = engine
+        self.calories = calories
+        kcal = np.asarray(engine.matrix[:-1, engine.nutrient_index[calories]], dtype=np.float64)
+        self.sorted = {}
+        for nutrient in engine.daily_values:
+            col = engine.nutrient_index.get(nutrient)
+            if col is None or nutrient == calories:
+                continue
+            density = np.asarray(engine.matrix[:-1, col], dtype=np.float64)
+            rows = np.flatnonzero(density > 0)
+            ratio = kcal[rows] / density[rows]
+            order = np.argsort(ratio, kind='stable')
+            self.sorted[nutrient] = (ratio[order], rows[order], density[rows[order]])
+
+    def _nearest(self, nutrient, target, min_density, k, exclude=-1):
+        """Positions of the k feasible foods whose ratio is closest to target"""
+        ratio, rows, density = self.sorted[nutrient]
+        n = len(ratio)
+        pos = int(np.searchsorted(ratio, target))
+        lo = hi = pos
+        found = np.zeros(0, dtype=np.intp)
+        width = FIRST_WINDOW
+        while lo > 0 or hi < n:
+            new_lo, new_hi = max(0, lo - width), min(n, hi + width)
+            window = np.r_[new_lo:lo, hi:new_hi]
+            window = window[(density[window] >= min_density) & (rows[window] != exclude)]
+            found = np.concatenate([found, window])
+            lo, hi = new_lo, new_hi
+            if len(found) >= k:
+                distance = np.abs(ratio[found] - target)
+                kth = np.partition(distance, k - 1)[k - 1]
+                # Anything not yet scanned is at least this far from the target
+                edge = min(target - ratio[lo - 1] if lo > 0 else np.inf, ratio[hi] - target if hi < n else np.inf)
+                if kth <= edge:
+                    break
+            width *= 4
+        distance = np.abs(ratio[found] - target)
+        return found[np.argsort(distance, kind='stable')[:k]]
+
+    def recommend(self, meals, nutrient, k=5, max_grams=DEFAULT_MAX_GRAMS):
+        """Top-k additions or single-row replacements bringing nutrient to 100% DV, smallest |calorie change| first"""
+        engine = self.engine
+        col, kcal_col = engine.nutrient_index[nutrient], engine.nutrient_index[self.calories]
+        meal_ids, values = engine.meal_values(meals)
+        # Meals at or below SOURCE_THRESHOLD are left out of the day's total, as in calc_day_with_sources
+        meal_totals = values[:, col].tolist()
+        counted = [value if value > SOURCE_THRESHOLD else 0.0 for value in meal_totals]
+        current = sum(counted)
+        gap = engine.daily_values[nutrient] - current
+        if gap <= 0:
+            return []
+        ratio, rows, density = self.sorted[nutrient]
+
+        # (need, calories removed, slot, position, food row) per option; an addition removes nothing
+        options = [(gap, 0.0, None, None, -1)]
+        for m, slot in enumerate(meal_ids):
+            # The replacement lifts its meal to whatever the other meals leave short, counted or not before
+            short = engine.daily_values[nutrient] - (current - counted[m]) - meal_totals[m]
+            for position, (food, portion) in enumerate(meals[slot]):
+                row = engine.food_index.get(food)
+                grams = engine.portion_grams[engine.portion_index.get(portion, engine.unknown_portion)]
+                if row is None or grams == 0:
+                    continue
+                removed = grams * engine.matrix[row, col] / 100.0
+                if short + removed > 0:
+                    options.append((short + removed, grams * engine.matrix[row, kcal_col] / 100.0, slot, position, row))
+
+        candidates = []
+        for need, removed_kcal, slot, position, replaced in options:
+            # Closest ratio to removed_kcal / need gives the smallest |need * ratio - removed_kcal|
+            found = self._nearest(nutrient, removed_kcal / need, need * 100.0 / max_grams, k, replaced)
+            for p in found.tolist():
+                grams = need * 100.0 / density[p]
+                candidates.append({
+                    'action': 'add' if slot is None else 'replace',
+                    'meal': slot,
+                    'replaces': None if slot is None else list(meals[slot][position]),
+                    'food': engine.foods[rows[p]],
+                    'grams': round(float(grams), 1),
+                    'calorie_change': round(float(need * ratio[p] - removed_kcal), 1),
+                })
+        candidates.sort(key=lambda c: abs(c['calorie_change']))
+        return candidates[:k]
+
+
+def main():
+    # Micros from the complete calculator with macros merged in, as portion_optimizer.food_table() does
+    table = {food: {**values, 'calories': MACRO_DATA[food]['calories']}
+             for food, values in USDA_DATA.items() if 'calories' in MACRO_DATA.get(food, {})}
+    engine = NutrientMatrix(table, PORTIONS, DV, MEAL_NAMES)
+    index = SubstitutionIndex(engine)
+
+    print("=" * 80)
+    for phase, plan, day, nutrient in (('bulking', bulking_meals, 7, 'calcium'), ('cutting', cutting_meals, 6, 'vit_e'),
+                                       ('bulking', bulking_meals, 6, 'vit_c')):
+        start = time.perf_counter()
+        recommendations = index.recommend(plan[day], nutrient, k=3)
+        elapsed = time.perf_counter() - start
+        print(f"{phase} day {day}, {nutrient} ({elapsed * 1000:.2f} ms):")
+        for r in recommendations:
+            what = f"add to any meal" if r['action'] == 'add' else f"replace {r['replaces'][0]} ({r['meal']})"
+            print(f"  {r['grams']:6.1f} g {r['food']:22s} {what:40s} {r['calorie_change']:+7.1f} kcal")
+
+    # Scale: a synthetic table the size of the full USDA dataset
+    n_foods = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    rng = np.random.default_rng(0)
+    matrix = np.zeros((n_foods + 1, len(engine.nutrients)))
+    matrix[:n_foods] = rng.lognormal(1.0, 1.5, (n_foods, len(engine.nutrients))) * (rng.random((n_foods, len(engine.nutrients))) < 0.7)
+    foods = engine.foods + [f"food_{i:06d}" for i in range(n_foods - len(engine.foods))]
+    matrix[:len(engine.foods)] = engine.matrix[:-1]
+    big = NutrientMatrix.from_arrays(foods, engine.nutrients, matrix, PORTIONS, DV, MEAL_NAMES)
+    start = time.perf_counter()
+    big_index = SubstitutionIndex(big)
+    built = time.perf_counter() - start
+    start = time.perf_counter()
+    for day in range(1, 8):
+        big_index.recommend(bulking_meals[day], 'calcium', k=5)
+    elapsed = (time.perf_counter() - start) / 7
+    print("=" * 80)
+    print(f"{n_foods:,} foods: index built in {built:.2f}s, {elapsed * 1000:.2f} ms per query")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+import copy
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from batch_scoring import encode_plans, iter_scores, score_encoded, score_plans
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+
+def test_scores_match_day_totals(engine):
+    phases = [bulking_meals, copy.deepcopy(cutting_meals), bulking_meals]
+    result = score_plans(engine, phases)
+    for p, plan in enumerate(phases):
+        for d, day in enumerate(result['days']):
+            totals = engine.day_totals(plan[day])
+            np.testing.assert_allclose(result['totals'][p, d], [totals[n] for n in engine.nutrients])
+
+
+def test_small_chunks_match_one_chunk(engine):
+    _, day_blocks, food_idx, portion_idx = encode_plans(engine, [bulking_meals, cutting_meals] * 5)
+    whole, _ = score_encoded(engine, day_blocks, food_idx, portion_idx)
+    chunked, _ = score_encoded(engine, day_blocks, food_idx, portion_idx, memory_budget=1)
+    np.testing.assert_array_equal(whole, chunked)
+
+
+def test_unknown_slot_raises(engine):
+    plan = copy.deepcopy(bulking_meals)
+    plan[3]['brunch'] = [('rolled_oats', '1c_oats')]
+    with pytest.raises(ValueError, match=r"Unknown meal slot\(s\) \['brunch'\] on day 3"):
+        encode_plans(engine, [bulking_meals, plan])
+
+
+def test_days_must_match(engine):
+    with pytest.raises(ValueError, match="same days"):
+        encode_plans(engine, [bulking_meals, {1: bulking_meals[1]}])
+
+
+def test_shared_days_are_encoded_once(engine):
+    _, day_blocks, food_idx, _ = encode_plans(engine, [bulking_meals, cutting_meals] * 50)
+    assert day_blocks.shape == (100, 7)
+    assert len(food_idx) == 14
+
+
+def test_peak_allocation_stays_within_budget(engine):
+    budget = 1 << 20
+    rng = np.random.default_rng(0)
+    phases = [bulking_meals, cutting_meals]
+    plans = [{day: phases[int(p)][int(src)] for day, p, src in zip(range(1, 8), rng.integers(0, 2, 7),
+                                                                     rng.integers(1, 8, 7))}
+             for _ in range(20_000)]
+    tracemalloc.start()
+    try:
+        _, day_blocks, food_idx, portion_idx = encode_plans(engine, plans)
+        encoded = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        for _, chunk in iter_scores(engine, day_blocks, food_idx, portion_idx, memory_budget=budget):
+            pass
+        peak = tracemalloc.get_traced_memory()[1] - encoded
+    finally:
+        tracemalloc.stop()
+    # Encoding keeps plans x days block ids, not plans x days x slots x rows indices
+    assert day_blocks.nbytes + food_idx.nbytes + portion_idx.nbytes < 2 * day_blocks.nbytes
+    assert peak <= budget
@@ -0,0 +1,20 @@
+from benchmarks import find_regressions
+
+ENV = {'host': 'ci-1', 'python': '3.11.9', 'numpy': '2.1.0', 'machine': 'x86_64', 'cpus': 8}
+
+
+def _run(rate, preset='quick', **env):
+    return {'preset': preset, **ENV, **env, 'results': {'batch/foods=10/days=1000': {'rate': rate}}}
+
+
+def test_regression_against_recent_median():
+    history = [_run(1000.0), _run(1100.0), _run(900.0)]
+    assert find_regressions(history, {'batch/foods=10/days=1000': {'rate': 990.0}}, preset='quick', env=ENV) == []
+    assert find_regressions(history, {'batch/foods=10/days=1000': {'rate': 800.0}}, preset='quick', env=ENV) == [
+        ('batch/foods=10/days=1000', 800.0, 1000.0)]
+
+
+def test_other_presets_and_hosts_are_not_a_baseline():
+    history = [_run(5000.0, preset='full'), _run(5000.0, host='workstation'), _run(5000.0, cpus=64), _run(1000.0)]
+    assert find_regressions(history, {'batch/foods=10/days=1000': {'rate': 900.0}}, preset='quick', env=ENV) == []
+    assert find_regressions(history[:3], {'batch/foods=10/days=1000': {'rate': 1.0}}, preset='quick', env=ENV) == []
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from compact_model import DayStore, from_plans
+from nutrient_matrix import NutrientMatrix
+
+PLANS = {'bulking': bulking_meals, 'cutting': cutting_meals}
+
+
+def test_days_round_trip_and_compute_like_dicts():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    store, index = from_plans(PLANS, engine)
+    for (phase, day), i in index.items():
+        meals = PLANS[phase][day]
+        assert store.meals(i) == meals
+        assert store[i].meals() == meals
+        assert len(store[i]) == sum(len(rows) for rows in meals.values())
+        assert store.day_with_sources(i) == engine.day_with_sources(meals)
+
+
+def test_meal_totals_match_per_day_values():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    store, index = from_plans(PLANS, engine)
+    totals = store.meal_totals(chunk=7)
+    sizes = np.diff(np.array(store.meal_end), prepend=0)
+    for (phase, day), i in index.items():
+        first, last = store.meal_range(i)
+        _, values = engine.meal_values(PLANS[phase][day])
+        assert np.array_equal(totals[first:last][sizes[first:last] > 0], values)
+        assert not totals[first:last][sizes[first:last] == 0].any()
+
+
+def test_unknown_names_compute_as_zero():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    store = DayStore(engine)
+    meals = {'breakfast': [('mystery_food', '1c_oats'), ('rolled_oats', 'mystery_portion'), ('kale', '1c_kale')]}
+    i = store.add(meals)
+    assert store.meals(i) == meals
+    assert store.day_with_sources(i) == engine.day_with_sources(meals)
+
+
+def test_empty_day_has_an_empty_row_range():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    store = DayStore(engine)
+    store.add(bulking_meals[1])
+    empty = store.add({})
+    start, end = store.row_range(empty)
+    assert start == end == len(store.food)
+    assert len(store[empty]) == 0 and store.meals(empty) == {}
+    assert store.day_with_sources(empty) == engine.day_with_sources({})
+
+
+def test_full_vocabulary_raises_and_stores_nothing():
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    store = DayStore(engine)
+    store.add({f"slot{i}": [] for i in range(256 - len(store.slots))})
+    with pytest.raises(ValueError, match="Vocabulary full: 256 names"):
+        store.add({'breakfast': [('rolled_oats', '1c_oats')], 'one_too_many': [('kale', '1c_kale')]})
+    assert len(store) == 1 and len(store.food) == 0
@@ -0,0 +1,97 @@
+import random
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from contributor_index import ContributorIndex
+from nutrient_matrix import NutrientMatrix
+
+FIRST = date(2024, 1, 1)
+PLAN_DAYS = list(bulking_meals.values()) + list(cutting_meals.values())
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+
+def _log(engine, steps, seed=0, heap_size=5):
+    """An index after random adds, re-logs and removals, and the {(user, date): meals} it should hold"""
+    rng = random.Random(seed)
+    index, log = ContributorIndex(engine, heap_size=heap_size), {}
+    for _ in range(steps):
+        user, day = f"u{rng.randrange(5)}", FIRST + timedelta(days=rng.randrange(100))
+        if (user, day) in log and rng.random() < 0.3:
+            index.remove_day(user, day)
+            del log[user, day]
+            continue
+        meals = dict(rng.choice(PLAN_DAYS))
+        if rng.random() < 0.3:
+            meals.pop(rng.choice(list(meals)))
+        index.add_day(user, day, meals)
+        log[user, day] = meals
+    return index, log
+
+
+def _scan(engine, log, nutrient, start, end, user=None):
+    """(food totals, meal slot totals, every single meal's amount) from recomputing each logged day"""
+    col = engine.nutrient_index[nutrient]
+    foods, slots, meals = {}, {}, []
+    for (u, day), day_meals in log.items():
+        if not start <= day <= end or user not in (None, u):
+            continue
+        for slot, rows in day_meals.items():
+            if rows:
+                _, values = engine.meal_values({slot: rows})
+                slots[slot] = slots.get(slot, 0.0) + values[0, col]
+                meals.append(values[0, col])
+            for food, portion in rows:
+                if food in engine.food_index:
+                    _, values = engine.meal_values({slot: [(food, portion)]})
+                    foods[food] = foods.get(food, 0.0) + values[0, col]
+    return foods, slots, sorted(meals, reverse=True)
+
+
+@pytest.mark.parametrize('user', [None, 'u1'])
+def test_ranges_match_full_scan(engine, user):
+    index, log = _log(engine, 1000)
+    rng = random.Random(1)
+    for _ in range(25):
+        start = FIRST + timedelta(days=rng.randrange(-10, 110))
+        end = start + timedelta(days=rng.randrange(80))
+        for nutrient in ('iron', 'vit_k'):
+            foods, slots, meals = _scan(engine, log, nutrient, start, end, user)
+            totals = index.food_totals(nutrient, start, end, user)
+            assert set(totals) == {f for f, v in foods.items() if v}
+            assert all(np.isclose(totals[f], foods[f]) for f in totals)
+            top = index.top_meals(nutrient, start, end, user=user)
+            assert [name for name, _ in top] == [MEAL_NAMES[s] for s, v in sorted(
+                slots.items(), key=lambda item: -item[1]) if v][:len(top)]
+            single = [value for value, *_ in index.top_single_meals(nutrient, start, end, k=5, user=user)]
+            assert np.allclose(single, meals[:5])
+
+
+def test_relogging_matches_fresh_index(engine):
+    index, log = _log(engine, 3000, seed=2)
+    fresh = ContributorIndex(engine, heap_size=5)
+    for (user, day), meals in sorted(log.items(), key=lambda item: (item[0][1], item[0][0])):
+        fresh.add_day(user, day, meals)
+    start, end = FIRST, FIRST + timedelta(days=99)
+    for user in (None, 'u3'):
+        for nutrient in engine.nutrients:
+            a, b = index.food_totals(nutrient, start, end, user), fresh.food_totals(nutrient, start, end, user)
+            assert set(a) <= set(b) and all(np.isclose(a.get(f, 0.0), b[f], atol=1e-9) for f in b)
+            assert ([v for v, *_ in index.top_single_meals(nutrient, start, end, k=5, user=user)]
+                    == [v for v, *_ in fresh.top_single_meals(nutrient, start, end, k=5, user=user)])
+
+
+def test_share_and_limits(engine):
+    index = ContributorIndex(engine, heap_size=3)
+    index.add_day('a', FIRST, bulking_meals[1])
+    assert index.share('iron', 'spinach', FIRST, FIRST) == pytest.approx(
+        index.food_totals('iron', FIRST, FIRST).get('spinach', 0.0) / sum(index.food_totals('iron', FIRST, FIRST).values()))
+    assert index.share('iron', 'spinach', FIRST + timedelta(days=1), FIRST + timedelta(days=9)) == 0.0
+    with pytest.raises(ValueError):
+        index.top_single_meals('iron', FIRST, FIRST, k=4)
@@ -0,0 +1,46 @@
+import json
+
+import numpy as np
+import pytest
+
+from data_auditor import audit, category_outliers, conflict_id, conflicts, is_known, load_allowlist, write_allowlist
+
+
+def test_shipped_tables_have_no_new_conflicts():
+    report = audit()
+    known = load_allowlist()
+    found = [c for kind in ('nutrient_conflicts', 'portion_conflicts') for c in report[kind]]
+    assert found and all(is_known(c, known) for c in found)
+    # Nothing stale, and no scale slip left in the tables
+    assert set(known) == {conflict_id(c) for c in found}
+    assert not any(c['kind'].startswith('scale slip') for c in found)
+
+
+def test_scale_slips_are_never_allowlisted(tmp_path):
+    slip, value = conflicts(['a', 'b'], ['kale', 'kale2'], ['calcium'], np.array([[[100.0], [100.0]], [[10.0], [80.0]]]))
+    assert slip['kind'] == 'scale slip (10x)' and value['kind'] == 'value'
+    path = tmp_path / 'allowlist.json'
+    path.write_text(json.dumps({'known_conflicts': [{'conflict': conflict_id(slip), 'reason': 'looked fine'},
+                                                    {'conflict': 'gone/iron: a=1, b=2', 'reason': 'fixed since'}]}))
+    known = load_allowlist(str(path))
+    assert not is_known(slip, known)
+
+    # Rewriting keeps nothing stale, skips the slip and leaves the new conflict for a reason
+    assert write_allowlist({'nutrient_conflicts': [slip, value], 'portion_conflicts': []}, str(path)) == 1
+    assert json.loads(path.read_text()) == {'known_conflicts': [{'conflict': conflict_id(value), 'reason': ''}]}
+    with pytest.raises(ValueError, match="1 conflicts have no reason"):
+        load_allowlist(str(path))
+
+
+def test_changed_value_is_a_new_conflict():
+    values = np.array([[[100.0]], [[10.0]]])
+    found = conflicts(['a', 'b'], ['kale'], ['calcium'], values)
+    assert found[0]['kind'] == 'scale slip (10x)'
+    changed = conflicts(['a', 'b'], ['kale'], ['calcium'], values * [[[1.0]], [[2.0]]])
+    assert conflict_id(found[0]) != conflict_id(changed[0])
+
+
+def test_category_outliers():
+    values = np.array([[1.0, 2.0], [1.2, 2.0], [50.0, 2.0], [0.0, 0.0]])
+    rows, cols, ratios = category_outliers(values, ['a', 'a', 'a', 'b'])
+    assert rows.tolist() == [2] and cols.tolist() == [0] and ratios[0] == 50.0 / 1.2
@@ -0,0 +1,95 @@
+import copy
+import json
+import os
+
+import pytest
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from data_exporter import export
+from nutrient_matrix import NutrientMatrix
+
+
+class CountingEngine(NutrientMatrix):
+    """Engine that records which days it was asked to compute"""
+
+    def __init__(self):
+        super().__init__(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+        self.computed = 0
+
+    def day_with_sources(self, meals):
+        self.computed += 1
+        return super().day_with_sources(meals)
+
+
+@pytest.fixture
+def plans():
+    return {'bulking': copy.deepcopy(bulking_meals), 'cutting': copy.deepcopy(cutting_meals)}
+
+
+def _snapshot(output_dir):
+    """{relative path: (mtime_ns, bytes)} of every file under output_dir"""
+    files = {}
+    for directory, _, names in os.walk(output_dir):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                files[os.path.relpath(path, output_dir)] = (os.stat(path).st_mtime_ns, f.read())
+    return files
+
+
+def test_first_export_writes_every_day(plans, tmp_path):
+    engine = CountingEngine()
+    stats = export(plans, str(tmp_path), engine)
+    assert stats == {'skipped': 0, 'written': 14, 'unchanged': 0, 'removed': 0}
+    with open(tmp_path / 'bulking' / '3.json') as f:
+        assert json.load(f) == engine.day_with_sources(plans['bulking'][3])
+
+
+def test_unchanged_plan_writes_and_computes_nothing(plans, tmp_path):
+    export(plans, str(tmp_path), CountingEngine())
+    before = _snapshot(tmp_path)
+    engine = CountingEngine()
+    stats = export(plans, str(tmp_path), engine)
+    assert stats == {'skipped': 14, 'written': 0, 'unchanged': 0, 'removed': 0}
+    assert engine.computed == 0
+    assert _snapshot(tmp_path) == before
+
+
+def test_edited_day_rewrites_only_its_file(plans, tmp_path):
+    export(plans, str(tmp_path), CountingEngine())
+    before = _snapshot(tmp_path)
+    plans['cutting'][4]['dinner'].append(('kale', '1c_kale'))
+    engine = CountingEngine()
+    stats = export(plans, str(tmp_path), engine)
+    assert stats == {'skipped': 13, 'written': 1, 'unchanged': 0, 'removed': 0}
+    assert engine.computed == 1
+    after = _snapshot(tmp_path)
+    changed = {path for path in after if after[path] != before.get(path)}
+    assert changed == {os.path.join('cutting', '4.json'), 'manifest.json'}
+
+
+def test_edit_with_the_same_result_is_recomputed_but_not_rewritten(plans, tmp_path):
+    export(plans, str(tmp_path), CountingEngine())
+    before = _snapshot(tmp_path)
+    plans['bulking'][2]['snack1'].append(('no_such_food', '1c_kale'))
+    stats = export(plans, str(tmp_path), CountingEngine())
+    assert stats == {'skipped': 13, 'written': 0, 'unchanged': 1, 'removed': 0}
+    after = _snapshot(tmp_path)
+    assert after[os.path.join('bulking', '2.json')] == before[os.path.join('bulking', '2.json')]
+
+
+def test_table_edit_recomputes_every_day(plans, tmp_path):
+    export(plans, str(tmp_path), CountingEngine())
+    engine = CountingEngine()
+    engine.matrix[engine.food_index['kale'], engine.nutrient_index['vit_k']] += 100
+    stats = export(plans, str(tmp_path), engine)
+    assert stats['skipped'] == 0 and engine.computed == 14
+    assert 0 < stats['written'] < 14
+
+
+def test_removed_days_are_deleted(plans, tmp_path):
+    export(plans, str(tmp_path), CountingEngine())
+    del plans['bulking'][7]
+    stats = export(plans, str(tmp_path), CountingEngine())
+    assert stats['removed'] == 1 and stats['skipped'] == 13
+    assert not (tmp_path / 'bulking' / '7.json').exists()
@@ -0,0 +1,91 @@
+import gzip
+import json
+import math
+
+import numpy as np
+import pytest
+
+from calculate_all_nutrients_complete import PORTIONS, DV, MEAL_NAMES
+from fdc_loader import FDC_NUTRIENTS, FoodTable, IdIndex, load
+
+NUMBERS = {key: number for number, key in FDC_NUTRIENTS.items()}
+
+# Oats without a vitamin K amount, kale without folate; ids out of order on purpose
+FOODS = {
+    1_750_001: ('Oats, rolled', {'calories': 379.0, 'iron': 4.25, 'folate': 32.0}),
+    170_000: ('Kale, raw', {'calories': 35.0, 'iron': 1.6, 'vit_k': 389.6}),
+}
+
+
+def _write_json(path, opener=open):
+    with opener(path, 'wt', encoding='utf-8') as f:
+        json.dump({'FoundationFoods': [
+            {'fdcId': fdc_id, 'description': name, 'foodCategory': {'id': 11},
+             'foodNutrients': [{'nutrient': {'number': NUMBERS[key]}, 'amount': value} for key, value in values.items()]}
+            for fdc_id, (name, values) in FOODS.items()]}, f)
+
+
+def _write_csv(directory):
+    directory.mkdir()
+    ids = {key: 1000 + i for i, key in enumerate(NUMBERS)}
+    (directory / 'nutrient.csv').write_text('id,name,nutrient_nbr\n' + ''.join(
+        f"{ids[key]},{key},{number}\n" for key, number in NUMBERS.items()))
+    (directory / 'food.csv').write_text('fdc_id,description,food_category_id\n' + ''.join(
+        f'{fdc_id},"{name}",11\n' for fdc_id, (name, _) in FOODS.items()))
+    (directory / 'food_nutrient.csv').write_text('id,fdc_id,nutrient_id,amount\n' + ''.join(
+        f"{n},{fdc_id},{ids[key]},{value}\n"
+        for n, (fdc_id, key, value) in enumerate((f, k, v) for f, (_, values) in FOODS.items() for k, v in values.items())))
+    return directory
+
+
+@pytest.fixture(params=['json', 'json.gz', 'csv'])
+def table(request, tmp_path):
+    if request.param == 'csv':
+        source = _write_csv(tmp_path / 'export')
+    else:
+        source = tmp_path / f"foods.{request.param}"
+        _write_json(source, gzip.open if request.param.endswith('.gz') else open)
+    path = str(tmp_path / 'table.foods')
+    assert load(str(source), path) == len(FOODS)
+    return FoodTable(path)
+
+
+def test_foods_keep_only_measured_nutrients(table):
+    for fdc_id, (name, values) in FOODS.items():
+        assert table.food(fdc_id) == pytest.approx(values)
+        assert table.name(table.row(fdc_id)) == name
+    with pytest.raises(KeyError):
+        table.food(12345)
+
+
+def test_missing_amounts_are_masked_not_zero(table):
+    measured = table.measured()
+    oats, kale = table.row(1_750_001), table.row(170_000)
+    vit_k, folate = table.nutrients.index('vit_k'), table.nutrients.index('folate')
+    assert math.isnan(measured[oats, vit_k]) and math.isnan(measured[kale, folate])
+    assert measured[kale, vit_k] == pytest.approx(389.6)
+    assert not table.present[-1].any()
+    # The engine still sums missing amounts as zero, like calc()
+    assert table.values[oats, vit_k] == 0.0
+
+
+def test_id_index_is_a_mapping_without_a_dict(table):
+    index = table.index
+    assert isinstance(index, IdIndex)
+    assert len(index) == 2 and sorted(index) == sorted(FOODS)
+    assert index[170_000] == table.row(170_000)
+    assert np.int64(1_750_001) in index
+    assert 12345 not in index and '170000' not in index and None not in index and True not in index
+    with pytest.raises(KeyError):
+        index[12345]
+
+
+def test_engine_uses_the_stored_index(table):
+    engine = table.engine(PORTIONS, DV, MEAL_NAMES)
+    assert engine.food_index is table.index
+    assert len(engine.foods) == len(FOODS) and engine.unknown_food == len(FOODS)
+    day = {'breakfast': [(1_750_001, '1c_oats')], 'lunch': [(170_000, '1c_kale'), (999, '1c_kale')]}
+    totals = engine.day_totals(day)
+    expected = 4.25 * PORTIONS['1c_oats'] / 100 + 1.6 * PORTIONS['1c_kale'] / 100
+    assert totals['iron'] == pytest.approx(expected, rel=1e-6)
+    assert totals['vit_k'] == pytest.approx(389.6 * PORTIONS['1c_kale'] / 100, rel=1e-6)
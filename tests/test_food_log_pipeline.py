@@ -0,0 +1,104 @@
+import gzip
+import io
+import json
+import sys
+
+import pytest
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES
+from food_log_pipeline import run
+from nutrient_matrix import NutrientMatrix
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+
+def event(user, timestamp, food, portion, meal=None):
+    line = {'user': user, 'timestamp': timestamp, 'food': food, 'portion': portion}
+    if meal:
+        line['meal'] = meal
+    return json.dumps(line)
+
+
+def run_lines(monkeypatch, lines, engine):
+    """Feed lines through run() on stdin and return (stats, output records)"""
+    out = io.StringIO()
+    monkeypatch.setattr(sys, 'stdin', io.StringIO(''.join(line + '\n' for line in lines)))
+    monkeypatch.setattr(sys, 'stdout', out)
+    stats = run('-', '-', engine)
+    return stats, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_meal_falls_back_to_hour_of_day(monkeypatch, engine):
+    lines = [
+        event('u1', '2024-05-01T08:15:00', 'rolled_oats', '1c_oats'),
+        event('u1', '2024-05-01T12:30:00', 'lentils_uncooked', '1c_lentils', meal='brunch'),
+        event('u1', '2024-05-01T16:00:00', 'almonds', '1/4c_almonds'),
+        event('u1', '2024-05-01T19:45:00', 'kale', '1c_kale', meal='dinner'),
+        event('u1', '2024-05-01T23:10:00', 'milk_2pct', '1c_milk'),
+    ]
+    stats, results = run_lines(monkeypatch, lines, engine)
+    expected = {slot: [] for slot in MEAL_NAMES}
+    expected.update(breakfast=[('rolled_oats', '1c_oats')], lunch=[('lentils_uncooked', '1c_lentils')],
+                    snack1=[('almonds', '1/4c_almonds')], dinner=[('kale', '1c_kale')], snack2=[('milk_2pct', '1c_milk')])
+    assert stats['events'] == 5 and stats['user_days'] == 1
+    assert stats['unknown_foods'] == stats['unknown_portions'] == 0
+    assert results == [{'user': 'u1', 'date': '2024-05-01', 'micronutrients': engine.day_with_sources(expected)}]
+
+
+def test_bad_lines_are_counted_and_skipped(monkeypatch, engine):
+    lines = [
+        '{not json',
+        json.dumps({'user': 'u1', 'food': 'kale', 'portion': '1c_kale'}),
+        event('u1', 'yesterday', 'kale', '1c_kale'),
+        '[1, 2]',
+        '',
+        event('u1', '2024-05-01T08:00:00', 'kale', '1c_kale', meal='breakfast'),
+    ]
+    stats, results = run_lines(monkeypatch, lines, engine)
+    assert stats['bad_lines'] == 4
+    assert stats['events'] == 1
+    assert results[0]['micronutrients'] == engine.day_with_sources({'breakfast': [('kale', '1c_kale')]})
+
+
+def test_late_events_are_dropped(monkeypatch, engine):
+    lines = [
+        event('u1', '2024-05-01T08:00:00', 'kale', '1c_kale'),
+        event('u2', '2024-05-01T08:00:00', 'almonds', '1/4c_almonds'),
+        event('u1', '2024-05-02T08:00:00', 'rolled_oats', '1c_oats'),
+        # u1 has moved on to 05-02, so this 05-01 event arrives too late; u2 has not
+        event('u1', '2024-05-01T20:00:00', 'milk_2pct', '1c_milk'),
+        event('u2', '2024-05-01T20:00:00', 'milk_2pct', '1c_milk'),
+    ]
+    stats, results = run_lines(monkeypatch, lines, engine)
+    assert stats['late_events'] == 1
+    assert [(r['user'], r['date']) for r in results] == [('u1', '2024-05-01'), ('u1', '2024-05-02'), ('u2', '2024-05-01')]
+    assert results[0]['micronutrients'] == engine.day_with_sources({'breakfast': [('kale', '1c_kale')]})
+    assert results[2]['micronutrients'] == engine.day_with_sources(
+        {'breakfast': [('almonds', '1/4c_almonds')], 'dinner': [('milk_2pct', '1c_milk')]})
+
+
+def test_gzip_input_and_output_match_plain(monkeypatch, engine, tmp_path):
+    lines = [event(f"u{i % 3}", f"2024-05-0{1 + i // 6}T{8 + i % 12:02d}:00:00", food, portion)
+             for i, (food, portion) in enumerate([('rolled_oats', '1c_oats'), ('kale', '1c_kale'),
+                                                   ('almonds', '1/4c_almonds'), ('milk_2pct', '1c_milk')] * 3)]
+    source = tmp_path / 'events.jsonl.gz'
+    with gzip.open(source, 'wt', encoding='utf-8') as f:
+        f.write(''.join(line + '\n' for line in lines))
+    destination = tmp_path / 'days.jsonl.gz'
+    stats = run(str(source), str(destination), engine)
+    with gzip.open(destination, 'rt', encoding='utf-8') as f:
+        compressed = [json.loads(line) for line in f]
+    plain_stats, plain = run_lines(monkeypatch, lines, engine)
+    assert compressed == plain and stats == plain_stats
+    assert stats['events'] == len(lines) and stats['bad_lines'] == 0
+
+
+def test_unknown_foods_and_portions_are_counted(monkeypatch, engine):
+    lines = [event('u1', '2024-05-01T08:00:00', 'dragonfruit', '1c_kale'),
+             event('u1', '2024-05-01T09:00:00', 'kale', '1_bowl')]
+    stats, results = run_lines(monkeypatch, lines, engine)
+    assert stats['unknown_foods'] == 1 and stats['unknown_portions'] == 1
+    assert len(results) == 1
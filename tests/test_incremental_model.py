@@ -0,0 +1,87 @@
+import copy
+
+import numpy as np
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from incremental_model import IncrementalPlan
+from nutrient_matrix import NutrientMatrix
+
+
+def _plan():
+    phases = {'bulking': copy.deepcopy(bulking_meals), 'cutting': copy.deepcopy(cutting_meals)}
+    return phases, IncrementalPlan(NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES), phases)
+
+
+def _assert_matches_full_recompute(plan, phases, usda_data=USDA_DATA, portions=PORTIONS):
+    engine = NutrientMatrix(usda_data, portions, DV, MEAL_NAMES)
+    for phase, days in phases.items():
+        for day, meals in days.items():
+            assert plan.day_result(phase, day) == engine.day_with_sources(meals)
+        totals = sum(np.array(list(engine.day_totals(meals).values())) for meals in days.values())
+        assert np.allclose(list(plan.phase_totals(phase).values()), totals)
+
+
+def test_build_matches_full_recompute():
+    phases, plan = _plan()
+    _assert_matches_full_recompute(plan, phases)
+
+
+def test_row_edits_match_full_recompute():
+    phases, plan = _plan()
+    changes = plan.set_row('bulking', 1, 'breakfast', 3, ('walnuts', '1/2c_walnuts'))
+    phases['bulking'][1]['breakfast'][3] = ('walnuts', '1/2c_walnuts')
+    assert changes['days'] == [('bulking', 1)]
+    plan.add_row('cutting', 2, 'snack2', ('kale', '1c_kale'))
+    phases['cutting'][2]['snack2'].append(('kale', '1c_kale'))
+    plan.remove_row('cutting', 3, 'lunch', 0)
+    phases['cutting'][3]['lunch'].pop(0)
+    _assert_matches_full_recompute(plan, phases)
+
+
+def test_value_and_portion_edits_match_full_recompute():
+    phases, plan = _plan()
+    plan.set_food_value('spinach', 'iron', 3.5)
+    plan.set_portion('1tbsp_chia', 12)
+    usda_data = {food: dict(values) for food, values in USDA_DATA.items()}
+    usda_data['spinach']['iron'] = 3.5
+    _assert_matches_full_recompute(plan, phases, usda_data, {**PORTIONS, '1tbsp_chia': 12})
+
+
+def test_edit_recomputes_only_dependent_meals():
+    phases, plan = _plan()
+    changes = plan.set_portion('1c_pomegranate', 200)
+    using = {(phase, day) for phase, days in phases.items() for day, meals in days.items()
+             if any(portion == '1c_pomegranate' for rows in meals.values() for _, portion in rows)}
+    assert set(changes['days']) == using
+
+
+def test_many_edits_match_a_fresh_model_exactly():
+    phases, plan = _plan()
+    rng = np.random.default_rng(0)
+    foods, portions = list(USDA_DATA), list(PORTIONS)
+    for _ in range(300):
+        phase = ('bulking', 'cutting')[rng.integers(2)]
+        day, slot = int(rng.integers(1, 8)), list(MEAL_NAMES)[rng.integers(len(MEAL_NAMES))]
+        rows = phases[phase][day][slot]
+        row = (foods[rng.integers(len(foods))], portions[rng.integers(len(portions))])
+        kind = rng.integers(5)
+        if kind == 0 and rows:
+            position = int(rng.integers(len(rows)))
+            plan.set_row(phase, day, slot, position, row)
+            rows[position] = row
+        elif kind == 1:
+            plan.add_row(phase, day, slot, row)
+            rows.append(row)
+        elif kind == 2 and rows:
+            position = int(rng.integers(len(rows)))
+            plan.remove_row(phase, day, slot, position)
+            rows.pop(position)
+        elif kind == 3:
+            plan.set_portion(row[1], float(rng.uniform(5, 300)))
+        else:
+            plan.set_food_value(row[0], plan.engine.nutrients[rng.integers(len(plan.engine.nutrients))],
+                                float(rng.lognormal(0, 2)))
+    fresh = IncrementalPlan(plan.engine, phases)
+    np.testing.assert_array_equal(plan.day_values, fresh.day_values)
+    np.testing.assert_array_equal(plan.phase_values, fresh.phase_values)
+    assert plan.week_summary() == fresh.week_summary()
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import instrumentation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = '''
+import json
+import instrumentation
+with instrumentation.stage('outer'):
+    with instrumentation.stage('inner'):
+        instrumentation.count('rows', 3)
+    instrumentation.count('rows')
+print(json.dumps([instrumentation.is_enabled(), instrumentation.stage('x') is instrumentation.stage('y'),
+                  instrumentation.report()]))
+'''
+
+
+def _run(args, profile=None):
+    env = {k: v for k, v in os.environ.items() if k != 'NUTRITION_PROFILE'}
+    if profile:
+        env['NUTRITION_PROFILE'] = str(profile)
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+@pytest.fixture
+def enabled():
+    instrumentation.reset()
+    instrumentation.enable()
+    yield
+    instrumentation.disable()
+    instrumentation.reset()
+
+
+def test_unset_profile_records_nothing():
+    enabled, shared, report = json.loads(_run(['-c', SCRIPT]).stdout)
+    assert not enabled and shared
+    assert report == {'stages': {}, 'counters': {}, 'folded': []}
+
+
+def test_set_profile_records_stages_and_counters(tmp_path):
+    profile = tmp_path / 'profile.json'
+    enabled, shared, _ = json.loads(_run(['-c', SCRIPT], profile).stdout)
+    assert enabled and not shared
+    with open(profile) as f:
+        report = json.load(f)
+    assert report['counters'] == {'rows': 4}
+    assert set(report['stages']) == {'outer', 'outer;inner'}
+    assert report['stages']['outer']['calls'] == report['stages']['outer;inner']['calls'] == 1
+    assert [line.split(' ')[0] for line in report['folded']] == ['outer', 'outer;inner']
+
+
+def test_calculator_counts_bytes_written(tmp_path):
+    profile = tmp_path / 'profile.json'
+    output = _run(['calculate_all_nutrients_complete.py'], profile).stdout
+    with open(profile) as f:
+        report = json.load(f)
+    start = output.index('const micronutrientData')
+    end = output.index(';\n', start) + 2
+    assert report['counters']['bytes_written'] == len(output[start:end].encode('utf-8'))
+    assert {'compute', 'json'} <= set(report['stages'])
+
+
+def test_self_time_excludes_child_stages(enabled):
+    with instrumentation.stage('outer'):
+        for _ in range(3):
+            with instrumentation.stage('inner'):
+                sum(range(10_000))
+    stages = instrumentation.report()['stages']
+    assert stages['outer;inner']['calls'] == 3
+    outer = stages['outer']
+    assert 0 <= outer['self_seconds'] <= outer['seconds'] - stages['outer;inner']['seconds'] + 1e-6
+
+
+def test_disabled_calls_are_no_ops(monkeypatch):
+    monkeypatch.setattr(instrumentation, '_enabled', False)
+    instrumentation.reset()
+    with instrumentation.stage('ignored'):
+        instrumentation.count('ignored', 5)
+    assert instrumentation.report() == {'stages': {}, 'counters': {}, 'folded': []}
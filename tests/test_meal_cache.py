@@ -0,0 +1,92 @@
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from incremental_model import IncrementalPlan
+import meal_cache
+from meal_cache import MealCache
+from nutrient_matrix import NutrientMatrix
+
+
+def _engine():
+    return NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+
+def test_cached_days_match_engine():
+    engine = _engine()
+    cache = MealCache(engine)
+    days = [bulking_meals[d] for d in range(1, 8)] + [cutting_meals[d] for d in range(1, 8)]
+    for _ in range(2):
+        assert [cache.day_with_sources(meals) for meals in days] == [engine.day_with_sources(m) for m in days]
+    assert cache.stats()['day_hits'] == len(days)
+
+
+def test_slot_order_is_part_of_the_day_key():
+    engine = _engine()
+    cache = MealCache(engine)
+    meals = bulking_meals[1]
+    reordered = dict(reversed(list(meals.items())))
+    assert cache.day_with_sources(reordered) == engine.day_with_sources(reordered)
+    assert cache.day_with_sources(meals) == engine.day_with_sources(meals)
+    assert cache.stats()['day_hits'] == 0
+
+
+def test_in_place_edits_invalidate_without_refresh():
+    engine = _engine()
+    cache = MealCache(engine)
+    meals = bulking_meals[1]
+    before = cache.day_with_sources(meals)
+    food, portion = meals['breakfast'][0]
+    engine.matrix[engine.food_index[food], engine.nutrient_index['calcium']] *= 3
+    engine.data_version += 1
+    after = cache.day_with_sources(meals)
+    assert after == engine.day_with_sources(meals)
+    assert after['calcium']['value'] != before['calcium']['value']
+
+
+def test_incremental_plan_edits_reach_the_cache():
+    engine = _engine()
+    cache = MealCache(engine)
+    plan = IncrementalPlan(engine, {'bulking': bulking_meals})
+    meals = bulking_meals[1]
+    cache.day_with_sources(meals)
+    food, portion = meals['breakfast'][0]
+    plan.set_portion(portion, PORTIONS[portion] * 2)
+    assert cache.day_with_sources(meals) == engine.day_with_sources(meals)
+    plan.set_food_value(food, 'iron', 99.0)
+    assert cache.day_with_sources(meals) == engine.day_with_sources(meals)
+
+
+def test_version_bumps_do_not_hash_the_table(monkeypatch):
+    engine = _engine()
+    cache = MealCache(engine)
+    meals = bulking_meals[1]
+    cache.day_with_sources(meals)
+
+    def fail(engine):
+        raise AssertionError("table hashed outside save/load")
+    monkeypatch.setattr(meal_cache, 'table_version', fail)
+    engine.portion_grams[engine.portion_index[meals['lunch'][0][1]]] *= 2
+    engine.data_version += 1
+    assert cache.day_with_sources(meals) == engine.day_with_sources(meals)
+    assert cache.version == (id(engine), engine.data_version)
+
+
+def test_day_and_meal_evictions_are_counted_separately():
+    engine = _engine()
+    cache = MealCache(engine, capacity=4)
+    days = [bulking_meals[d] for d in range(1, 8)]
+    for meals in days:
+        cache.day_with_sources(meals)
+    stats = cache.stats()
+    assert stats['day_evictions'] == len(days) - 4 and stats['days'] == 4
+    assert stats['evictions'] == stats['misses'] - 4 and stats['size'] == 4
+
+
+def test_saved_cache_loads_only_for_the_same_table(tmp_path):
+    path = str(tmp_path / 'meals.cache')
+    engine = _engine()
+    cache = MealCache(engine, path=path)
+    cache.meal_values(bulking_meals[1])
+    cache.save()
+    assert len(MealCache(_engine(), path=path).entries) == len(cache.entries)
+    edited = _engine()
+    edited.matrix[0, 0] += 1
+    assert not MealCache(edited, path=path).entries
@@ -0,0 +1,63 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from monte_carlo import DEFAULT_NUTRIENT_CV, DEFAULT_PORTION_CV, NUTRIENT_CV, PORTION_CV, _lognormal, _sigma, simulate
+from nutrient_matrix import NutrientMatrix
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+
+def _direct(engine, days, draws, seed, chunk):
+    """simulate() one draw, day and ingredient row at a time, replaying the same random stream"""
+    nutrients = [n for n in engine.nutrients if n in engine.daily_values]
+    cols = [engine.nutrient_index[n] for n in nutrients]
+    rows = [(d, food, portion) for d, meals in enumerate(days) for ingredients in meals.values()
+            for food, portion in ingredients]
+    foods = sorted({engine.food_index.get(food, engine.unknown_food) for _, food, _ in rows})
+    grams = np.array([engine.portion_grams[engine.portion_index.get(p, engine.unknown_portion)] for _, _, p in rows],
+                     dtype=np.float32)
+    portion_sigma = _sigma([PORTION_CV.get(p, DEFAULT_PORTION_CV) for _, _, p in rows])
+    base = (engine.matrix[foods][:, cols] / 100.0).astype(np.float32)
+    nutrient_sigma = _sigma([NUTRIENT_CV.get(n, DEFAULT_NUTRIENT_CV) for n in nutrients])
+    dv = np.array([engine.daily_values[n] for n in nutrients])
+
+    rng = np.random.default_rng(seed)
+    expected = np.zeros((draws, len(days), len(nutrients)))
+    for start in range(0, draws, chunk):
+        n = min(chunk, draws - start)
+        weights = _lognormal(rng, (n, len(rows)), portion_sigma, grams)
+        composition = _lognormal(rng, (n, len(foods), len(nutrients)), nutrient_sigma, base)
+        for draw in range(n):
+            for r, (day, food, _) in enumerate(rows):
+                food_row = foods.index(engine.food_index.get(food, engine.unknown_food))
+                expected[start + draw, day] += weights[draw, r] * composition[draw, food_row].astype(np.float64)
+    return expected * 100 / dv
+
+
+def test_matches_direct_loop(engine):
+    # An unknown food and portion ride along as zero rows
+    days = [bulking_meals[1], cutting_meals[3], {'breakfast': [('kale', '1c_kale'), ('dragonfruit', '1_bowl')]}]
+    nutrients, samples = simulate(engine, days, draws=37, seed=7, chunk=16)
+    assert samples.shape == (37, len(days), len(nutrients))
+    np.testing.assert_allclose(samples, _direct(engine, days, 37, 7, 16), rtol=1e-5, atol=1e-5)
+    # Same seed, same draws
+    np.testing.assert_array_equal(simulate(engine, days, draws=37, seed=7, chunk=16)[1], samples)
+
+
+def test_memory_grows_linearly_with_days(engine):
+    days = [plan[d] for plan in (bulking_meals, cutting_meals) for d in range(1, 8)] * 26
+    tracemalloc.start()
+    try:
+        _, samples = simulate(engine, days, draws=4)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert samples.shape[1] == 364
+    # A rows x (days * foods) one-hot fold alone would be over a gigabyte here
+    assert peak < 16 * 2**20
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from calculate_all_nutrients_complete import (USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals,
+                                              calc_day_with_sources)
+from nutrient_matrix import NutrientMatrix, ordered_sum, segment_sums
+
+PLAN_DAYS = [(phase, day) for phase in ('bulking', 'cutting') for day in range(1, 8)]
+PLANS = {'bulking': bulking_meals, 'cutting': cutting_meals}
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+
+
+@pytest.mark.parametrize('phase,day', PLAN_DAYS)
+def test_day_with_sources_matches_reference(engine, phase, day):
+    meals = PLANS[phase][day]
+    assert engine.day_with_sources(meals) == calc_day_with_sources(meals, day)
+
+
+def test_unknown_food_and_portion_count_as_zero(engine):
+    meals = {'breakfast': [('rolled_oats', '1c_oats'), ('no_such_food', '1c_oats'), ('walnuts', 'no_such_portion')]}
+    assert engine.day_with_sources(meals) == calc_day_with_sources(meals, 1)
+    _, values = engine.meal_values({'lunch': [('no_such_food', '1c_oats')]})
+    assert not values.any()
+
+
+def test_empty_meals_are_skipped(engine):
+    meal_ids, values = engine.meal_values({'breakfast': [], 'lunch': [('kale', '1c_kale')], 'snack3': []})
+    assert meal_ids == ['lunch']
+    assert values.shape == (1, len(engine.nutrients))
+
+
+def test_from_arrays_matches_constructor(engine):
+    rebuilt = NutrientMatrix.from_arrays(engine.foods, engine.nutrients, engine.matrix.copy(), PORTIONS, DV, MEAL_NAMES)
+    for phase, day in PLAN_DAYS:
+        assert rebuilt.day_with_sources(PLANS[phase][day]) == engine.day_with_sources(PLANS[phase][day])
+
+
+def test_ordered_sum_adds_in_order():
+    # Pairwise summation gives (1e16 + 1e16) + (1 + 1) here; in order the ones are lost
+    stack = np.array([[1e16], [1.0], [1.0], [1e16]])
+    assert ordered_sum(stack)[0] == ((1e16 + 1.0) + 1.0) + 1e16
+
+
+def test_segment_sums_matches_loop():
+    rng = np.random.default_rng(0)
+    sizes = [3, 0, 1, 5, 2]
+    values = rng.random((sum(sizes), 4))
+    expected, start = [], 0
+    for size in sizes:
+        total = np.zeros(4)
+        for row in values[start:start + size]:
+            total += row
+        expected.append(total)
+        start += size
+    assert np.array_equal(segment_sums(values, sizes), np.array(expected))
@@ -0,0 +1,39 @@
+import os
+
+import pytest
+
+import nutrition_cli
+from calculate_all_nutrients_complete import bulking_meals, calc_day_with_sources, cutting_meals
+
+
+def test_results_match_the_calculator(tmp_path):
+    snapshot = nutrition_cli.load_snapshot(str(tmp_path / 'nutrition.snapshot'))
+    results = nutrition_cli.compute_results(snapshot)
+    for phase, plan in (('bulking', bulking_meals), ('cutting', cutting_meals)):
+        for day, meals in plan.items():
+            assert results[phase][day] == calc_day_with_sources(meals, day)
+
+
+def test_snapshot_is_reused(tmp_path):
+    path = str(tmp_path / 'nutrition.snapshot')
+    nutrition_cli.load_snapshot(path)
+    stamp = os.stat(path).st_mtime_ns
+    assert nutrition_cli.load_snapshot(path)['foods']
+    assert os.stat(path).st_mtime_ns == stamp
+
+
+def test_unwritable_snapshot_falls_back(tmp_path, capsys):
+    path = str(tmp_path / 'missing_dir' / 'nutrition.snapshot')
+    snapshot = nutrition_cli.load_snapshot(path)
+    assert nutrition_cli.compute_results(snapshot, ('bulking',), {1})['bulking'][1]
+    assert 'snapshot not saved' in capsys.readouterr().err
+    assert not os.path.exists(path)
+    with pytest.raises(OSError):
+        nutrition_cli.build_snapshot(path)
+
+
+def test_diff_results():
+    old = {'bulking': {'1': {'iron': {'value': 10.0}, 'zinc': {'value': 5.0}}}}
+    new = {'bulking': {'1': {'iron': {'value': 12.5}, 'zinc': {'value': 5.0}}}, 'cutting': {'1': {'iron': {'value': 1}}}}
+    assert list(nutrition_cli.diff_results(old, new)) == [('bulking', '1', 'iron', 10.0, 12.5),
+                                                          ('cutting', '1', 'iron', None, 1)]
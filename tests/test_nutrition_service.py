@@ -0,0 +1,67 @@
+import asyncio
+import json
+import threading
+
+from nutrition_service import NutritionService
+
+DAY = json.dumps({'meals': {'breakfast': [['rolled_oats', '1c_oats']]}}).encode('utf-8')
+
+
+def test_identical_requests_share_one_computation():
+    async def run():
+        service = NutritionService()
+        results = await asyncio.gather(*(service.respond('POST', '/day', DAY) for _ in range(5)))
+        return service, results
+
+    service, results = asyncio.run(run())
+    assert {status for status, _ in results} == {200}
+    assert len({body for _, body in results}) == 1
+    assert service.stats['computed'] == 1 and service.stats['coalesced'] == 4
+    assert not service.in_flight
+
+
+def test_cancelled_leader_releases_waiters():
+    release = threading.Event()
+
+    async def run():
+        service = NutritionService()
+        compute = service._compute
+        service._compute = lambda path, payload: release.wait(5) and compute(path, payload)
+        leader = asyncio.ensure_future(service.respond('POST', '/day', DAY))
+        await asyncio.sleep(0.05)
+        waiter = asyncio.ensure_future(service.respond('POST', '/day', DAY))
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        try:
+            return service, await asyncio.wait_for(waiter, 2)
+        finally:
+            release.set()
+
+    service, (status, body) = asyncio.run(run())
+    assert status == 503 and b'cancelled' in body
+    assert not service.in_flight
+
+
+async def _exchange(request):
+    service = NutritionService()
+    server = await asyncio.start_server(service.handle, '127.0.0.1', 0)
+    async with server:
+        reader, writer = await asyncio.open_connection(*server.sockets[0].getsockname()[:2])
+        writer.write(request)
+        response = await asyncio.wait_for(reader.read(), 5)
+        writer.close()
+    return response
+
+
+def test_non_numeric_content_length_is_bad_request():
+    for length in (b'abc', b'-5'):
+        response = asyncio.run(_exchange(b'POST /day HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n'))
+        assert response.startswith(b'HTTP/1.1 400 Bad Request')
+        assert b'Connection: close' in response
+
+
+def test_day_over_http():
+    response = asyncio.run(_exchange(b'POST /day HTTP/1.1\r\nConnection: close\r\nContent-Length: '
+                                     + str(len(DAY)).encode() + b'\r\n\r\n' + DAY))
+    assert response.startswith(b'HTTP/1.1 200 OK')
+    assert json.loads(response.split(b'\r\n\r\n', 1)[1])['calcium']
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals
+from fdc_loader import FDC_NUTRIENTS, load_json
+from nutrient_matrix import NutrientMatrix
+from parallel_runner import generate, run
+
+NUMBERS = {key: number for number, key in FDC_NUTRIENTS.items()}
+
+
+def _food_table(tmp_path, foods):
+    source = tmp_path / 'foods.json'
+    source.write_text(json.dumps({'FoundationFoods': [
+        {'fdcId': fdc_id, 'description': name, 'foodNutrients': [
+            {'nutrient': {'number': NUMBERS[key]}, 'amount': value} for key, value in USDA_DATA[name].items()]}
+        for fdc_id, name in foods.items()]}))
+    path = str(tmp_path / 'table.foods')
+    load_json(str(source), path)
+    return path
+
+
+def _write(path, plans):
+    path.write_text(''.join(json.dumps({'client': f"c{i}", 'plan': plan}) + '\n' for i, plan in enumerate(plans)))
+    return str(path)
+
+
+def test_worker_count_does_not_change_output(tmp_path):
+    source = str(tmp_path / 'plans.jsonl')
+    generate(40, source)
+    outputs = []
+    for workers in (1, 3):
+        destination = str(tmp_path / f"out{workers}.jsonl")
+        run(source, destination, workers=workers, chunk_size=7)
+        outputs.append(open(destination, 'rb').read())
+    assert outputs[0] == outputs[1]
+    engine = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES)
+    first = json.loads(outputs[0].splitlines()[0])
+    plan = json.loads(open(source).readline())['plan']
+    assert first['days']['1'] == engine.day_with_sources(
+        {slot: [tuple(row) for row in rows] for slot, rows in plan['1'].items()})
+
+
+def test_food_table_plans_use_fdc_ids(tmp_path):
+    day = bulking_meals[1]
+    ids = {name: 100_000 + i for i, name in enumerate(dict.fromkeys(f for rows in day.values() for f, _ in rows))}
+    table = _food_table(tmp_path, {fdc_id: name for name, fdc_id in ids.items()})
+    plan = {'1': {slot: [[ids[food], portion] for food, portion in rows] for slot, rows in day.items()}}
+    destination = str(tmp_path / 'out.jsonl')
+    run(_write(tmp_path / 'plans.jsonl', [plan]), destination, workers=1, food_table=table)
+    result = json.loads(open(destination).readline())['days']['1']
+    expected = NutrientMatrix(USDA_DATA, PORTIONS, DV, MEAL_NAMES).day_with_sources(day)
+    assert result['calcium']['value'] == pytest.approx(expected['calcium']['value'], rel=1e-3)
+    assert result['iron']['value'] > 0
+
+
+def test_food_table_rejects_slugs(tmp_path):
+    table = _food_table(tmp_path, {100_000: 'rolled_oats'})
+    source = _write(tmp_path / 'plans.jsonl', [{'1': {'breakfast': [['rolled_oats', '1c_oats']]}}])
+    with pytest.raises(ValueError, match="client c0 day 1: food 'rolled_oats' is not an fdc_id"):
+        run(source, str(tmp_path / 'out.jsonl'), workers=1, food_table=table)
@@ -0,0 +1,68 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+import pytest
+
+import plan_generator
+from plan_generator import WEEK_DAYS, DayCost, best_weeks, generate
+from portion_optimizer import MACRO_BOUNDS
+from trace_index import NUTRIENTS
+
+# Roughly half a day's worth of each nutrient, in NUTRIENTS order
+HALF_DAY = np.array([1400, 65, 47, 10, 180, 17, 1000, 100], dtype=float)
+
+
+def library(meals_per_slot, slots=2, seed=0):
+    rng = np.random.default_rng(seed)
+    return [HALF_DAY * rng.uniform(0.6, 1.4, (meals_per_slot, len(NUTRIENTS))) for _ in range(slots)]
+
+
+def brute_force_weeks(day_costs, day_meals, max_repeats):
+    """Every multiset of WEEK_DAYS days within the repeat cap, as sorted (cost, days)"""
+    weeks = []
+    for week in itertools.combinations_with_replacement(range(len(day_costs)), WEEK_DAYS):
+        uses = Counter((slot, meal) for day in week for slot, meal in enumerate(day_meals[day]))
+        if max(uses.values()) <= max_repeats:
+            weeks.append((sum(day_costs[day] for day in week), list(week)))
+    return sorted(weeks)
+
+
+def test_best_weeks_come_out_in_cost_order_within_repeat_cap():
+    rng = np.random.default_rng(1)
+    day_meals = [(a, b) for a in range(3) for b in range(3)]
+    days = sorted((float(c), meals) for c, meals in zip(rng.uniform(1, 10, len(day_meals)), day_meals))
+    weeks, complete = best_weeks(days, top=15, max_repeats=3)
+    assert complete
+    costs = [cost for cost, _ in weeks]
+    assert costs == sorted(costs)
+    for _, chosen in weeks:
+        assert len(chosen) == WEEK_DAYS
+        uses = Counter((slot, meal) for day in chosen for slot, meal in enumerate(days[day][1]))
+        assert max(uses.values()) <= 3
+    expected = brute_force_weeks([c for c, _ in days], [m for _, m in days], 3)[:15]
+    assert costs == pytest.approx([cost for cost, _ in expected])
+
+
+@pytest.mark.parametrize('initial_days', [2, 64])
+def test_generate_matches_brute_force_on_a_tiny_library(monkeypatch, initial_days):
+    # Two days kept at first forces the kept set to double until the top weeks are proven
+    monkeypatch.setattr(plan_generator, 'INITIAL_DAYS', initial_days)
+    vectors = library(3)
+    cost = DayCost(MACRO_BOUNDS)
+    day_meals = list(itertools.product(range(3), range(3)))
+    day_costs = [float(cost(vectors[0][a] + vectors[1][b])) for a, b in day_meals]
+    expected = brute_force_weeks(day_costs, day_meals, 3)[:5]
+
+    plans, stats = generate(vectors, MACRO_BOUNDS, top=5, max_repeats=3, size=0)
+    assert stats['proven'] and not stats['shortlisted']
+    assert stats['rounds'] > 1 or initial_days >= len(day_meals)
+    assert [c for c, _ in plans] == pytest.approx([c for c, _ in expected])
+    for week_cost, days in plans:
+        assert week_cost == pytest.approx(sum(day_costs[day_meals.index(day)] for day in days))
+        assert max(Counter((s, m) for day in days for s, m in enumerate(day)).values()) <= 3
+
+
+def test_too_few_meals_for_the_repeat_cap():
+    with pytest.raises(ValueError, match="too few meals"):
+        generate(library(2), MACRO_BOUNDS, max_repeats=3, size=0)
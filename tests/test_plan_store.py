@@ -0,0 +1,39 @@
+import copy
+
+from calculate_all_nutrients_complete import bulking_meals, cutting_meals
+from plan_store import PlanStore
+
+
+def test_plans_round_trip_and_share_objects(tmp_path):
+    store = PlanStore(str(tmp_path))
+    store.commit('bulking', bulking_meals)
+    written = store.stats['objects_written']
+    variant = copy.deepcopy(bulking_meals)
+    variant[2]['lunch'][0] = (variant[2]['lunch'][0][0], '0.5c_rice')
+    store.commit('variant', variant)
+    # Only the changed row, its meal, its day and the version are new
+    assert store.stats['objects_written'] - written == 4
+    assert store.diff('bulking', 'variant') == {'2': [{'slot': 'lunch', 'removed': [bulking_meals[2]['lunch'][0]],
+                                                        'added': [variant[2]['lunch'][0]]}]}
+    assert store.diff('bulking', 'bulking') == {}
+
+
+def test_diff_counts_repeated_rows(tmp_path):
+    store = PlanStore(str(tmp_path))
+    row = ('egg_large', '1_egg')
+    store.commit('one', {1: {'breakfast': [row, ('rolled_oats', '1c_oats')]}})
+    store.commit('two', {1: {'breakfast': [row, row, ('rolled_oats', '1c_oats')]}})
+    assert store.diff('one', 'two') == {'1': [{'slot': 'breakfast', 'removed': [], 'added': [row]}]}
+    assert store.diff('two', 'one') == {'1': [{'slot': 'breakfast', 'removed': [row], 'added': []}]}
+
+
+def test_day_changes_between_phases(tmp_path):
+    store = PlanStore(str(tmp_path))
+    store.commit('bulking', bulking_meals)
+    store.commit('cutting', cutting_meals)
+    for change in store.diff_days(store.days('bulking')['3'], store.days('cutting')['3']):
+        slot = change['slot']
+        before, after = list(bulking_meals[3].get(slot, [])), list(cutting_meals[3].get(slot, []))
+        for row in change['removed']:
+            before.remove(row)
+        assert sorted(before + change['added']) == sorted(after)
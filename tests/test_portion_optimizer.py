@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from calculate_all_nutrients_complete import PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix
+from portion_optimizer import MACRO_BOUNDS, bounds_from_targets, food_table, optimize_day, optimize_phase
+
+# Per 100 g: rice is all calories, beans carry the iron
+FOODS = {'rice': {'calories': 100.0, 'iron': 0.0}, 'beans': {'calories': 50.0, 'iron': 2.0}}
+SMALL_PORTIONS = {'rice_100g': 100.0, 'beans_100g': 100.0, 'beans_150g': 150.0}
+
+
+@pytest.fixture(scope='module')
+def small():
+    return NutrientMatrix(FOODS, SMALL_PORTIONS, {'iron': 3.0})
+
+
+@pytest.fixture(scope='module')
+def engine():
+    return NutrientMatrix(food_table(), PORTIONS, DV, MEAL_NAMES)
+
+
+def test_bounds_follow_app_targets():
+    assert MACRO_BOUNDS['protein'] == (120, 140)
+    assert MACRO_BOUNDS['fiber'] == (30, 38)
+    assert MACRO_BOUNDS['sodium'] == (0, 2300)
+    assert MACRO_BOUNDS['calories'] == pytest.approx((2816 * 0.9, 2816 * 1.1))
+    assert bounds_from_targets({'fat': 100}, {}, tolerance=0.2) == {'fat': (80.0, 120.0)}
+
+
+def test_day_inside_bounds_is_unchanged(small):
+    meals = {'lunch': [('rice', 'rice_100g'), ('beans', 'beans_150g')]}
+    result = optimize_day(small, meals, {'calories': (100, 200)})
+    assert result['changed_rows'] == 0
+    assert result['meals'] == {'lunch': [('rice', 100.0), ('beans', 150.0)]}
+    assert not result['shortfalls'] and not result['excesses']
+
+
+def test_smallest_change_reaches_bounds(small):
+    # Iron needs 150 g of beans; calories then cap rice at 85 g
+    meals = {'lunch': [('rice', 'rice_100g'), ('beans', 'beans_100g')]}
+    result = optimize_day(small, meals, {'calories': (150, 160)})
+    grams = dict(result['meals']['lunch'])
+    assert grams == pytest.approx({'rice': 85.0, 'beans': 150.0})
+    assert result['totals']['iron'] == pytest.approx(3.0)
+    assert not result['shortfalls'] and not result['excesses']
+
+
+def test_food_limit_caps_the_sum_of_its_rows(small):
+    meals = {'lunch': [('beans', 'beans_100g')], 'dinner': [('beans', 'beans_100g'), ('rice', 'rice_100g')]}
+    result = optimize_day(small, meals, {'calories': (0, 400)}, food_limits={'beans': (0, 120)})
+    beans = sum(grams for slot in result['meals'].values() for food, grams in slot if food == 'beans')
+    assert beans == pytest.approx(120.0)
+    assert result['shortfalls']['iron'] == pytest.approx(3.0 - 2.4)
+
+
+def test_unreachable_target_is_a_shortfall(small):
+    meals = {'lunch': [('rice', 'rice_100g')]}
+    result = optimize_day(small, meals, {'calories': (500, 600)})
+    assert dict(result['meals']['lunch']) == {'rice': 200.0}
+    assert result['shortfalls']['calories'] == pytest.approx(300.0)
+    assert result['shortfalls']['iron'] == pytest.approx(3.0)
+
+
+@pytest.mark.parametrize('plan', [bulking_meals, cutting_meals], ids=['bulking', 'cutting'])
+def test_shipped_plans_are_within_bounds_up_to_shortfalls(engine, plan):
+    for day, result in optimize_phase(engine, plan).items():
+        for nutrient in ('calories', 'protein', 'fat', 'carbs'):
+            lo, hi = MACRO_BOUNDS[nutrient]
+            assert lo - 1e-6 <= result['totals'][nutrient] + result['shortfalls'].get(nutrient, 0), (day, nutrient)
+            assert result['totals'][nutrient] - result['excesses'].get(nutrient, 0) <= hi + 1e-6, (day, nutrient)
+        assert np.isfinite(list(result['totals'].values())).all()
@@ -0,0 +1,40 @@
+import pytest
+
+from calculate_all_nutrients_complete import PORTIONS
+from portion_resolver import PortionResolver, UnresolvedPortion
+
+
+@pytest.fixture(scope='module')
+def resolver():
+    return PortionResolver()
+
+
+def test_every_portions_key_resolves_to_its_weight(resolver):
+    for key, grams in PORTIONS.items():
+        food, resolved = resolver.resolve(key)
+        assert resolved == pytest.approx(grams, abs=1e-9), key
+
+
+def test_free_text_quantities(resolver):
+    assert resolver.resolve("1 cup yogurt") == resolver.resolve("1c_yogurt")
+    assert resolver.resolve("150g tofu") == ('tofu_firm', 150.0)
+    food, grams = resolver.resolve("1 1/2 cups rice")
+    assert food == 'brown_rice_cooked' and grams == pytest.approx(1.5 * PORTIONS['1c_rice'])
+
+
+def test_memoized_failure_raises_fresh_exception(resolver):
+    raised = []
+    for _ in range(3):
+        with pytest.raises(UnresolvedPortion, match="no leading quantity") as info:
+            resolver.resolve("some rice")
+        raised.append(info.value)
+    assert len({id(exc) for exc in raised}) == 3
+    assert resolver.memo["some rice"] == str(raised[0])
+    assert all(len(list(_frames(exc.__traceback__))) == len(list(_frames(raised[0].__traceback__)))
+               for exc in raised)
+
+
+def _frames(tb):
+    while tb is not None:
+        yield tb
+        tb = tb.tb_next
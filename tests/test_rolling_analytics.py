@@ -0,0 +1,94 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from rolling_analytics import RollingHistory
+
+NUTRIENTS = ['iron', 'calcium', 'zinc']
+
+
+def _history(windows, rng, n_users=5, n_days=40, **kwargs):
+    history = RollingHistory(NUTRIENTS, windows=windows, **kwargs)
+    log = {}
+    for day in range(n_days):
+        users = [u for u in range(n_users) if rng.random() < 0.8 or day < 2]
+        values = rng.uniform(20, 180, (len(users), len(NUTRIENTS))).astype(np.float32)
+        if day % 2:
+            history.append_batch(users, values)
+        else:
+            for user, row in zip(users, values):
+                history.append(user, row)
+        for user, row in zip(users, values):
+            log.setdefault(user, []).append(row.astype(np.float64))
+    return history, log
+
+
+def test_running_sums_match_recomputation():
+    history, log = _history((7, 14, 30), np.random.default_rng(0))
+    for user, days in log.items():
+        days = np.array(days)
+        for w in (7, 14, 30):
+            np.testing.assert_allclose(history.rolling_average(w, user), days[-w:].mean(axis=0), rtol=1e-6)
+        expected = (days[-7:].sum(axis=0) - days[-14:-7].sum(axis=0)) / 7
+        np.testing.assert_allclose(history.week_over_week(user), expected, rtol=1e-6, atol=1e-6)
+        below = (days[:, 1] < 100)[::-1]
+        assert history.current_streak('calcium', user) == (np.argmin(below) if not below.all() else len(below))
+        assert history.days_below('iron', 70, last=20, user=user) == int((days[-20:, 0] < 70).sum())
+
+
+def test_week_over_week_without_tracked_weeks():
+    tracked, _ = _history((7, 14, 30), np.random.default_rng(1))
+    untracked, _ = _history((30,), np.random.default_rng(1))
+    np.testing.assert_allclose(untracked.week_over_week(), tracked.week_over_week(), rtol=1e-5, atol=1e-4)
+    np.testing.assert_allclose(untracked.week_over_week(3), tracked.week_over_week(3), rtol=1e-5, atol=1e-4)
+    assert set(untracked.summary(0)['iron']) == {'avg_30d', 'week_over_week', 'streak_below', 'longest_streak_below'}
+
+
+def test_starts_empty_and_grows():
+    history, log = _history((7,), np.random.default_rng(2), n_users=40, users=0)
+    assert len(history.users) == 40 and len(history.count) >= 40
+    np.testing.assert_allclose(history.rolling_average(7, 39), np.array(log[39][-7:]).mean(axis=0), rtol=1e-6)
+
+
+@pytest.mark.filterwarnings('ignore:Mean of empty slice')
+def test_gaps_are_missing_calendar_days():
+    rng = np.random.default_rng(3)
+    history = RollingHistory(NUTRIENTS, horizon=30, windows=(7, 14, 30))
+    start = datetime.date(2024, 1, 1)
+    # User 0 skips the odd weekend, user 1 goes quiet for longer than the horizon, user 2 logs every other day
+    logged = {0: [d for d in range(60) if d % 7 not in (5, 6) or d < 10],
+              1: list(range(12)) + list(range(50, 60)),
+              2: list(range(0, 60, 2))}
+    calendar = {user: np.full((60, len(NUTRIENTS)), np.nan) for user in logged}
+    for day in range(60):
+        users = [user for user, days in logged.items() if day in days]
+        values = rng.uniform(20, 180, (len(users), len(NUTRIENTS))).astype(np.float32)
+        if day % 3:
+            history.append_batch(users, values, start + datetime.timedelta(days=day))
+        else:
+            for user, row in zip(users, values):
+                history.append(user, row, (start + datetime.timedelta(days=day)).toordinal())
+        for user, row in zip(users, values):
+            calendar[user][day] = row
+
+    for user, days in calendar.items():
+        # Windows end at each user's latest logged day
+        days = days[:logged[user][-1] + 1]
+        for w in (7, 14, 30):
+            np.testing.assert_allclose(history.rolling_average(w, user), np.nanmean(days[-w:], axis=0), rtol=1e-6)
+        expected = np.nanmean(days[-7:], axis=0) - np.nanmean(days[-14:-7], axis=0)
+        np.testing.assert_allclose(history.week_over_week(user), expected, rtol=1e-6, atol=1e-6)
+        below = (days[:, 1] < 100)[::-1]
+        assert history.current_streak('calcium', user) == (np.argmin(below) if not below.all() else len(below))
+        assert history.days_below('iron', 70, last=20, user=user) == int((days[-20:, 0] < 70).sum())
+    assert history.count[history.user_index[1]] == 22
+    # User 1's quiet spell outlasted the horizon, so only the last ten days are left in any window
+    assert history.logged[30][history.user_index[1]] == 10
+    with pytest.raises(ValueError, match="date order"):
+        history.append(0, np.ones(len(NUTRIENTS)), start)
+
+
+def test_short_horizon_rejected():
+    with pytest.raises(ValueError, match="at least 14 days"):
+        RollingHistory(NUTRIENTS, horizon=10, windows=(7,))
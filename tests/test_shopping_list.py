@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from shopping_list import FOOD_BITS, USER_BITS, WEEK_BITS, GroupAggregator, group_sum, pack_keys, rollup, unpack_keys
+
+
+def test_keys_round_trip_at_field_limits():
+    users = [0, (1 << USER_BITS) - 1, 12345]
+    weeks = [(1 << WEEK_BITS) - 1, 0, 52]
+    foods = [0, (1 << FOOD_BITS) - 1, 400_000]
+    assert [a.tolist() for a in unpack_keys(pack_keys(users, weeks, foods))] == [users, weeks, foods]
+
+
+@pytest.mark.parametrize('users, weeks, foods, field', [
+    ([1 << USER_BITS], [0], [0], 'user'),
+    ([0], [1 << WEEK_BITS], [0], 'week'),
+    ([0], [0], [1 << FOOD_BITS], 'food'),
+    ([0], [0], [-1], 'food'),
+])
+def test_out_of_range_ids_raise(users, weeks, foods, field):
+    with pytest.raises(ValueError, match=f"{field} ids must be in"):
+        pack_keys(users, weeks, foods)
+
+
+@pytest.mark.parametrize('spill', [False, True])
+def test_partitioned_totals_match_one_group_sum(tmp_path, spill):
+    rng = np.random.default_rng(0)
+    aggregator = GroupAggregator(partitions=8, spill_dir=str(tmp_path) if spill else None, buffer_rows=500)
+    all_keys, all_grams = [], []
+    for _ in range(20):
+        keys = pack_keys(rng.integers(0, 50, 300), rng.integers(0, 4, 300), rng.integers(0, 30, 300))
+        grams = rng.random(300) * 100
+        aggregator.add(keys, grams)
+        all_keys.append(keys)
+        all_grams.append(grams)
+    keys, grams = aggregator.totals()
+    expected_keys, expected_grams = group_sum(np.concatenate(all_keys), np.concatenate(all_grams))
+    order = np.argsort(keys)
+    assert np.array_equal(keys[order], expected_keys)
+    np.testing.assert_allclose(grams[order], expected_grams)
+    per_food = rollup(keys, grams, 'total')
+    assert np.array_equal(per_food[0], np.unique(unpack_keys(expected_keys)[2]))
@@ -0,0 +1,59 @@
+import copy
+
+import pytest
+
+import calculate_all_nutrients_complete as complete
+from calculate_all_nutrients import USDA_DATA as MACRO_DATA
+from calculate_all_nutrients_complete import USDA_DATA, PORTIONS, DV, MEAL_NAMES, bulking_meals, cutting_meals
+from nutrient_matrix import NutrientMatrix
+from substitution_recommender import SubstitutionIndex
+
+KEYS = {'vit_e': 'vitaminE', 'vit_k': 'vitaminK', 'vit_c': 'vitaminC', 'folate': 'folate', 'vit_b12': 'vitaminB12',
+        'calcium': 'calcium', 'iron': 'iron', 'zinc': 'zinc', 'magnesium': 'magnesium', 'potassium': 'potassium'}
+
+
+@pytest.fixture(scope='module')
+def index():
+    table = {food: {**values, 'calories': MACRO_DATA[food]['calories']}
+             for food, values in USDA_DATA.items() if 'calories' in MACRO_DATA.get(food, {})}
+    return SubstitutionIndex(NutrientMatrix(table, PORTIONS, DV, MEAL_NAMES))
+
+
+def _apply(meals, recommendation, portion):
+    meals = copy.deepcopy(meals)
+    row = (recommendation['food'], portion)
+    if recommendation['action'] == 'add':
+        meals['snack3'] = meals.get('snack3', []) + [row]
+    else:
+        slot = meals[recommendation['meal']]
+        slot[slot.index(tuple(recommendation['replaces']))] = row
+    return meals
+
+
+def test_applied_recommendations_reach_the_daily_value(index, monkeypatch):
+    checked = 0
+    for plan in (bulking_meals, cutting_meals):
+        for day, meals in plan.items():
+            for nutrient, key in KEYS.items():
+                if complete.calc_day_with_sources(meals, day)[key]['percentage'] >= 100:
+                    assert index.recommend(meals, nutrient) == []
+                    continue
+                for r in index.recommend(meals, nutrient, k=5):
+                    portion = f"test_{r['food']}_{r['grams']}g"
+                    monkeypatch.setitem(complete.PORTIONS, portion, r['grams'])
+                    result = complete.calc_day_with_sources(_apply(meals, r, portion), day)[key]
+                    assert result['percentage'] >= 100, (day, nutrient, r)
+                    checked += 1
+    assert checked > 50
+
+
+def test_meals_under_the_source_threshold_are_not_counted(index, monkeypatch):
+    # 22 g of yogurt is 0.088 ug of B12, a meal calc_day_with_sources leaves out of the total
+    meals = {'breakfast': [('greek_yogurt_2pct', '1c_yogurt')], 'snack1': [('greek_yogurt_2pct', '1_scoop_whey')]}
+    assert [s['meal'] for s in complete.calc_day_with_sources(meals, 1)['vitaminB12']['sources']] == ['Breakfast']
+    recommendations = index.recommend(meals, 'vit_b12', k=5)
+    assert {r['meal'] for r in recommendations} >= {'snack1'}
+    for r in recommendations:
+        portion = f"test_{r['food']}_{r['grams']}g"
+        monkeypatch.setitem(complete.PORTIONS, portion, r['grams'])
+        assert complete.calc_day_with_sources(_apply(meals, r, portion), 1)['vitaminB12']['percentage'] >= 100, r
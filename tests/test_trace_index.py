@@ -0,0 +1,70 @@
+import json
+import os
+import re
+
+import pytest
+
+from trace_index import DATA_DIR, NUTRIENTS, build_index, day_trace, js_round
+
+VALIDATION_TS = os.path.join(os.path.dirname(DATA_DIR), 'utils', 'validation.ts')
+
+
+def _load(name):
+    with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def index():
+    return build_index(_load('foodReferences.json'), _load('meals.json'), _load('weeklyPlan.json'))
+
+
+@pytest.fixture(scope='module')
+def reference():
+    """expectedTable2Data and expectedWeeklyAverage, parsed out of validation.ts"""
+    with open(VALIDATION_TS, encoding='utf-8') as f:
+        source = f.read()
+    numbers = r'(\w+):\s*(-?[\d.]+)'
+    table = re.search(r'expectedTable2Data = \[(.*?)\];', source, re.S).group(1)
+    days = [{key: float(value) for key, value in re.findall(numbers, row)} for row in re.findall(r'\{(.*?)\}', table)]
+    weekly = re.search(r'expectedWeeklyAverage = \{(.*?)\};', source, re.S).group(1)
+    return days, {key: float(value) for key, value in re.findall(numbers, weekly)}
+
+
+def test_original_plan_lines_up_with_table2(index, reference):
+    days, _ = reference
+    plan = index['plans']['original']['days']
+    assert [d['day'] for d in plan] == [int(d['day']) for d in days]
+    assert not index['missing']['foods'] and not index['missing']['meals']
+    # The egg days carry the cholesterol in both
+    col = NUTRIENTS.index('cholesterol')
+    assert [d['totals'][col] > 500 for d in plan] == [d['cholesterol'] > 500 for d in days]
+
+
+def test_weekly_average_rounds_the_day_totals(index):
+    for plan in index['plans'].values():
+        for col, nutrient in enumerate(NUTRIENTS):
+            mean = sum(d['totals'][col] for d in plan['days']) / len(plan['days'])
+            expected = js_round(mean) if nutrient in ('calories', 'sodium', 'cholesterol') else js_round(mean * 10) / 10
+            assert plan['weeklyAverage'][nutrient] == expected
+
+
+def test_day_trace_sums_to_the_day_total(index):
+    for version, plan in index['plans'].items():
+        for day in plan['days']:
+            trace = day_trace(index, version, day['day'], 'protein')
+            assert trace['value'] == pytest.approx(sum(meal['value'] for meal in trace['children']))
+            assert trace['value'] == day['totals'][NUTRIENTS.index('protein')]
+
+
+@pytest.mark.xfail(strict=True, reason="meals.json and foodReferences.json do not reproduce Table 2 "
+                                       "(day 1 is 2432 kcal against 2829); the /validation page reports the same gaps")
+def test_totals_match_validation_reference(index, reference):
+    days, weekly = reference
+    plan = index['plans']['original']
+    # validation.ts tolerances: 5% or 10 units per day, 5% or 5 units for the weekly average
+    for day, expected in zip(plan['days'], days):
+        for nutrient, value in zip(NUTRIENTS, day['totals']):
+            assert abs(value - expected[nutrient]) <= max(expected[nutrient] * 0.05, 10), (day['day'], nutrient)
+    for nutrient, value in plan['weeklyAverage'].items():
+        assert abs(value - weekly[nutrient]) <= max(weekly[nutrient] * 0.05, 5), nutrient
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Precomputed Trace Index Builder
+Reads foodReferences.json, meals.json and weeklyPlan.json and writes
+src/data/traceIndex.json: food -> meal -> day -> week totals and drill-down
+traces for both plan versions, computed with the same arithmetic as
+src/utils/nutritionCalculator.ts so pages can look values up instead of
+recomputing them on every render. Each meal is computed once however many
+days use it. The file is generated, not committed: nothing in src/ reads it
+yet, and plan_generator.py builds the index in memory.
+
+Usage:
+    python3 trace_index.py [output.json]
+"""
+
+import json
+import math
+import os
+import sys
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'data')
+DEFAULT_OUTPUT = os.path.join(DATA_DIR, 'traceIndex.json')
+
+# NutritionFacts fields, in the order every vector in the index uses
+NUTRIENTS = ['calories', 'protein', 'fat', 'saturatedFat', 'carbs', 'fiber', 'sodium', 'cholesterol']
+
+# Day slots in calculateDayNutrition / buildDayNutrientTrace order
+SLOTS = [('breakfast', 'Breakfast'), ('lunch', 'Lunch'), ('dinner', 'Dinner'), ('snack1', 'Snack 1'), ('snack2', 'Snack 2')]
+
+# Weekly averages: nutrients rounded to whole numbers, the rest to one decimal
+WHOLE = {'calories', 'sodium', 'cholesterol'}
+
+
+def js_round(x):
+    """JavaScript Math.round (halves round up, unlike Python's round)"""
+    return math.floor(x + 0.5)
+
+
+def _add(total, values):
+    return [t + v for t, v in zip(total, values)]
+
+
+def build_index(foods, meals, weekly_plan):
+    """Build the index structure from the three parsed data files"""
+    food_map = {food['id']: food for food in foods}
+    meal_map = {meal['id']: meal for meal in meals}
+    missing = {'foods': set(), 'meals': set()}
+
+    index_foods = {
+        food['id']: {
+            'name': food['name'],
+            'values': [food[n] for n in NUTRIENTS],
+            'sourceUrl': food.get('sourceUrl'),
+            'sourceNumber': food.get('sourceNumber'),
+        }
+        for food in foods
+    }
+
+    index_meals = {}
+    for meal in meals:
+        totals = [0] * len(NUTRIENTS)
+        components = []
+        for component in meal['components']:
+            food = food_map.get(component['foodId'])
+            if food is None:
+                # calculateMealNutrition skips unknown foods; the trace shows them as zero
+                missing['foods'].add(component['foodId'])
+                components.append({'foodId': component['foodId'], 'quantity': component['quantity'],
+                                   'values': [0] * len(NUTRIENTS)})
+                continue
+            values = [food[n] * component['quantity'] for n in NUTRIENTS]
+            totals = _add(totals, values)
+            components.append({'foodId': component['foodId'], 'quantity': component['quantity'], 'values': values})
+        index_meals[meal['id']] = {'name': meal['name'], 'type': meal['type'], 'totals': totals,
+                                   'components': components}
+
+    plans = {}
+    for version, plan in weekly_plan.items():
+        days = []
+        week = [0] * len(NUTRIENTS)
+        for day in plan['days']:
+            totals = [0] * len(NUTRIENTS)
+            slots = []
+            for slot, label in SLOTS:
+                meal = index_meals.get(day[slot])
+                if meal is None:
+                    missing['meals'].add(day[slot])
+                else:
+                    totals = _add(totals, meal['totals'])
+                slots.append({'slot': slot, 'label': label, 'mealId': day[slot]})
+            days.append({'day': day['day'], 'meals': slots, 'totals': totals})
+            week = _add(week, totals)
+
+        count = len(plan['days'])
+        average = {n: js_round(total / count) if n in WHOLE else js_round(total / count * 10) / 10
+                   for n, total in zip(NUTRIENTS, week)} if count else {}
+        plans[version] = {'days': days, 'weeklyTotal': week, 'weeklyAverage': average}
+
+    return {
+        'nutrients': NUTRIENTS,
+        'foods': index_foods,
+        'meals': index_meals,
+        'plans': plans,
+        'missing': {kind: sorted(ids) for kind, ids in missing.items()},
+    }
+
+
+def day_trace(index, version, day_number, nutrient):
+    """NutrientTrace for one day and nutrient, the same tree buildDayNutrientTrace returns"""
+    col = index['nutrients'].index(nutrient)
+    day = next(d for d in index['plans'][version]['days'] if d['day'] == day_number)
+    meal_traces = []
+    for slot in day['meals']:
+        meal = index['meals'].get(slot['mealId'])
+        if meal is None:
+            meal_traces.append({'level': 'meal', 'id': slot['mealId'], 'name': slot['label'], 'value': 0, 'unit': 'g'})
+            continue
+        children = []
+        for component in meal['components']:
+            food = index['foods'].get(component['foodId'])
+            children.append({
+                'level': 'food', 'id': component['foodId'],
+                'name': f"{component['quantity']}x {food['name']}" if food else 'Unknown',
+                'value': component['values'][col], 'unit': 'g',
+                'sourceUrl': food and food['sourceUrl'], 'sourceNumber': food and food['sourceNumber'],
+            })
+        meal_traces.append({'level': 'meal', 'id': slot['mealId'], 'name': slot['label'],
+                            'value': meal['totals'][col], 'unit': 'g', 'children': children})
+    return {'level': 'day', 'id': f"day-{day_number}", 'name': f"Day {day_number}",
+            'value': day['totals'][col], 'unit': 'g', 'children': meal_traces}
+
+
+def main():
+    if len(sys.argv) > 2:
+        print(__doc__.strip())
+        sys.exit(1)
+    output = sys.argv[1] if len(sys.argv) == 2 else DEFAULT_OUTPUT
+
+    loaded = []
+    for name in ('foodReferences.json', 'meals.json', 'weeklyPlan.json'):
+        with open(os.path.join(DATA_DIR, name), encoding='utf-8') as f:
+            loaded.append(json.load(f))
+    index = build_index(*loaded)
+    data = json.dumps(index, separators=(',', ':')) + '\n'
+
+    # Leave the file untouched when nothing changed, so the Next.js build is not invalidated
+    try:
+        with open(output, encoding='utf-8') as f:
+            unchanged = f.read() == data
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(data)
+
+    print(f"{output}: {len(index['foods'])} foods, {len(index['meals'])} meals, "
+          f"{sum(len(p['days']) for p in index['plans'].values())} plan-days, "
+          f"{len(data):,} bytes ({'unchanged' if unchanged else 'written'})")
+    for kind, ids in index['missing'].items():
+        if ids:
+            print(f"  Missing {kind}: {', '.join(ids)}")
+    for version, plan in index['plans'].items():
+        print(f"  {version} weekly average: {plan['weeklyAverage']}")
+
+
+if __name__ == '__main__':
+    main()